@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Query latency and plans for the hot Pokemon/Pokedex access paths, without and with indexes.
+
+    python benchmarks/db_indexes.py [--rows 50000] [--repeat 200] [--database-url URL]
+
+Uses a throwaway SQLite file unless --database-url is given. The script drops
+and recreates the pokemon/pokedex_entries indexes, so never point it at a
+database you care about.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+parser.add_argument('--rows', type=int, default=50_000, help='Pokemon rows to generate')
+parser.add_argument('--repeat', type=int, default=200, help='timed runs per query')
+parser.add_argument('--database-url', help='benchmark against this database instead of a temp SQLite file')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from server import Pokemon, PokedexEntry, app, db, ensure_indexes  # noqa: E402
+
+# name -> (query builder, terminal method)
+QUERIES = {
+    'favorites (is_favorite, level)': (lambda: Pokemon.query.filter_by(is_favorite=True).order_by(Pokemon.level.desc()).limit(6), 'all'),
+    'party (in_party, level)': (lambda: Pokemon.query.filter_by(in_party=True).order_by(Pokemon.level.desc()).limit(6), 'all'),
+    'party count': (lambda: Pokemon.query.filter_by(in_party=True), 'count'),
+    'storage count': (lambda: Pokemon.query, 'count'),
+    'collection page (caught_at)': (lambda: Pokemon.query.order_by(Pokemon.caught_at.desc(), Pokemon.id.desc()).limit(50), 'all'),
+    'species filter (pokemon_id)': (lambda: Pokemon.query.filter(Pokemon.pokemon_id == 25), 'all'),
+    'pokedex encountered count': (lambda: PokedexEntry.query.filter_by(encountered=True), 'count'),
+    'pokedex caught count': (lambda: PokedexEntry.query.filter_by(caught=True), 'count'),
+}
+
+def seed(rows):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    db.session.query(Pokemon).delete()
+    db.session.query(PokedexEntry).delete()
+    db.session.bulk_insert_mappings(Pokemon, [{
+        'pokemon_id': rng.randint(1, 151),
+        'name': f'mon{i}',
+        'level': rng.randint(1, 100),
+        'caught_at': start + timedelta(minutes=rng.randint(0, 500_000)),
+        'is_favorite': rng.random() < 0.01,
+        'in_party': i < 6,
+    } for i in range(rows)])
+    db.session.bulk_insert_mappings(PokedexEntry, [
+        {'pokemon_id': i, 'encountered': rng.random() < 0.5, 'caught': rng.random() < 0.2} for i in range(1, 152)
+    ])
+    db.session.commit()
+
+def reconnect():
+    # pooled connections can keep plans from before the DDL; start from fresh ones
+    db.session.remove()
+    db.engine.dispose()
+
+def indexes():
+    return [index for table in (Pokemon.__table__, PokedexEntry.__table__) for index in table.indexes if not index.unique]
+
+def query_plan(query):
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(db.text(prefix + str(statement))).all()
+    return '; '.join(str(row[-1]) for row in rows)
+
+def show_plans(label):
+    for name, (build, _) in QUERIES.items():
+        print(f'plan {label}, {name}: {query_plan(build())}')
+
+def measure(label):
+    db.session.execute(db.text('ANALYZE'))
+    print(f'\n== {label} ==')
+    timings = {}
+    for name, (build, terminal) in QUERIES.items():
+        run = lambda: getattr(build(), terminal)()
+        run()
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+        print(f'{name:32s} {timings[name]:8.3f} ms')
+    return timings
+
+with app.app_context():
+    print(f'{db.engine.dialect.name}, {args.rows} pokemon rows, median of {args.repeat} runs')
+    seed(args.rows)
+
+    for index in indexes():
+        index.drop(bind=db.engine, checkfirst=True)
+    reconnect()
+    show_plans('without indexes')
+    before = measure('without indexes')
+
+    ensure_indexes()
+    reconnect()
+    show_plans('with indexes')
+    after = measure('with indexes')
+
+    print('\n== speedup ==')
+    for name in QUERIES:
+        print(f'{name:32s} {before[name] / after[name]:6.1f}x')
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Concurrency stress check for inventory stock moves: several processes spend and swap the same items.
+
+    python benchmarks/inventory_stress.py [--workers 8] [--events 100] [--database-url URL]
+
+Each worker process stands in for a gunicorn worker with its own app and
+connection pool, and goes through the real endpoints. Two phases run:
+
+  spend  every worker debits one Poke Ball at a time through /api/items/batch
+         from a stock smaller than the total demand; exactly `stock` debits may
+         succeed and the stock must end at zero, never below.
+  equip  every worker equips random held items on a few shared Pokemon; each
+         item's inventory stock plus the Pokemon holding it must stay equal to
+         what was seeded.
+
+--read-modify-write runs the same load through the previous query, change in
+Python, commit code for comparison, which double-spends and loses items.
+Exits non-zero when an invariant is broken.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from multiprocessing import Barrier, Process, Value
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+parser.add_argument('--workers', type=int, default=8)
+parser.add_argument('--events', type=int, default=100, help='debits and equips per worker')
+parser.add_argument('--pokemon', type=int, default=3, help='Pokemon the equip phase contends on')
+parser.add_argument('--database-url', help='use this database instead of a temp SQLite file (its items and Pokemon are reset)')
+parser.add_argument('--read-modify-write', action='store_true', help='use the previous non-atomic inventory code')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/stress.db'
+os.environ.setdefault('ENCOUNTER_FLUSH_INTERVAL', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+SPEND_ITEM = 'poke-ball'
+HELD_ITEMS = {'leftovers': 4, 'life-orb': 4, 'choice-band': 4}
+
+def read_modify_write_spend(db, Item):
+    item = Item.query.filter_by(item_id=SPEND_ITEM).first()
+    if not item or item.quantity < 1:
+        return False
+    item.quantity -= 1
+    db.session.commit()
+    return True
+
+def read_modify_write_equip(db, Item, Pokemon, db_id, item_id):
+    pokemon = db.session.get(Pokemon, db_id)
+    inventory_item = Item.query.filter_by(item_id=item_id).first()
+    if not inventory_item or inventory_item.quantity < 1:
+        return False
+    if pokemon.item_id:
+        old_inventory = Item.query.filter_by(item_id=pokemon.item_id).first()
+        if old_inventory:
+            old_inventory.quantity += 1
+        else:
+            db.session.add(Item(item_id=pokemon.item_id, quantity=1))
+    inventory_item.quantity -= 1
+    pokemon.item_id = item_id
+    db.session.commit()
+    return True
+
+def retry(operation):
+    # SQLite serializes writers; a busy timeout is retried, not counted
+    for attempt in range(50):
+        try:
+            return operation()
+        except Exception as e:
+            if 'locked' not in str(e) or attempt == 49:
+                raise
+            time.sleep(0.01)
+
+def worker(barrier, phase, worker_id, pokemon_ids, successes):
+    from server import Item, Pokemon, app, db
+
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    client = app.test_client()
+    rng = random.Random(worker_id)
+    barrier.wait()
+    for _ in range(args.events):
+        if phase == 'spend':
+            if args.read_modify_write:
+                def operation():
+                    with app.app_context():
+                        return read_modify_write_spend(db, Item)
+            else:
+                def operation():
+                    response = client.post('/api/items/batch', json={'deltas': {SPEND_ITEM: -1}})
+                    if response.status_code == 500:
+                        raise RuntimeError(response.get_json()['error'])
+                    assert response.status_code in (200, 409), response.get_data(as_text=True)
+                    return response.status_code == 200
+        else:
+            db_id, item_id = rng.choice(pokemon_ids), rng.choice(list(HELD_ITEMS))
+            if args.read_modify_write:
+                def operation():
+                    with app.app_context():
+                        return read_modify_write_equip(db, Item, Pokemon, db_id, item_id)
+            else:
+                def operation():
+                    response = client.post(f'/api/pokemon/{db_id}/equip', json={'itemId': item_id})
+                    assert response.status_code in (200, 400, 409), response.get_data(as_text=True)
+                    return response.status_code == 200
+        if retry(operation):
+            with successes.get_lock():
+                successes.value += 1
+
+def run_phase(phase, pokemon_ids):
+    successes = Value('i', 0)
+    barrier = Barrier(args.workers)
+    processes = [Process(target=worker, args=(barrier, phase, n, pokemon_ids, successes)) for n in range(args.workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    print(f'{phase}: {args.workers * args.events} requests in {elapsed:.2f}s '
+          f'({args.workers * args.events / elapsed:.0f}/s), {successes.value} succeeded')
+    return successes.value, any(process.exitcode for process in processes)
+
+if __name__ == '__main__':
+    from server import Item, Pokemon, app, db
+
+    spend_stock = args.workers * args.events // 2
+    with app.app_context():
+        Item.query.delete()
+        Pokemon.query.delete()
+        db.session.add(Item(item_id=SPEND_ITEM, quantity=spend_stock))
+        db.session.add_all(Item(item_id=item_id, quantity=quantity) for item_id, quantity in HELD_ITEMS.items())
+        pokemon = [Pokemon(pokemon_id=25, name=f'stress{n}', level=50) for n in range(args.pokemon)]
+        db.session.add_all(pokemon)
+        db.session.commit()
+        pokemon_ids = [p.id for p in pokemon]
+        print(f'{db.engine.dialect.name}, {args.workers} workers x {args.events} requests per phase, '
+              f'{"read-modify-write" if args.read_modify_write else "atomic stock moves"}')
+        db.engine.dispose()
+
+    spent, spend_failed = run_phase('spend', pokemon_ids)
+    _, equip_failed = run_phase('equip', pokemon_ids)
+
+    broken = []
+    with app.app_context():
+        stock = {item.item_id: item.quantity for item in Item.query}
+        held = {}
+        for p in Pokemon.query.filter(Pokemon.id.in_(pokemon_ids)):
+            if p.item_id:
+                held[p.item_id] = held.get(p.item_id, 0) + 1
+
+    remaining = stock.get(SPEND_ITEM, 0)
+    print(f'spend: {spent} debits succeeded from a stock of {spend_stock}, {remaining} left')
+    if spent + remaining != spend_stock or remaining < 0:
+        broken.append(f'{SPEND_ITEM}: {spent} spent + {remaining} left != {spend_stock} seeded')
+    for item_id, seeded in HELD_ITEMS.items():
+        total = stock.get(item_id, 0) + held.get(item_id, 0)
+        print(f'equip: {item_id} {stock.get(item_id, 0)} in stock + {held.get(item_id, 0)} held = {total}/{seeded}')
+        if total != seeded or stock.get(item_id, 0) < 0:
+            broken.append(f'{item_id}: {total} accounted for, {seeded} seeded')
+
+    print('\n'.join(broken) if broken else 'inventory consistent')
+    sys.exit(1 if broken or spend_failed or equip_failed else 0)
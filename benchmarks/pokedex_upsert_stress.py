@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Concurrency stress check for Pokedex counters: several processes hammer the same entries.
+
+    python benchmarks/pokedex_upsert_stress.py [--workers 8] [--events 200] [--database-url URL]
+
+Each worker process stands in for a gunicorn worker: it builds its own app and
+connection pool and posts encounters and catches through the real endpoints.
+With the atomic upserts every increment must land, so the final counters have
+to equal workers x events exactly. --read-modify-write runs the same load
+through the old query-then-increment code for comparison, which loses updates.
+Exits non-zero when any update is lost.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Barrier, Process
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+parser.add_argument('--workers', type=int, default=8)
+parser.add_argument('--events', type=int, default=200, help='encounters and catches per worker')
+parser.add_argument('--species', type=int, default=3, help='Pokedex entries the workers contend on')
+parser.add_argument('--database-url', help='use this database instead of a temp SQLite file (its pokedex is reset)')
+parser.add_argument('--read-modify-write', action='store_true', help='use the previous non-atomic update path')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/stress.db'
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+def read_modify_write(db, PokedexEntry, pokemon_id, kind):
+    entry = PokedexEntry.query.filter_by(pokemon_id=pokemon_id).first()
+    if not entry:
+        entry = PokedexEntry(pokemon_id=pokemon_id, encountered=True, caught=False, times_encountered=0, times_caught=0)
+        db.session.add(entry)
+    if kind == 'encounter':
+        entry.times_encountered += 1
+    else:
+        entry.caught = True
+        entry.times_caught += 1
+    db.session.commit()
+
+def worker(barrier, worker_id):
+    from server import PokedexEntry, app, db
+
+    client = app.test_client()
+    barrier.wait()
+    for i in range(args.events):
+        pokemon_id = (worker_id + i) % args.species + 1
+        for kind in ('encounter', 'catch'):
+            for attempt in range(20):
+                try:
+                    if args.read_modify_write:
+                        with app.app_context():
+                            read_modify_write(db, PokedexEntry, pokemon_id, kind)
+                    else:
+                        response = client.post(f'/api/pokedex/{kind}', json={'pokemonId': pokemon_id})
+                        assert response.status_code == 200, response.get_data(as_text=True)
+                    break
+                except Exception as e:
+                    # SQLite serializes writers; a busy timeout is retried, not counted as lost
+                    if 'locked' not in str(e) or attempt == 19:
+                        raise
+                    time.sleep(0.01)
+
+if __name__ == '__main__':
+    from server import PokedexEntry, app, db
+
+    with app.app_context():
+        PokedexEntry.query.delete()
+        db.session.commit()
+        if args.read_modify_write:
+            for pokemon_id in range(1, args.species + 1):
+                db.session.add(PokedexEntry(pokemon_id=pokemon_id, encountered=True, times_encountered=0, times_caught=0))
+            db.session.commit()
+        db.engine.dispose()
+
+    barrier = Barrier(args.workers)
+    processes = [Process(target=worker, args=(barrier, n)) for n in range(args.workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    expected = args.workers * args.events
+    with app.app_context():
+        encountered = sum(entry.times_encountered for entry in PokedexEntry.query)
+        caught = sum(entry.times_caught for entry in PokedexEntry.query)
+        print(f'{db.engine.dialect.name}, {args.workers} workers x {args.events} encounter+catch pairs '
+              f'on {args.species} entries, {"read-modify-write" if args.read_modify_write else "atomic upsert"}')
+        print(f'elapsed {elapsed:.2f}s, {2 * expected / elapsed:.0f} updates/s')
+        print(f'times_encountered {encountered}/{expected}, times_caught {caught}/{expected}')
+
+    failed = any(process.exitcode for process in processes)
+    lost = encountered != expected or caught != expected
+    print('LOST UPDATES' if lost else 'no lost updates')
+    sys.exit(1 if lost or failed else 0)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Serialization cost of Pokemon list responses: ORM objects + to_dict + jsonify vs column rows + RowSerializer.
+
+    python benchmarks/serialization.py [--rows 5000] [--repeat 20] [--database-url URL]
+
+Uses a throwaway SQLite file unless --database-url is given; the pokemon table
+is cleared and refilled, so never point it at a database you care about. The
+lean path is timed with orjson when it is installed and with the stdlib
+encoder, and the end-to-end /api/pokemon request is timed through the test client.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+parser.add_argument('--rows', type=int, default=5000, help='Pokemon rows to generate')
+parser.add_argument('--repeat', type=int, default=20, help='timed runs per variant')
+parser.add_argument('--database-url', help='benchmark against this database instead of a temp SQLite file')
+args = parser.parse_args()
+
+os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import server  # noqa: E402
+from server import POKEMON_FIELDS, POKEMON_ITEMS, Pokemon, app, db, json_response, pokemon_serializer  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+def seed(rows):
+    rng = random.Random(0)
+    items = list(POKEMON_ITEMS)
+    db.session.query(Pokemon).delete()
+    db.session.bulk_insert_mappings(Pokemon, [{
+        'pokemon_id': rng.randint(1, 151),
+        'name': f'mon{i}',
+        'level': rng.randint(1, 100),
+        'caught_at': datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 500_000)),
+        'item_id': rng.choice(items) if rng.random() < 0.3 else None,
+        **{f'{stat}_ev': rng.randint(0, 252) for stat in ('hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed')},
+        **{f'{stat}_iv': rng.randint(0, 31) for stat in ('hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed')}
+    } for i in range(rows)])
+    db.session.commit()
+
+def orm_to_dict():
+    return jsonify([p.to_dict() for p in Pokemon.query.order_by(Pokemon.caught_at.desc()).all()]).get_data()
+
+def lean_rows():
+    serializer = pokemon_serializer(tuple(POKEMON_FIELDS))
+    rows = db.session.execute(serializer.select().order_by(Pokemon.caught_at.desc()))
+    return json_response([serializer(row) for row in rows]).get_data()
+
+def lean_rows_stdlib():
+    orjson, server.orjson = server.orjson, None
+    try:
+        return lean_rows()
+    finally:
+        server.orjson = orjson
+
+def endpoint(client):
+    return client.get('/api/pokemon').get_data()
+
+def measure(label, run, baseline=None):
+    run()
+    samples = []
+    for _ in range(args.repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(samples)
+    speedup = f'{baseline / median:6.1f}x' if baseline else ''
+    print(f'{label:40s} {median:9.2f} ms {speedup}')
+    return median
+
+with app.app_context():
+    seed(args.rows)
+    print(f'{db.engine.dialect.name}, {args.rows} rows, all fields, median of {args.repeat} runs, '
+          f'orjson {"installed" if server.orjson else "not installed"}')
+    with app.test_request_context():
+        baseline = measure('ORM + to_dict + jsonify', orm_to_dict)
+        if server.orjson:
+            measure('rows + RowSerializer + orjson', lean_rows, baseline)
+        measure('rows + RowSerializer + stdlib json', lean_rows_stdlib, baseline)
+
+client = app.test_client()
+with app.app_context():
+    measure('GET /api/pokemon (end to end)', lambda: endpoint(client))
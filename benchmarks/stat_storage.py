@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Row size and read throughput of the EV/IV storage layouts (STAT_STORAGE=columns vs packed).
+
+    python benchmarks/stat_storage.py [--rows 100000] [--repeat 5] [--database-url URL]
+
+Each layout runs in its own process, because the layout is fixed when server.py
+is imported. Uses a throwaway SQLite file per layout unless --database-url is
+given; the pokemon table there is dropped and recreated, so never point it at a
+database you care about. Needs numpy, which generates the stats and times the
+vectorized unpack.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+parser.add_argument('--rows', type=int, default=100_000, help='Pokemon rows to generate')
+parser.add_argument('--repeat', type=int, default=5, help='timed runs per read path')
+parser.add_argument('--database-url', help='benchmark against this database instead of temp SQLite files')
+parser.add_argument('--layout', choices=('columns', 'packed'), help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+def run_layout():
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    import numpy as np
+
+    from server import (EV_BITS, EV_COLUMNS, IV_BITS, IV_COLUMNS, Pokemon, app, db, pack_stats_array,
+                        pokemon_serializer, unpack_stats_array)
+
+    rng = np.random.default_rng(0)
+    evs = rng.integers(0, 253, size=(args.rows, 6))
+    ivs = rng.integers(0, 32, size=(args.rows, 6))
+    if args.layout == 'packed':
+        stat_rows = [{'evs_packed': int(e), 'ivs_packed': int(i)}
+                     for e, i in zip(pack_stats_array(evs, EV_BITS), pack_stats_array(ivs, IV_BITS))]
+        stat_columns = ('evs_packed', 'ivs_packed')
+    else:
+        stat_rows = [{**dict(zip(EV_COLUMNS, map(int, e))), **dict(zip(IV_COLUMNS, map(int, i)))} for e, i in zip(evs, ivs)]
+        stat_columns = EV_COLUMNS + IV_COLUMNS
+
+    def measure(run):
+        run()
+        samples = []
+        for _ in range(args.repeat):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - started)
+        return args.rows / statistics.median(samples)
+
+    with app.app_context():
+        Pokemon.__table__.drop(db.engine, checkfirst=True)
+        Pokemon.__table__.create(db.engine)
+        db.session.bulk_insert_mappings(Pokemon, [{'pokemon_id': 25, 'name': f'mon{n}', 'level': 50, **stats}
+                                                  for n, stats in enumerate(stat_rows)])
+        db.session.commit()
+
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(db.text('ANALYZE pokemon'))
+            table_bytes = db.session.scalar(db.text("SELECT pg_table_size('pokemon')"))
+            tuple_bytes = db.session.scalar(db.text('SELECT avg(pg_column_size(p.*)) FROM pokemon p'))
+        else:
+            db.session.commit()
+            with db.engine.connect() as connection:
+                connection.execution_options(isolation_level='AUTOCOMMIT').exec_driver_sql('VACUUM')
+            try:
+                table_bytes = db.session.scalar(db.text("SELECT SUM(pgsize) FROM dbstat WHERE name = 'pokemon'"))
+            except Exception:
+                db.session.rollback()
+                table_bytes = os.path.getsize(db.engine.url.database)
+            tuple_bytes = None
+
+        stats_select = db.select(*(getattr(Pokemon, name) for name in stat_columns))
+        serializer = pokemon_serializer(('evs', 'ivs'))
+        results = {
+            'table bytes per row': table_bytes / args.rows,
+            'avg tuple bytes': float(tuple_bytes) if tuple_bytes else None,
+            'fetch stat columns': measure(lambda: db.session.execute(stats_select).all()),
+            'fetch + evs/ivs dicts': measure(lambda: [serializer(row) for row in db.session.execute(serializer.select())]),
+            'ORM objects + to_dict': measure(lambda: [p.to_dict() for p in Pokemon.query.all()])
+        }
+        def fetch_arrays():
+            columns = zip(*db.session.execute(stats_select))
+            return [np.fromiter(values, dtype=np.int64, count=args.rows) for values in columns]
+        if args.layout == 'packed':
+            def vectorized():
+                evs_packed, ivs_packed = fetch_arrays()
+                return unpack_stats_array(evs_packed, EV_BITS), unpack_stats_array(ivs_packed, IV_BITS)
+            results['fetch + numpy unpack'] = measure(vectorized)
+        else:
+            results['fetch + numpy unpack'] = measure(lambda: np.stack(fetch_arrays(), axis=1))
+        print(json.dumps(results))
+
+if args.layout:
+    run_layout()
+    sys.exit(0)
+
+results = {}
+for layout in ('columns', 'packed'):
+    env = dict(os.environ, STAT_STORAGE=layout, ENCOUNTER_FLUSH_INTERVAL='0',
+               DATABASE_URL=args.database_url or f'sqlite:///{tempfile.mkdtemp()}/bench.db')
+    output = subprocess.run([sys.executable, __file__, '--layout', layout, '--rows', str(args.rows), '--repeat', str(args.repeat)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    results[layout] = json.loads(output.strip().splitlines()[-1])
+
+print(f'{args.rows} pokemon rows, {"given database" if args.database_url else "sqlite"}, '
+      f'median of {args.repeat} runs; throughput in rows/s')
+print(f'{"":28s} {"columns":>12s} {"packed":>12s} {"packed/columns":>15s}')
+for key, columns in results['columns'].items():
+    packed = results['packed'][key]
+    if columns is not None:
+        print(f'{key:28s} {columns:12.1f} {packed:12.1f} {packed / columns:14.2f}x')
@@ -1,13 +1,52 @@
 #!/usr/bin/env python3
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import mmap
 import os
 import random
+import re
+import struct
+import threading
+import time
+import uuid
 import requests
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
 from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
+from functools import lru_cache
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from requests.adapters import HTTPAdapter
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import DeclarativeBase
+from urllib3.util.retry import Retry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 BATTLE_CALC_URL = os.environ.get('BATTLE_CALC_URL', 'http://localhost:3001')
+BATTLE_CALC_TIMEOUT = float(os.environ.get('BATTLE_CALC_TIMEOUT', 5))
+BATTLE_CALC_POOL_SIZE = int(os.environ.get('BATTLE_CALC_POOL_SIZE', 10))
+BATTLE_CALC_RETRIES = int(os.environ.get('BATTLE_CALC_RETRIES', 2))
+BATTLE_CALC_CACHE_SIZE = int(os.environ.get('BATTLE_CALC_CACHE_SIZE', 2048))
+BATTLE_CALC_CACHE_TTL = float(os.environ.get('BATTLE_CALC_CACHE_TTL', 600))
+BATTLE_CALC_MODE = os.environ.get('BATTLE_CALC_MODE', 'proxy')
+BATTLE_CALC_MODES = ('native', 'proxy', 'shadow')
 
 class Base(DeclarativeBase):
     pass
@@ -61,6 +100,91 @@ NATURE_MODIFIERS = {
 
 MAX_TOTAL_EVS = 510
 MAX_SINGLE_EV = 252
+MAX_IV = 31
+
+
+# EVs and IVs are stored either as twelve integer columns (STAT_STORAGE=columns, the
+# default) or packed (STAT_STORAGE=packed): IVs in 5 bits each in one integer column and
+# EVs in a byte each in one bigint column, hp in the lowest bits. In packed mode the
+# twelve names stay available as properties, so model code reads and writes
+# pokemon.hp_ev the same way in both layouts; migrate_stat_storage() converts existing
+# rows when the setting changes.
+STAT_STORAGE = os.environ.get('STAT_STORAGE', 'columns')
+if STAT_STORAGE not in ('columns', 'packed'):
+    raise ValueError(f'STAT_STORAGE must be columns or packed, not {STAT_STORAGE!r}')
+EV_COLUMNS = ('hp_ev', 'attack_ev', 'defense_ev', 'sp_attack_ev', 'sp_defense_ev', 'speed_ev')
+IV_COLUMNS = ('hp_iv', 'attack_iv', 'defense_iv', 'sp_attack_iv', 'sp_defense_iv', 'speed_iv')
+EV_BITS = 8
+IV_BITS = 5
+DEFAULT_EV = 0
+DEFAULT_IV = 15
+
+def pack_stats(values, bits):
+    """Pack six stat values into one integer, the first in the lowest bits"""
+    packed = 0
+    for index, value in enumerate(values):
+        if not 0 <= value < 1 << bits:
+            raise ValueError(f'Stat value {value} does not fit in {bits} bits')
+        packed |= int(value) << (index * bits)
+    return packed
+
+def unpack_stats(packed, bits):
+    mask = (1 << bits) - 1
+    return tuple((packed >> (index * bits)) & mask for index in range(6))
+
+def pack_stats_array(values, bits):
+    """Vectorized pack_stats: an (n, 6) array of stat values -> n packed int64 values"""
+    if np is None:
+        raise RuntimeError('pack_stats_array requires numpy to be installed')
+    values = np.asarray(values, dtype=np.int64)
+    if values.size and (values.min() < 0 or values.max() >= 1 << bits):
+        raise ValueError(f'Stat values do not fit in {bits} bits')
+    return np.bitwise_or.reduce(values << (np.arange(6, dtype=np.int64) * bits), axis=1)
+
+def unpack_stats_array(packed, bits):
+    """Vectorized unpack_stats: n packed values -> an (n, 6) int64 array"""
+    if np is None:
+        raise RuntimeError('unpack_stats_array requires numpy to be installed')
+    packed = np.asarray(packed, dtype=np.int64)
+    return (packed[:, None] >> (np.arange(6, dtype=np.int64) * bits)) & ((1 << bits) - 1)
+
+DEFAULT_EVS_PACKED = pack_stats([DEFAULT_EV] * 6, EV_BITS)
+DEFAULT_IVS_PACKED = pack_stats([DEFAULT_IV] * 6, IV_BITS)
+
+def packed_stat_property(column, index, bits, default_packed):
+    shift = index * bits
+    mask = ((1 << bits) - 1) << shift
+
+    def get_value(self):
+        packed = getattr(self, column)
+        return ((default_packed if packed is None else packed) & mask) >> shift
+
+    def set_value(self, value):
+        if not 0 <= value < 1 << bits:
+            raise ValueError(f'Stat value {value} does not fit in {bits} bits')
+        packed = getattr(self, column)
+        setattr(self, column, ((default_packed if packed is None else packed) & ~mask) | (int(value) << shift))
+
+    return property(get_value, set_value)
+
+def build_stat_storage():
+    """Mixin holding the EV/IV attributes of Pokemon and Companion in the configured layout"""
+    if STAT_STORAGE == 'columns':
+        attributes = {name: db.Column(db.Integer, default=DEFAULT_EV) for name in EV_COLUMNS}
+        attributes.update({name: db.Column(db.Integer, default=DEFAULT_IV) for name in IV_COLUMNS})
+    else:
+        attributes = {
+            'evs_packed': db.Column(db.BigInteger, default=DEFAULT_EVS_PACKED),
+            'ivs_packed': db.Column(db.Integer, default=DEFAULT_IVS_PACKED)
+        }
+        for index, name in enumerate(EV_COLUMNS):
+            attributes[name] = packed_stat_property('evs_packed', index, EV_BITS, DEFAULT_EVS_PACKED)
+        for index, name in enumerate(IV_COLUMNS):
+            attributes[name] = packed_stat_property('ivs_packed', index, IV_BITS, DEFAULT_IVS_PACKED)
+    return type('StatStorage', (), attributes)
+
+
+StatStorage = build_stat_storage()
 
 def validate_and_clamp_evs(evs):
     """Validate EVs: max 252 per stat, max 510 total"""
@@ -83,65 +207,161 @@ def validate_and_clamp_evs(evs):
 
     return clamped
 
+def validate_ivs(ivs):
+    """Check that every given IV is an integer from 0 to 31; raises ValueError otherwise.
+
+    Runs before the values reach the model so both STAT_STORAGE layouts reject the same input.
+    """
+    if not isinstance(ivs, dict):
+        raise ValueError('ivs must be an object')
+    for key, value in ivs.items():
+        if key not in ('hp', 'attack', 'defense', 'spAttack', 'spDefense', 'speed'):
+            raise ValueError(f'Unknown IV stat {key!r}')
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_IV:
+            raise ValueError(f'IV {key} must be an integer from 0 to {MAX_IV}')
+    return ivs
+
 
-class Pokemon(db.Model):
+class Pokemon(StatStorage, db.Model):
     __tablename__ = 'pokemon'
+    __table_args__ = (
+        db.Index('ix_pokemon_in_party_level', 'in_party', 'level'),
+        db.Index('ix_pokemon_is_favorite_level', 'is_favorite', 'level'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    pokemon_id = db.Column(db.Integer, nullable=False)
+    pokemon_id = db.Column(db.Integer, nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     level = db.Column(db.Integer, default=1)
-    caught_at = db.Column(db.DateTime, default=datetime.utcnow)
+    caught_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     is_favorite = db.Column(db.Boolean, default=False)
     in_party = db.Column(db.Boolean, default=False)
     nature = db.Column(db.String(20), default='Hardy')
-    item = db.Column(db.String(100), nullable=True)
-    hp_ev = db.Column(db.Integer, default=0)
-    attack_ev = db.Column(db.Integer, default=0)
-    defense_ev = db.Column(db.Integer, default=0)
-    sp_attack_ev = db.Column(db.Integer, default=0)
-    sp_defense_ev = db.Column(db.Integer, default=0)
-    speed_ev = db.Column(db.Integer, default=0)
-    hp_iv = db.Column(db.Integer, default=15)
-    attack_iv = db.Column(db.Integer, default=15)
-    defense_iv = db.Column(db.Integer, default=15)
-    sp_attack_iv = db.Column(db.Integer, default=15)
-    sp_defense_iv = db.Column(db.Integer, default=15)
-    speed_iv = db.Column(db.Integer, default=15)
+    item_id = db.Column(db.String(50), nullable=True)
+
+    @property
+    def item(self):
+        return item_name(self.item_id)
+
+    def to_dict(self, fields=None):
+        return pokemon_serializer(tuple(fields or POKEMON_FIELDS)).from_object(self)
+
+
+def stat_block(hp, attack, defense, sp_attack, sp_defense, speed):
+    return {'hp': hp, 'attack': attack, 'defense': defense, 'spAttack': sp_attack, 'spDefense': sp_defense, 'speed': speed}
+
+# Response field -> (columns it reads, function of those column values, or None to copy
+# the single column as is). Drives Pokemon.to_dict and the lean list endpoints, which
+# select only the columns their fields need as plain rows instead of ORM objects.
+POKEMON_FIELDS = {
+    'id': (('pokemon_id',), None),
+    'name': (('name',), None),
+    'level': (('level',), None),
+    'caught_at': (('caught_at',), lambda caught_at: caught_at.isoformat() if caught_at else None),
+    'caughtAt': (('caught_at',), lambda caught_at: int(caught_at.timestamp() * 1000) if caught_at else None),
+    'is_favorite': (('is_favorite',), None),
+    'in_party': (('in_party',), None),
+    'db_id': (('id',), None),
+    'catchId': (('id',), None),
+    'nature': (('nature',), None),
+    'item': (('item_id',), lambda item_id: item_name(item_id)),
+    'itemId': (('item_id',), None),
+    'evs': (EV_COLUMNS, stat_block),
+    'ivs': (IV_COLUMNS, stat_block)
+}
 
-    def to_dict(self):
+def packed_stat_block(bits, default_packed):
+    """stat_block for one packed column, with the shifts unrolled since it runs per row"""
+    mask = (1 << bits) - 1
+    shift_attack, shift_defense, shift_sp_attack, shift_sp_defense, shift_speed = (index * bits for index in range(1, 6))
+
+    def convert(packed):
+        if packed is None:
+            packed = default_packed
         return {
-            'id': self.pokemon_id,
-            'name': self.name,
-            'level': self.level,
-            'caught_at': self.caught_at.isoformat() if self.caught_at else None,
-            'caughtAt': int(self.caught_at.timestamp() * 1000) if self.caught_at else None,
-            'is_favorite': self.is_favorite,
-            'in_party': self.in_party,
-            'db_id': self.id,
-            'catchId': self.id,
-            'nature': self.nature,
-            'item': self.item,
-            'evs': {
-                'hp': self.hp_ev,
-                'attack': self.attack_ev,
-                'defense': self.defense_ev,
-                'spAttack': self.sp_attack_ev,
-                'spDefense': self.sp_defense_ev,
-                'speed': self.speed_ev
-            },
-            'ivs': {
-                'hp': self.hp_iv,
-                'attack': self.attack_iv,
-                'defense': self.defense_iv,
-                'spAttack': self.sp_attack_iv,
-                'spDefense': self.sp_defense_iv,
-                'speed': self.speed_iv
-            }
+            'hp': packed & mask,
+            'attack': packed >> shift_attack & mask,
+            'defense': packed >> shift_defense & mask,
+            'spAttack': packed >> shift_sp_attack & mask,
+            'spDefense': packed >> shift_sp_defense & mask,
+            'speed': packed >> shift_speed & mask
         }
 
+    return convert
+
+if STAT_STORAGE == 'packed':
+    POKEMON_FIELDS.update(
+        evs=(('evs_packed',), packed_stat_block(EV_BITS, DEFAULT_EVS_PACKED)),
+        ivs=(('ivs_packed',), packed_stat_block(IV_BITS, DEFAULT_IVS_PACKED))
+    )
+    POKEMON_FIELDS['stats'] = (
+        ('pokemon_id', 'level', 'nature', 'item_id', 'evs_packed', 'ivs_packed'),
+        lambda pokemon_id, level, nature, item_id, evs_packed, ivs_packed: get_derived_stats(
+            pokemon_id, level, nature, item_id,
+            unpack_stats(DEFAULT_EVS_PACKED if evs_packed is None else evs_packed, EV_BITS),
+            unpack_stats(DEFAULT_IVS_PACKED if ivs_packed is None else ivs_packed, IV_BITS)
+        )
+    )
+else:
+    POKEMON_FIELDS['stats'] = (
+        ('pokemon_id', 'level', 'nature', 'item_id') + EV_COLUMNS + IV_COLUMNS,
+        lambda pokemon_id, level, nature, item_id, *stats: get_derived_stats(pokemon_id, level, nature, item_id, stats[:6], stats[6:])
+    )
+
+
+class RowSerializer:
+    """Turns rows of a fixed column list into response dicts for a fixed list of fields.
+
+    The column positions each field reads are resolved once, so serializing a row is
+    plain tuple indexing with no ORM attribute access.
+    """
+
+    def __init__(self, model, field_table, fields, extra_columns=()):
+        columns = []
+        for name in [c for field in fields for c in field_table[field][0]] + list(extra_columns):
+            if name not in columns:
+                columns.append(name)
+        self.model = model
+        self.columns = tuple(columns)
+        self.copied = []
+        self.computed = []
+        for field in fields:
+            names, convert = field_table[field]
+            positions = [columns.index(name) for name in names]
+            if convert is None:
+                self.copied.append((field, positions[0]))
+            elif len(positions) == 1:
+                self.computed.append((field, convert, None, positions[0]))
+            else:
+                self.computed.append((field, convert, itemgetter(*positions), None))
+
+    def select(self):
+        return db.select(*(getattr(self.model, name) for name in self.columns))
+
+    def __call__(self, row):
+        data = {field: row[position] for field, position in self.copied}
+        for field, convert, getter, position in self.computed:
+            data[field] = convert(*getter(row)) if getter else convert(row[position])
+        return data
+
+    def from_object(self, obj):
+        return self(tuple(getattr(obj, name) for name in self.columns))
+
+
+@lru_cache(maxsize=64)
+def pokemon_serializer(fields, extra_columns=()):
+    return RowSerializer(Pokemon, POKEMON_FIELDS, fields, extra_columns)
+
+def json_response(payload, status=200):
+    """JSON response encoded with orjson when it is installed, otherwise the stdlib encoder"""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return Response(body, status=status, mimetype='application/json')
+
 
-class Companion(db.Model):
+class Companion(StatStorage, db.Model):
     __tablename__ = 'companion'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -156,19 +376,11 @@ class Companion(db.Model):
     last_fed = db.Column(db.DateTime, default=datetime.utcnow)
     last_interaction = db.Column(db.DateTime, default=datetime.utcnow)
     nature = db.Column(db.String(20), default='Hardy')
-    item = db.Column(db.String(100), nullable=True)
-    hp_ev = db.Column(db.Integer, default=0)
-    attack_ev = db.Column(db.Integer, default=0)
-    defense_ev = db.Column(db.Integer, default=0)
-    sp_attack_ev = db.Column(db.Integer, default=0)
-    sp_defense_ev = db.Column(db.Integer, default=0)
-    speed_ev = db.Column(db.Integer, default=0)
-    hp_iv = db.Column(db.Integer, default=15)
-    attack_iv = db.Column(db.Integer, default=15)
-    defense_iv = db.Column(db.Integer, default=15)
-    sp_attack_iv = db.Column(db.Integer, default=15)
-    sp_defense_iv = db.Column(db.Integer, default=15)
-    speed_iv = db.Column(db.Integer, default=15)
+    item_id = db.Column(db.String(50), nullable=True)
+
+    @property
+    def item(self):
+        return item_name(self.item_id)
 
     def to_dict(self):
         return {
@@ -184,6 +396,11 @@ class Companion(db.Model):
             'lastInteraction': int(self.last_interaction.timestamp() * 1000) if self.last_interaction else None,
             'nature': self.nature,
             'item': self.item,
+            'itemId': self.item_id,
+            'stats': get_derived_stats(
+                self.pokemon_id, self.level, self.nature, self.item_id,
+                tuple(getattr(self, name) for name in EV_COLUMNS), tuple(getattr(self, name) for name in IV_COLUMNS)
+            ),
             'evs': {
                 'hp': self.hp_ev,
                 'attack': self.attack_ev,
@@ -368,9 +585,52 @@ POKEMON_ITEMS = {
     }
 }
 
+# Items a Pokemon can hold that the shop does not sell (seed data, wild catches). They
+# are never stocked, so they stay out of POKEMON_ITEMS and only need an id and a name.
+HELD_ITEM_NAMES = {
+    'miracle-seed': 'Miracle Seed',
+    'charcoal': 'Charcoal',
+    'mystic-water': 'Mystic Water',
+    'light-ball': 'Light Ball',
+    'everstone': 'Everstone',
+    'dragon-fang': 'Dragon Fang',
+    'spell-tag': 'Spell Tag',
+    'dragon-scale': 'Dragon Scale',
+    'twisted-spoon': 'Twisted Spoon'
+}
+
+# Item name <-> id index over every holdable item, built once. Pokemon and Companion
+# store the item id; responses render the display name through item_name().
+ITEM_NAMES_BY_ID = {item_id: item['name'] for item_id, item in POKEMON_ITEMS.items()}
+ITEM_NAMES_BY_ID.update(HELD_ITEM_NAMES)
+ITEM_IDS_BY_NAME = {name: item_id for item_id, name in ITEM_NAMES_BY_ID.items()}
+
+def item_name(item_id):
+    """Display name of a stored item id; legacy names kept as the id are shown as is"""
+    return ITEM_NAMES_BY_ID.get(item_id, item_id)
+
+def resolve_item_id(item):
+    """Item id for an item id or display name; None when empty or unknown"""
+    if not item:
+        return None
+    if item in ITEM_NAMES_BY_ID:
+        return item
+    return ITEM_IDS_BY_NAME.get(item)
+
+def parse_held_item(item):
+    """Item id to store for a payload's item (id or display name); raises ValueError if unknown"""
+    item_id = resolve_item_id(item)
+    if item and not item_id:
+        raise ValueError(f'Invalid item: {item}')
+    return item_id
+
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = (
+        # one stock row per item; inventory upserts conflict on it
+        db.Index('ux_items_item_id', 'item_id', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.String(50), nullable=False)
@@ -381,7 +641,7 @@ class Item(db.Model):
         return {
             'id': self.id,
             'itemId': self.item_id,
-            'name': item_data.get('name', self.item_id),
+            'name': item_data.get('name', item_name(self.item_id)),
             'description': item_data.get('description', ''),
             'category': item_data.get('category', 'hold'),
             'sprite': item_data.get('sprite', ''),
@@ -394,8 +654,8 @@ class PokedexEntry(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     pokemon_id = db.Column(db.Integer, nullable=False, unique=True)
-    encountered = db.Column(db.Boolean, default=False)
-    caught = db.Column(db.Boolean, default=False)
+    encountered = db.Column(db.Boolean, default=False, index=True)
+    caught = db.Column(db.Boolean, default=False, index=True)
     times_encountered = db.Column(db.Integer, default=0)
     times_caught = db.Column(db.Integer, default=0)
     first_encountered_at = db.Column(db.DateTime, nullable=True)
@@ -413,27 +673,428 @@ class PokedexEntry(db.Model):
         }
 
 
+class PokedexSummary(db.Model):
+    """Single-row aggregate of the Pokedex, rewritten in the same transaction as every entry change.
+
+    version changes with every write, so it doubles as the ETag for Pokedex reads.
+    """
+    __tablename__ = 'pokedex_summary'
+
+    id = db.Column(db.Integer, primary_key=True)
+    encountered = db.Column(db.Integer, default=0)
+    caught = db.Column(db.Integer, default=0)
+    version = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TestRun(db.Model):
+    """Index row for one stored test sweep, so listing and comparing runs never touches the files"""
+    __tablename__ = 'test_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(120), nullable=False, unique=True)
+    mode = db.Column(db.String(20), nullable=False, index=True)
+    ability = db.Column(db.String(50), nullable=True, index=True)
+    iterations = db.Column(db.Integer, nullable=True)
+    workers = db.Column(db.Integer, nullable=True)
+    seed = db.Column(db.BigInteger, nullable=True)
+    complete = db.Column(db.Boolean, default=True)
+    size = db.Column(db.Integer, default=0)
+    companion_wins = db.Column(db.Integer, default=0)
+    enemy_wins = db.Column(db.Integer, default=0)
+    ties = db.Column(db.Integer, default=0)
+    total_battles = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    configs = db.relationship('TestRunConfig', backref='run', cascade='all, delete-orphan', lazy='selectin')
+
+    @property
+    def results_url(self):
+        if self.filename.endswith('.pkbr'):
+            return f'/api/test-results/{self.id}/battles'
+        return f'/static/test_results/{self.filename}'
+
+    def to_dict(self):
+        return {
+            'runId': self.id,
+            'filename': self.filename,
+            'url': self.results_url,
+            'mode': self.mode,
+            'ability': self.ability,
+            'iterations': self.iterations,
+            'workers': self.workers,
+            'seed': self.seed,
+            'complete': self.complete,
+            'size': self.size,
+            'modified': self.created_at.isoformat() if self.created_at else None,
+            'summary': {
+                'companionWins': self.companion_wins,
+                'enemyWins': self.enemy_wins,
+                'ties': self.ties,
+                'totalBattles': self.total_battles
+            },
+            'configs': {config.test_type: config.to_dict() for config in self.configs}
+        }
+
+
+class TestRunConfig(db.Model):
+    __tablename__ = 'test_run_configs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('test_runs.id'), nullable=False, index=True)
+    test_type = db.Column(db.String(50), nullable=False, index=True)
+    companion_wins = db.Column(db.Integer, default=0)
+    enemy_wins = db.Column(db.Integer, default=0)
+    ties = db.Column(db.Integer, default=0)
+    battles = db.Column(db.Integer, default=0)
+    total_turns = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'companionWins': self.companion_wins,
+            'enemyWins': self.enemy_wins,
+            'ties': self.ties,
+            'battles': self.battles,
+            'totalTurns': self.total_turns
+        }
+
+
+def ensure_indexes():
+    """Create any model index an existing database lacks; create_all only adds missing tables.
+
+    Idempotent on SQLite and Postgres (checkfirst), so it runs on every startup.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def migrate_item_ids():
+    """Move held items stored as display names (legacy item column) into item_id.
+
+    Rows are migrated one known name at a time and their legacy value cleared, so the
+    step is idempotent. Names with no registered id are kept as they are, moved into
+    item_id so the item is still returned, and logged so someone can register them.
+    """
+    inspector = db.inspect(db.engine)
+    for model in (Pokemon, Companion):
+        table = model.__tablename__
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'item_id' not in columns:
+            db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN item_id VARCHAR(50)'))
+        if 'item' not in columns:
+            continue
+        if db.session.execute(db.text(f'SELECT 1 FROM {table} WHERE item IS NOT NULL LIMIT 1')).first() is None:
+            continue
+        for name, item_id in ITEM_IDS_BY_NAME.items():
+            db.session.execute(
+                db.text(f'UPDATE {table} SET item_id = :item_id, item = NULL WHERE item = :name'),
+                {'item_id': item_id, 'name': name}
+            )
+        unresolved = db.session.execute(
+            db.text(f'SELECT item, COUNT(*) FROM {table} WHERE item IS NOT NULL GROUP BY item ORDER BY item')
+        ).all()
+        if unresolved:
+            app.logger.warning(
+                'migrate_item_ids: %s rows hold unregistered items, kept under their legacy name: %s',
+                table, ', '.join(f'{name!r} x{count}' for name, count in unresolved)
+            )
+            db.session.execute(db.text(f'UPDATE {table} SET item_id = item, item = NULL WHERE item IS NOT NULL'))
+    db.session.commit()
+
+
+def merge_duplicate_items():
+    """Fold duplicate inventory rows into one per item_id so ux_items_item_id can be built"""
+    duplicates = db.session.execute(
+        db.select(Item.item_id, db.func.min(Item.id), db.func.sum(Item.quantity))
+        .group_by(Item.item_id)
+        .having(db.func.count() > 1)
+    ).all()
+    for item_id, keep_id, quantity in duplicates:
+        db.session.execute(db.delete(Item).where(Item.item_id == item_id, Item.id != keep_id))
+        db.session.execute(db.update(Item).where(Item.id == keep_id).values(quantity=quantity))
+    db.session.commit()
+
+
+def migrate_stat_storage():
+    """Convert stored EVs/IVs to the STAT_STORAGE layout.
+
+    The layout not in use is cleared as rows are converted: rows whose packed columns are
+    NULL get packed from the twelve columns, which are then set to NULL, and the packed
+    columns are set to NULL after unpacking. Switching back and forth in either direction
+    is safe to repeat.
+    """
+    ev_weights = [(name, 1 << (index * EV_BITS)) for index, name in enumerate(EV_COLUMNS)]
+    iv_weights = [(name, 1 << (index * IV_BITS)) for index, name in enumerate(IV_COLUMNS)]
+    inspector = db.inspect(db.engine)
+    for model in (Pokemon, Companion):
+        table = model.__tablename__
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if STAT_STORAGE == 'packed':
+            for name, sql_type in (('evs_packed', 'BIGINT'), ('ivs_packed', 'INTEGER')):
+                if name not in columns:
+                    db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}'))
+            if not set(EV_COLUMNS + IV_COLUMNS) <= columns:
+                continue
+            evs = ' + '.join(f'COALESCE({name}, {DEFAULT_EV}) * {weight}' for name, weight in ev_weights)
+            ivs = ' + '.join(f'COALESCE({name}, {DEFAULT_IV}) * {weight}' for name, weight in iv_weights)
+            cleared = ', '.join(f'{name} = NULL' for name in EV_COLUMNS + IV_COLUMNS)
+            db.session.execute(db.text(
+                f'UPDATE {table} SET evs_packed = {evs}, ivs_packed = {ivs}, {cleared} '
+                f'WHERE evs_packed IS NULL OR ivs_packed IS NULL'
+            ))
+        else:
+            for name in EV_COLUMNS + IV_COLUMNS:
+                if name not in columns:
+                    db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} INTEGER'))
+            if not {'evs_packed', 'ivs_packed'} <= columns:
+                continue
+            unpacked = [f'{name} = (evs_packed / {weight}) % {1 << EV_BITS}' for name, weight in ev_weights]
+            unpacked += [f'{name} = (ivs_packed / {weight}) % {1 << IV_BITS}' for name, weight in iv_weights]
+            db.session.execute(db.text(
+                f'UPDATE {table} SET {", ".join(unpacked)}, evs_packed = NULL, ivs_packed = NULL WHERE evs_packed IS NOT NULL'
+            ))
+    db.session.commit()
+
+
 with app.app_context():
     db.create_all()
+    migrate_item_ids()
+    migrate_stat_storage()
+    merge_duplicate_items()
+    ensure_indexes()
+
+
+# ============================================
+# HTTP CACHING POLICY
+# ============================================
+# Every response gets the policy of its endpoint; anything not listed is mutable API
+# state and stays no-store.
+#   static     - files under static_folder: content-hash ETag, revalidated on each use
+#                (no-cache). Pages and ES module imports reference assets by plain path,
+#                so revalidation is the only static caching; an unchanged file costs a 304.
+#   catalog    - read-only data built from code constants: strong ETag (precomputed, or
+#                hashed from the body) + Last-Modified of the process start, cacheable
+#                for CATALOG_MAX_AGE seconds
+#   revalidate - the view sets its own validators (ETag/Last-Modified); always revalidate
+#   no-store   - never cached
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 300))
+CATALOG_LAST_MODIFIED = datetime.utcnow().replace(microsecond=0)
+
+ROUTE_CACHE_POLICIES = {
+    'static': 'static',
+    'index': 'revalidate',
+    'get_natures': 'catalog',
+    'get_item_catalog': 'catalog',
+    'get_catalog_bundle': 'catalog',
+    'get_catalog': 'catalog',
+    'get_pokedex': 'revalidate',
+    'get_pokedex_stats': 'revalidate'
+}
+CACHE_POLICIES = ('static', 'catalog', 'revalidate', 'no-store')
+
+class CacheMetrics:
+    """Per-policy request, conditional-request and 304 counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {policy: {'requests': 0, 'conditional': 0, 'notModified': 0} for policy in CACHE_POLICIES}
+
+    def record(self, policy, conditional, not_modified):
+        with self._lock:
+            counts = self._counts[policy]
+            counts['requests'] += 1
+            counts['conditional'] += conditional
+            counts['notModified'] += not_modified
+
+    def stats(self):
+        with self._lock:
+            return {
+                policy: {
+                    **counts,
+                    'notModifiedRate': round(counts['notModified'] / counts['requests'], 4) if counts['requests'] else 0,
+                    'conditionalHitRate': round(counts['notModified'] / counts['conditional'], 4) if counts['conditional'] else 0
+                }
+                for policy, counts in self._counts.items()
+            }
+
 
+cache_metrics = CacheMetrics()
+static_content_hashes = {}
+
+def get_static_content_hash(filename):
+    """sha256 prefix of a static file, memoized per (path, mtime, size)"""
+    path = os.path.join(app.static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = static_content_hashes.get(key)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        static_content_hashes[key] = digest
+    return digest
 
 @app.after_request
-def add_no_cache_headers(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+def apply_cache_policy(response):
+    policy = ROUTE_CACHE_POLICIES.get(request.endpoint, 'no-store')
+    if response.status_code not in (200, 304):
+        policy = 'no-store'
+
+    if policy == 'static':
+        digest = get_static_content_hash(request.view_args.get('filename', ''))
+        if digest:
+            response.set_etag(digest)
+            response = response.make_conditional(request)
+        response.headers['Cache-Control'] = 'no-cache'
+    elif policy == 'catalog':
+        if response.status_code == 200:
+            response.add_etag()
+            response.last_modified = CATALOG_LAST_MODIFIED
+            response = response.make_conditional(request)
+        response.headers['Cache-Control'] = f'public, max-age={CATALOG_MAX_AGE}'
+    elif policy == 'revalidate':
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
+
+    conditional = 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+    cache_metrics.record(policy, conditional, response.status_code == 304)
     return response
 
 
+@app.route('/api/cache-metrics', methods=['GET'])
+def get_cache_metrics():
+    return jsonify({
+        'success': True,
+        'policies': cache_metrics.stats(),
+        'catalogs': {name: catalog.stats() for name, catalog in CATALOG_RESPONSES.items()}
+    })
+
+
 @app.route('/')
 def index():
     return send_from_directory('.', 'preview.html')
 
 
+# sort key -> (column, default direction); ties always break on the row id
+POKEMON_SORTS = {
+    'date': (Pokemon.caught_at, 'desc'),
+    'number': (Pokemon.pokemon_id, 'asc'),
+    'name': (Pokemon.name, 'asc'),
+    'level': (Pokemon.level, 'desc')
+}
+MAX_POKEMON_PAGE_SIZE = 200
+
+def parse_bool_arg(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'Expected a boolean, got {value!r}')
+
+def parse_int_arg(name, value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'Expected an integer for {name}, got {value!r}') from None
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def filter_pokemon_query(query, args):
+    """Apply the species, level, nature, item, favorite and in_party filters from the query string"""
+    if args.get('species'):
+        ids = [s for s in args['species'].split(',') if s.isdigit()]
+        names = [s.lower() for s in args['species'].split(',') if s and not s.isdigit()]
+        query = query.filter(db.or_(Pokemon.pokemon_id.in_([int(i) for i in ids]), db.func.lower(Pokemon.name).in_(names)))
+    if args.get('minLevel'):
+        query = query.filter(Pokemon.level >= parse_int_arg('minLevel', args['minLevel']))
+    if args.get('maxLevel'):
+        query = query.filter(Pokemon.level <= parse_int_arg('maxLevel', args['maxLevel']))
+    if args.get('nature'):
+        query = query.filter(Pokemon.nature.in_(args['nature'].split(',')))
+    if args.get('item'):
+        if args['item'] == 'none':
+            query = query.filter(Pokemon.item_id.is_(None))
+        elif args['item'] == 'any':
+            query = query.filter(Pokemon.item_id.isnot(None))
+        else:
+            query = query.filter(Pokemon.item_id == parse_held_item(args['item']))
+    if args.get('favorite'):
+        query = query.filter(Pokemon.is_favorite == parse_bool_arg(args['favorite']))
+    if args.get('in_party'):
+        query = query.filter(Pokemon.in_party == parse_bool_arg(args['in_party']))
+    return query
+
+def get_pokemon_sort_value(pokemon, sort):
+    value = getattr(pokemon, POKEMON_SORTS[sort][0].key)
+    return value.isoformat() if isinstance(value, datetime) else value
+
 @app.route('/api/pokemon', methods=['GET'])
 def get_pokemon_collection():
-    pokemon_list = Pokemon.query.order_by(Pokemon.caught_at.desc()).all()
-    return jsonify([p.to_dict() for p in pokemon_list])
+    """The caught collection, newest first.
+
+    Filters: species (ids or names), minLevel, maxLevel, nature, item (id, 'any' or 'none'),
+    favorite, in_party. sort=date|number|name|level with order=asc|desc, and fields= to
+    return only some keys. Passing limit or cursor switches to a keyset-paginated
+    {items, nextCursor, total} envelope; without them the full filtered list is returned.
+    """
+    args = request.args
+    try:
+        fields = [f for f in args['fields'].split(',') if f] if args.get('fields') else None
+        unknown = [f for f in fields or () if f not in POKEMON_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        sort = args.get('sort', 'date')
+        if sort not in POKEMON_SORTS:
+            raise ValueError(f'Unknown sort: {sort}')
+        column, order = POKEMON_SORTS[sort]
+        order = args.get('order', order)
+        if order not in ('asc', 'desc'):
+            raise ValueError(f'Unknown order: {order}')
+
+        serializer = pokemon_serializer(tuple(fields or POKEMON_FIELDS), ('id', column.key))
+        query = filter_pokemon_query(serializer.select(), args)
+        paginated = 'limit' in args or 'cursor' in args
+        total = db.session.scalar(db.select(db.func.count()).select_from(query.subquery())) if paginated else None
+
+        if args.get('cursor'):
+            value, last_id = decode_cursor(args['cursor'])
+            if column.key == 'caught_at' and value is not None:
+                value = datetime.fromisoformat(value)
+            # NULL sort values come last in both orders, so a NULL cursor only has NULLs after it
+            id_after = Pokemon.id > last_id if order == 'asc' else Pokemon.id < last_id
+            if value is None:
+                query = query.filter(column.is_(None), id_after)
+            else:
+                beyond = column > value if order == 'asc' else column < value
+                query = query.filter(db.or_(beyond, db.and_(column == value, id_after), column.is_(None)))
+        if order == 'asc':
+            query = query.order_by(column.asc().nulls_last(), Pokemon.id.asc())
+        else:
+            query = query.order_by(column.desc().nulls_last(), Pokemon.id.desc())
+
+        if not paginated:
+            return json_response([serializer(row) for row in db.session.execute(query)])
+
+        limit = max(1, min(args.get('limit', 50, type=int), MAX_POKEMON_PAGE_SIZE))
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        next_cursor = encode_cursor([get_pokemon_sort_value(rows[limit - 1], sort), rows[limit - 1].id]) if len(rows) > limit else None
+        return json_response({'items': [serializer(row) for row in rows[:limit]], 'nextCursor': next_cursor, 'total': total})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @app.route('/api/pokemon/<int:db_id>', methods=['GET'])
@@ -442,27 +1103,28 @@ def get_pokemon_detail(db_id):
     return jsonify(pokemon.to_dict())
 
 
-@app.route('/api/pokemon', methods=['POST'])
-def add_pokemon():
-    current_count = Pokemon.query.count()
-    if current_count >= 100:
-        return jsonify({'error': 'Storage limit reached. Maximum 100 Pokemon allowed.'}), 400
+MAX_STORED_POKEMON = 100
+MAX_BATCH_SIZE = 500
+
+def build_pokemon(data):
+    """A new Pokemon row from a catch payload; raises ValueError for a malformed payload"""
+    if not isinstance(data, dict) or 'id' not in data or 'name' not in data:
+        raise ValueError('Pokemon id and name are required')
 
-    data = request.json
     nature = data.get('nature', random.choice(NATURES))
 
     raw_evs = data.get('evs', {})
     validated_evs = validate_and_clamp_evs(raw_evs)
 
-    ivs = data.get('ivs', {})
+    ivs = validate_ivs(data.get('ivs', {}))
 
-    new_pokemon = Pokemon(
+    return Pokemon(
         pokemon_id=data['id'],
         name=data['name'],
         level=data.get('level', 1),
         caught_at=datetime.fromisoformat(data['caughtAt'].replace('Z', '+00:00')) if 'caughtAt' in data else datetime.now(),
         nature=nature,
-        item=data.get('item'),
+        item_id=parse_held_item(data.get('item')),
         hp_ev=validated_evs.get('hp', 0),
         attack_ev=validated_evs.get('attack', 0),
         defense_ev=validated_evs.get('defense', 0),
@@ -476,18 +1138,72 @@ def add_pokemon():
         sp_defense_iv=ivs.get('spDefense', random.randint(0, 31)),
         speed_iv=ivs.get('speed', random.randint(0, 31))
     )
+
+
+@app.route('/api/pokemon', methods=['POST'])
+def add_pokemon():
+    current_count = Pokemon.query.count()
+    if current_count >= MAX_STORED_POKEMON:
+        return jsonify({'error': f'Storage limit reached. Maximum {MAX_STORED_POKEMON} Pokemon allowed.'}), 400
+
+    try:
+        new_pokemon = build_pokemon(request.json)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     db.session.add(new_pokemon)
     db.session.commit()
     return jsonify(new_pokemon.to_dict()), 201
 
 
+@app.route('/api/pokemon/batch', methods=['POST'])
+def add_pokemon_batch():
+    """Store an array of catches in one transaction; returns a result per item, in order.
+
+    Malformed items and items past the storage limit are reported and skipped, the rest are
+    inserted together.
+    """
+    items = request.get_json(silent=True)
+    if isinstance(items, dict):
+        items = items.get('pokemon')
+    if not isinstance(items, list):
+        return jsonify({'error': 'Expected an array of Pokemon'}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} Pokemon per batch'}), 400
+
+    free_slots = MAX_STORED_POKEMON - Pokemon.query.count()
+    results = []
+    created = []
+    for index, data in enumerate(items):
+        if len(created) >= free_slots:
+            results.append({'index': index, 'success': False, 'error': 'Storage limit reached'})
+            continue
+        try:
+            pokemon = build_pokemon(data)
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append({'index': index, 'success': False, 'error': str(e)})
+            continue
+        created.append(pokemon)
+        results.append({'index': index, 'success': True, 'pokemon': pokemon})
+
+    db.session.add_all(created)
+    db.session.commit()
+    for result in results:
+        if result['success']:
+            result['pokemon'] = result['pokemon'].to_dict()
+
+    return jsonify({'results': results, 'created': len(created), 'failed': len(results) - len(created)})
+
+
 @app.route('/api/pokemon/<int:db_id>', methods=['PUT'])
 def update_pokemon(db_id):
     pokemon = Pokemon.query.get_or_404(db_id)
     data = request.json
 
     if 'item' in data:
-        pokemon.item = data['item']
+        item_id = resolve_item_id(data['item'])
+        if data['item'] and not item_id:
+            return jsonify({'error': 'Invalid item'}), 400
+        pokemon.item_id = item_id
     if 'is_favorite' in data:
         pokemon.is_favorite = data['is_favorite']
     if 'evs' in data:
@@ -523,18 +1239,20 @@ def delete_pokemon(db_id):
 
 @app.route('/api/favorites', methods=['GET'])
 def get_favorites():
-    favorite_pokemon = Pokemon.query.filter_by(is_favorite=True).order_by(Pokemon.level.desc()).limit(6).all()
-    return jsonify([p.to_dict() for p in favorite_pokemon])
+    serializer = pokemon_serializer(tuple(POKEMON_FIELDS))
+    rows = db.session.execute(serializer.select().filter_by(is_favorite=True).order_by(Pokemon.level.desc()).limit(6))
+    return json_response([serializer(row) for row in rows])
 
 
 @app.route('/api/party', methods=['GET'])
 def get_party():
-    party_pokemon = Pokemon.query.filter_by(in_party=True).order_by(Pokemon.level.desc()).limit(6).all()
-    
-    return jsonify({
-        'party': [p.to_dict() for p in party_pokemon],
+    serializer = pokemon_serializer(tuple(POKEMON_FIELDS))
+    rows = db.session.execute(serializer.select().filter_by(in_party=True).order_by(Pokemon.level.desc()).limit(6)).all()
+
+    return json_response({
+        'party': [serializer(row) for row in rows],
         'auto_selected': False,
-        'party_db_ids': [p.id for p in party_pokemon]
+        'party_db_ids': [row.id for row in rows]
     })
 
 
@@ -583,11 +1301,15 @@ def update_companion():
 
     # If pokemon_id is provided, replace the entire companion
     if 'pokemon_id' in data:
+        try:
+            ivs = validate_ivs(data.get('ivs', {}))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         if companion:
             db.session.delete(companion)
 
         evs = data.get('evs', {})
-        ivs = data.get('ivs', {})
 
         companion = Companion(
             pokemon_id=data['pokemon_id'],
@@ -599,7 +1321,7 @@ def update_companion():
             experience_to_next=data.get('experience_to_next', 100),
             happiness=data.get('happiness', 100),
             nature=data.get('nature', 'Hardy'),
-            item=data.get('item'),
+            item_id=resolve_item_id(data.get('item')),
             hp_ev=evs.get('hp', 0),
             attack_ev=evs.get('attack', 0),
             defense_ev=evs.get('defense', 0),
@@ -702,7 +1424,7 @@ def seed_pokemon():
             name=p['name'],
             level=p['level'],
             nature=p.get('nature', random.choice(NATURES)),
-            item=p.get('item'),
+            item_id=parse_held_item(p.get('item')),
             hp_ev=evs.get('hp', 0),
             attack_ev=evs.get('attack', 0),
             defense_ev=evs.get('defense', 0),
@@ -724,10 +1446,7 @@ def seed_pokemon():
 
 @app.route('/api/natures', methods=['GET'])
 def get_natures():
-    return jsonify({
-        'natures': NATURES,
-        'modifiers': NATURE_MODIFIERS
-    })
+    return catalog_response('natures')
 
 
 @app.route('/api/items', methods=['GET'])
@@ -738,16 +1457,114 @@ def get_items():
 
 @app.route('/api/items/catalog', methods=['GET'])
 def get_item_catalog():
-    catalog = []
-    for item_id, item_data in POKEMON_ITEMS.items():
-        catalog.append({
-            'itemId': item_id,
-            'name': item_data['name'],
-            'description': item_data['description'],
-            'category': item_data['category'],
-            'sprite': item_data['sprite']
-        })
-    return jsonify(catalog)
+    return catalog_response('items')
+
+
+# ============================================
+# INVENTORY SERVICE
+# ============================================
+# Stock moves are single statements in the caller's transaction instead of read, change
+# in Python, write: credits are INSERT ... ON CONFLICT DO UPDATE quantity = quantity + n,
+# debits are UPDATE ... WHERE quantity >= n, so concurrent requests can neither spend
+# the same unit twice nor lose an increment. Rows are touched in item_id order so two
+# batches cannot deadlock, and a row that reaches zero is deleted. Held items are
+# swapped under SELECT ... FOR UPDATE on Postgres, with a compare-and-swap on the
+# Pokemon row as the guard on SQLite, which has no row locks.
+class InsufficientStock(ValueError):
+    def __init__(self, item_id, requested):
+        super().__init__(f'Not enough {item_name(item_id)} in inventory (need {requested})')
+        self.item_id = item_id
+        self.requested = requested
+
+
+class HeldItemConflict(Exception):
+    pass
+
+
+def parse_inventory_item_id(item_id):
+    if item_id not in POKEMON_ITEMS:
+        raise ValueError(f'Invalid item: {item_id}')
+    return item_id
+
+def credit_item(item_id, quantity):
+    """Add quantity units of an item in one upsert; returns the new stock"""
+    statement = UPSERT_INSERTS[db.engine.dialect.name](Item).values(item_id=item_id, quantity=quantity)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Item.item_id], set_={'quantity': Item.quantity + quantity}
+    ).returning(Item.quantity)
+    return db.session.execute(statement).scalar_one()
+
+def debit_item(item_id, quantity):
+    """Take quantity units of an item, only if that many are in stock; returns the new stock.
+
+    Raises InsufficientStock without changing anything otherwise.
+    """
+    remaining = db.session.execute(
+        db.update(Item)
+        .where(Item.item_id == item_id, Item.quantity >= quantity)
+        .values(quantity=Item.quantity - quantity)
+        .returning(Item.quantity),
+        execution_options={'synchronize_session': False}
+    ).scalar_one_or_none()
+    if remaining is None:
+        raise InsufficientStock(item_id, quantity)
+    if remaining == 0:
+        db.session.execute(
+            db.delete(Item).where(Item.item_id == item_id, Item.quantity == 0),
+            execution_options={'synchronize_session': False}
+        )
+    return remaining
+
+def set_item_quantity(item_id, quantity):
+    """Overwrite the stock of an item already in the inventory; returns None when it has none"""
+    updated = db.session.execute(
+        db.update(Item).where(Item.item_id == item_id).values(quantity=quantity).returning(Item.id),
+        execution_options={'synchronize_session': False}
+    ).scalar_one_or_none()
+    if updated is not None and quantity == 0:
+        db.session.execute(db.delete(Item).where(Item.id == updated), execution_options={'synchronize_session': False})
+    return updated
+
+def apply_inventory_deltas(deltas):
+    """Apply {item_id: signed delta} in item_id order; returns {item_id: new stock}.
+
+    Runs in the current transaction and the caller commits. A debit that cannot be covered
+    raises InsufficientStock; roll back to discard the deltas already applied.
+    """
+    stock = {}
+    for item_id, delta in sorted(deltas.items()):
+        if delta > 0:
+            stock[item_id] = credit_item(item_id, delta)
+        elif delta < 0:
+            stock[item_id] = debit_item(item_id, -delta)
+    return stock
+
+def swap_held_item(db_id, item_id):
+    """Give Pokemon db_id the item item_id (None to unequip), moving stock both ways.
+
+    Runs in the current transaction and the caller commits. Returns the Pokemon, or None
+    if there is no such Pokemon.
+    """
+    pokemon = db.session.get(Pokemon, db_id, with_for_update=True, populate_existing=True)
+    if pokemon is None:
+        return None
+    old_item_id = pokemon.item_id
+    deltas = {}
+    if item_id:
+        deltas[item_id] = -1
+    if old_item_id:
+        deltas[old_item_id] = deltas.get(old_item_id, 0) + 1
+    apply_inventory_deltas(deltas)
+    swapped = db.session.execute(
+        db.update(Pokemon)
+        .where(Pokemon.id == db_id, Pokemon.item_id.is_not_distinct_from(old_item_id))
+        .values(item_id=item_id),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if not swapped:
+        raise HeldItemConflict(f'Held item of Pokemon {db_id} changed concurrently')
+    db.session.refresh(pokemon)
+    return pokemon
 
 
 @app.route('/api/items', methods=['POST'])
@@ -758,83 +1575,100 @@ def add_item():
 
     if item_id not in POKEMON_ITEMS:
         return jsonify({'error': 'Invalid item'}), 400
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        return jsonify({'error': 'quantity must be a positive integer'}), 400
 
-    existing = Item.query.filter_by(item_id=item_id).first()
-    if existing:
-        existing.quantity += quantity
-    else:
-        new_item = Item(item_id=item_id, quantity=quantity)
-        db.session.add(new_item)
-
+    credit_item(item_id, quantity)
     db.session.commit()
     return jsonify({'message': f'Added {quantity}x {POKEMON_ITEMS[item_id]["name"]}'})
 
 
 @app.route('/api/items/<item_id>', methods=['PUT'])
 def update_item_quantity(item_id):
-    data = request.json
-    item = Item.query.filter_by(item_id=item_id).first()
-
-    if not item:
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+
+    if 'quantity' not in data:
+        item = Item.query.filter_by(item_id=item_id).first()
+        return jsonify(item.to_dict()) if item else (jsonify({'error': 'Item not found'}), 404)
+
+    quantity = data['quantity']
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        return jsonify({'error': 'quantity must be an integer'}), 400
+    quantity = max(0, quantity)
+    if set_item_quantity(item_id, quantity) is None:
         return jsonify({'error': 'Item not found'}), 404
+    db.session.commit()
 
-    if 'quantity' in data:
-        item.quantity = max(0, data['quantity'])
-        if item.quantity == 0:
-            db.session.delete(item)
+    if quantity == 0:
+        return jsonify({'deleted': True})
+    return jsonify(Item.query.filter_by(item_id=item_id).first().to_dict())
+
+
+@app.route('/api/items/batch', methods=['POST'])
+def apply_item_batch():
+    """Apply many inventory deltas in one transaction; all of them or none.
+
+    Body: {"deltas": [{"itemId": "poke-ball", "delta": -2}, ...]} or {"deltas": {"poke-ball": -2}}.
+    Deltas for the same item are summed. Returns the resulting stock of every touched item;
+    409 when a debit exceeds the stock, leaving the inventory unchanged.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected an object with deltas'}), 400
+    deltas = data.get('deltas')
+    if isinstance(deltas, dict):
+        deltas = [{'itemId': item_id, 'delta': delta} for item_id, delta in deltas.items()]
+    if not isinstance(deltas, list):
+        return jsonify({'error': 'deltas must be an array or an object'}), 400
+    if len(deltas) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} deltas per batch'}), 400
+
+    totals = {}
+    try:
+        for entry in deltas:
+            item_id = parse_inventory_item_id(entry.get('itemId'))
+            delta = entry.get('delta')
+            if not isinstance(delta, int) or isinstance(delta, bool):
+                raise ValueError(f'delta for {item_id} must be an integer')
+            totals[item_id] = totals.get(item_id, 0) + delta
+    except (ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-    db.session.commit()
-    return jsonify(item.to_dict() if item.quantity > 0 else {'deleted': True})
+    try:
+        stock = apply_inventory_deltas(totals)
+        db.session.commit()
+    except InsufficientStock as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e), 'itemId': e.item_id}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'items': {item_id: stock.get(item_id, 0) for item_id in totals}})
 
 
 @app.route('/api/pokemon/<int:db_id>/equip', methods=['POST'])
 def equip_item_to_pokemon(db_id):
-    pokemon = Pokemon.query.get_or_404(db_id)
     data = request.json
     item_id = data.get('itemId')
 
-    if item_id:
-        if item_id not in POKEMON_ITEMS:
-            return jsonify({'error': 'Invalid item'}), 400
+    if item_id and item_id not in POKEMON_ITEMS:
+        return jsonify({'error': 'Invalid item'}), 400
 
-        inventory_item = Item.query.filter_by(item_id=item_id).first()
-        if not inventory_item or inventory_item.quantity < 1:
-            return jsonify({'error': 'Item not in inventory'}), 400
-
-        if pokemon.item:
-            old_item_id = None
-            for key, val in POKEMON_ITEMS.items():
-                if val['name'] == pokemon.item:
-                    old_item_id = key
-                    break
-            if old_item_id:
-                old_inventory = Item.query.filter_by(item_id=old_item_id).first()
-                if old_inventory:
-                    old_inventory.quantity += 1
-                else:
-                    db.session.add(Item(item_id=old_item_id, quantity=1))
-
-        inventory_item.quantity -= 1
-        if inventory_item.quantity <= 0:
-            db.session.delete(inventory_item)
-
-        pokemon.item = POKEMON_ITEMS[item_id]['name']
-    else:
-        if pokemon.item:
-            old_item_id = None
-            for key, val in POKEMON_ITEMS.items():
-                if val['name'] == pokemon.item:
-                    old_item_id = key
-                    break
-            if old_item_id:
-                old_inventory = Item.query.filter_by(item_id=old_item_id).first()
-                if old_inventory:
-                    old_inventory.quantity += 1
-                else:
-                    db.session.add(Item(item_id=old_item_id, quantity=1))
-        pokemon.item = None
+    try:
+        pokemon = swap_held_item(db_id, item_id or None)
+        if pokemon is None:
+            return jsonify({'error': 'Pokemon not found'}), 404
+        db.session.commit()
+    except InsufficientStock:
+        db.session.rollback()
+        return jsonify({'error': 'Item not in inventory'}), 400
+    except HeldItemConflict as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
 
-    db.session.commit()
     return jsonify(pokemon.to_dict())
 
 
@@ -870,11 +1704,297 @@ def seed_items():
     return jsonify({'message': 'Items seeded', 'count': len(starter_items)})
 
 
+POKEDEX_SUMMARY_ID = 1
+
+def refresh_pokedex_summary():
+    """Re-derive the summary row inside the current transaction; call after changing entries.
+
+    The counts come from the indexed encountered/caught columns of a <=151-row table, which
+    stays exact under concurrent writers where a +1 decided before an upsert would not.
+    """
+    encountered = db.select(db.func.count()).where(PokedexEntry.encountered.is_(True)).scalar_subquery()
+    caught = db.select(db.func.count()).where(PokedexEntry.caught.is_(True)).scalar_subquery()
+    now = datetime.utcnow()
+    statement = UPSERT_INSERTS[db.engine.dialect.name](PokedexSummary).values(
+        id=POKEDEX_SUMMARY_ID, encountered=encountered, caught=caught, version=1, updated_at=now
+    )
+    db.session.execute(statement.on_conflict_do_update(index_elements=[PokedexSummary.id], set_={
+        'encountered': statement.excluded.encountered,
+        'caught': statement.excluded.caught,
+        'version': PokedexSummary.version + 1,
+        'updated_at': now
+    }))
+
+def get_pokedex_version():
+    return db.session.execute(db.select(PokedexSummary.version).where(PokedexSummary.id == POKEDEX_SUMMARY_ID)).scalar() or 0
+
+# version -> serialized response bodies, so unchanged Pokedex reads skip the ORM entirely
+pokedex_response_cache = {'version': None, 'bodies': {}}
+pokedex_response_lock = threading.Lock()
+
+def cached_pokedex_response(kind, build):
+    """Serve a Pokedex read from the per-version body cache, answering If-None-Match with 304.
+
+    Reads never flush the encounter buffer; buffered encounters show up once the buffer's
+    own timer or threshold writes them, at most ENCOUNTER_FLUSH_INTERVAL seconds later.
+    """
+    version = get_pokedex_version()
+    with pokedex_response_lock:
+        if pokedex_response_cache['version'] != version:
+            pokedex_response_cache.update(version=version, bodies={})
+        body = pokedex_response_cache['bodies'].get(kind)
+    if body is None:
+        body = app.json.dumps(build())
+        with pokedex_response_lock:
+            if pokedex_response_cache['version'] == version:
+                pokedex_response_cache['bodies'][kind] = body
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(f'pokedex-{kind}-{version}')
+    return response.make_conditional(request)
+
+
 @app.route('/api/pokedex', methods=['GET'])
 def get_pokedex():
-    entries = PokedexEntry.query.all()
-    entries_dict = {e.pokemon_id: e.to_dict() for e in entries}
-    return jsonify(entries_dict)
+    return cached_pokedex_response('entries', lambda: {e.pokemon_id: e.to_dict() for e in PokedexEntry.query.all()})
+
+
+POKEDEX_SIZE = 151
+POKEDEX_EVENT_KINDS = ('encounter', 'catch')
+
+def is_valid_pokedex_id(pokemon_id):
+    return isinstance(pokemon_id, int) and not isinstance(pokemon_id, bool) and 1 <= pokemon_id <= POKEDEX_SIZE
+
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+def upsert_pokedex_entry(pokemon_id, encounters=0, catches=0, encountered_at=None):
+    """Apply encounter/catch counts to one Pokedex entry in a single INSERT ... ON CONFLICT DO UPDATE.
+
+    The increments happen inside the statement, so concurrent workers never lose updates.
+    A new entry counts as encountered even when its first event is a catch. encountered_at
+    is when the first of the encounters happened, if earlier than now (buffered encounters).
+    """
+    now = datetime.utcnow()
+    encountered_at = encountered_at or now
+    insert = UPSERT_INSERTS[db.engine.dialect.name](PokedexEntry).values(
+        pokemon_id=pokemon_id,
+        encountered=True,
+        caught=catches > 0,
+        times_encountered=max(encounters, 1),
+        times_caught=catches,
+        first_encountered_at=encountered_at,
+        first_caught_at=now if catches else None
+    )
+    changes = {}
+    if encounters:
+        changes.update(
+            encountered=True,
+            times_encountered=PokedexEntry.times_encountered + encounters,
+            first_encountered_at=db.func.coalesce(PokedexEntry.first_encountered_at, encountered_at)
+        )
+    if catches:
+        changes.update(
+            caught=True,
+            times_caught=PokedexEntry.times_caught + catches,
+            first_caught_at=db.func.coalesce(PokedexEntry.first_caught_at, now)
+        )
+    statement = insert.on_conflict_do_update(index_elements=[PokedexEntry.pokemon_id], set_=changes).returning(PokedexEntry)
+    return db.session.scalars(statement, execution_options={'populate_existing': True}).one()
+
+def apply_pokedex_counts(counts, encountered_at=None):
+    """Upsert {pokemon_id: (encounters, catches)} in pokemon_id order and refresh the summary.
+
+    encountered_at optionally maps pokemon_id to when its first encounter happened.
+    Runs in the current transaction; the caller commits. Returns {pokemon_id: entry}.
+    """
+    encountered_at = encountered_at or {}
+    entries = {
+        pokemon_id: upsert_pokedex_entry(pokemon_id, *totals, encountered_at=encountered_at.get(pokemon_id))
+        for pokemon_id, totals in sorted(counts.items())
+    }
+    refresh_pokedex_summary()
+    return entries
+
+def apply_pokedex_events(events):
+    """Apply (pokemon_id, kind) events with one upsert per distinct Pokemon"""
+    counts = {}
+    for pokemon_id, kind in events:
+        encounters, catches = counts.get(pokemon_id, (0, 0))
+        counts[pokemon_id] = (encounters + 1, catches) if kind == 'encounter' else (encounters, catches + 1)
+    return apply_pokedex_counts(counts)
+
+
+# Encounters are the highest-volume write. Instead of one commit per encounter they are
+# merged per pokemon_id in memory and flushed as one transaction of upserts every
+# ENCOUNTER_FLUSH_INTERVAL seconds or once ENCOUNTER_FLUSH_THRESHOLD encounters are pending.
+# ENCOUNTER_FLUSH_INTERVAL=0 writes every encounter straight through.
+ENCOUNTER_FLUSH_INTERVAL = float(os.environ.get('ENCOUNTER_FLUSH_INTERVAL', 2))
+ENCOUNTER_FLUSH_THRESHOLD = int(os.environ.get('ENCOUNTER_FLUSH_THRESHOLD', 200))
+ENCOUNTER_JOURNAL = os.environ.get('ENCOUNTER_JOURNAL')
+
+class EncounterBuffer:
+    """Write-behind buffer for Pokedex encounter increments.
+
+    Pending increments are flushed by a background thread, on reaching the threshold and at
+    interpreter exit. Each species also keeps the time of its first pending encounter, so
+    reads before the flush and the flushed row agree on firstEncounteredAt. With a journal
+    path, every encounter is also appended to a local file before it is acknowledged; the
+    file is replayed on startup, so a crash between flushes loses nothing that reached the OS.
+    """
+
+    def __init__(self, interval, threshold, journal_path=None):
+        self.interval = interval
+        self.threshold = threshold
+        self.journal_path = journal_path
+        self._pending = {}
+        self._first_seen = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._journal = None
+        self.flushes = 0
+        self.flushed_encounters = 0
+        self.failures = 0
+        self.last_flush_at = None
+        if journal_path:
+            self._replay_journal()
+
+    def _replay_journal(self):
+        for path in (self.journal_path + '.flushing', self.journal_path):
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) in (2, 3):
+                            # journals written before first-seen times were recorded have two fields
+                            pokemon_id = int(parts[0])
+                            seen = datetime.fromisoformat(parts[2]) if len(parts) == 3 else datetime.utcnow()
+                            self._merge({pokemon_id: int(parts[1])}, {pokemon_id: seen})
+        self._journal = open(self.journal_path, 'w')
+        self._write_journal(self._pending, self._first_seen)
+        if os.path.exists(self.journal_path + '.flushing'):
+            os.remove(self.journal_path + '.flushing')
+
+    def _merge(self, counts, first_seen):
+        for pokemon_id, count in counts.items():
+            self._pending[pokemon_id] = self._pending.get(pokemon_id, 0) + count
+            seen = self._first_seen.get(pokemon_id)
+            if seen is None or first_seen[pokemon_id] < seen:
+                self._first_seen[pokemon_id] = first_seen[pokemon_id]
+            self._pending_total += count
+
+    def _write_journal(self, counts, first_seen):
+        if self._journal:
+            self._journal.write(''.join(
+                f'{pokemon_id} {count} {first_seen[pokemon_id].isoformat()}\n' for pokemon_id, count in counts.items()
+            ))
+            self._journal.flush()
+
+    def _ensure_thread(self):
+        # started lazily so forked workers (gunicorn --preload) each get their own flusher
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='encounter-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def add(self, pokemon_id, count=1):
+        seen = {pokemon_id: datetime.utcnow()}
+        with self._lock:
+            self._merge({pokemon_id: count}, seen)
+            self._write_journal({pokemon_id: count}, seen)
+            full = self._pending_total >= self.threshold
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def pending(self, pokemon_id):
+        """(pending encounters, time of the first of them) for one species"""
+        with self._lock:
+            return self._pending.get(pokemon_id, 0), self._first_seen.get(pokemon_id)
+
+    def flush(self):
+        """Write every pending increment in one transaction; on failure they stay pending"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._pending_total = self._pending, {}, 0
+                first_seen, self._first_seen = self._first_seen, {}
+                if batch and self._journal:
+                    self._journal.close()
+                    os.replace(self.journal_path, self.journal_path + '.flushing')
+                    self._journal = open(self.journal_path, 'a')
+            if not batch:
+                return 0
+
+            try:
+                with app.app_context():
+                    apply_pokedex_counts({pokemon_id: (count, 0) for pokemon_id, count in batch.items()}, first_seen)
+                    db.session.commit()
+            except Exception:
+                app.logger.exception('Encounter flush failed; %d encounter(s) kept pending', sum(batch.values()))
+                with self._lock:
+                    self._merge(batch, first_seen)
+                    self._write_journal(batch, first_seen)
+                    self.failures += 1
+                return 0
+            finally:
+                if self.journal_path and os.path.exists(self.journal_path + '.flushing'):
+                    os.remove(self.journal_path + '.flushing')
+
+            self.flushes += 1
+            self.flushed_encounters += sum(batch.values())
+            self.last_flush_at = datetime.utcnow()
+            return len(batch)
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'intervalSeconds': self.interval,
+                'threshold': self.threshold,
+                'journal': self.journal_path,
+                'pendingSpecies': len(self._pending),
+                'pendingEncounters': self._pending_total,
+                'flushes': self.flushes,
+                'flushedEncounters': self.flushed_encounters,
+                'failures': self.failures,
+                'lastFlushAt': self.last_flush_at.isoformat() if self.last_flush_at else None
+            }
+
+
+encounter_buffer = EncounterBuffer(ENCOUNTER_FLUSH_INTERVAL, ENCOUNTER_FLUSH_THRESHOLD, ENCOUNTER_JOURNAL) if ENCOUNTER_FLUSH_INTERVAL > 0 else None
+if encounter_buffer:
+    atexit.register(encounter_buffer.close)
+
+def flush_encounters():
+    """Flush buffered encounters before a write that must apply after them (catches, batches)"""
+    if encounter_buffer:
+        encounter_buffer.flush()
+
+def buffered_pokedex_entry(pokemon_id):
+    """The entry as it will be once this process's pending encounters are flushed"""
+    pending, first_seen = encounter_buffer.pending(pokemon_id)
+    entry = PokedexEntry.query.filter_by(pokemon_id=pokemon_id).first()
+    if not entry:
+        entry = PokedexEntry(pokemon_id=pokemon_id, caught=False, times_encountered=0, times_caught=0,
+                             first_encountered_at=first_seen)
+    data = entry.to_dict()
+    data['encountered'] = True
+    data['timesEncountered'] += pending
+    return data
 
 
 @app.route('/api/pokedex/encounter', methods=['POST'])
@@ -882,25 +2002,14 @@ def record_encounter():
     data = request.json
     pokemon_id = data.get('pokemonId')
     
-    if not pokemon_id or pokemon_id < 1 or pokemon_id > 151:
+    if not is_valid_pokedex_id(pokemon_id):
         return jsonify({'error': 'Invalid Pokemon ID'}), 400
     
-    entry = PokedexEntry.query.filter_by(pokemon_id=pokemon_id).first()
-    
-    if not entry:
-        entry = PokedexEntry(
-            pokemon_id=pokemon_id,
-            encountered=True,
-            times_encountered=1,
-            first_encountered_at=datetime.utcnow()
-        )
-        db.session.add(entry)
-    else:
-        entry.encountered = True
-        entry.times_encountered += 1
-        if not entry.first_encountered_at:
-            entry.first_encountered_at = datetime.utcnow()
+    if encounter_buffer:
+        encounter_buffer.add(pokemon_id)
+        return jsonify(buffered_pokedex_entry(pokemon_id))
     
+    entry = apply_pokedex_events([(pokemon_id, 'encounter')])[pokemon_id]
     db.session.commit()
     return jsonify(entry.to_dict())
 
@@ -910,100 +2019,546 @@ def record_catch():
     data = request.json
     pokemon_id = data.get('pokemonId')
     
-    if not pokemon_id or pokemon_id < 1 or pokemon_id > 151:
+    if not is_valid_pokedex_id(pokemon_id):
         return jsonify({'error': 'Invalid Pokemon ID'}), 400
     
-    entry = PokedexEntry.query.filter_by(pokemon_id=pokemon_id).first()
-    
-    if not entry:
-        entry = PokedexEntry(
-            pokemon_id=pokemon_id,
-            encountered=True,
-            caught=True,
-            times_encountered=1,
-            times_caught=1,
-            first_encountered_at=datetime.utcnow(),
-            first_caught_at=datetime.utcnow()
-        )
-        db.session.add(entry)
-    else:
-        entry.caught = True
-        entry.times_caught += 1
-        if not entry.first_caught_at:
-            entry.first_caught_at = datetime.utcnow()
-    
+    flush_encounters()
+    entry = apply_pokedex_events([(pokemon_id, 'catch')])[pokemon_id]
     db.session.commit()
     return jsonify(entry.to_dict())
 
 
+@app.route('/api/pokedex/batch', methods=['POST'])
+def record_pokedex_batch():
+    """Apply arrays of encounters and catches in one transaction.
+
+    Body: {"encounters": [pokemonId, ...], "catches": [pokemonId, ...]}; items may also be
+    {"pokemonId": n} objects. Encounters are applied before catches, each in array order.
+    """
+    data = request.get_json(silent=True) or {}
+    batches = {'encounter': data.get('encounters') or [], 'catch': data.get('catches') or []}
+    if not all(isinstance(items, list) for items in batches.values()):
+        return jsonify({'error': 'encounters and catches must be arrays'}), 400
+    if sum(len(items) for items in batches.values()) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} events per batch'}), 400
+
+    results = {'encounters': [], 'catches': []}
+    events = []
+    for kind, key in zip(POKEDEX_EVENT_KINDS, results):
+        for index, item in enumerate(batches[kind]):
+            pokemon_id = item.get('pokemonId') if isinstance(item, dict) else item
+            if not is_valid_pokedex_id(pokemon_id):
+                results[key].append({'index': index, 'success': False, 'error': 'Invalid Pokemon ID'})
+                continue
+            events.append((pokemon_id, kind))
+            results[key].append({'index': index, 'success': True, 'pokemonId': pokemon_id})
+
+    flush_encounters()
+    entries = apply_pokedex_events(events) if events else {}
+    db.session.commit()
+
+    return jsonify({
+        'results': results,
+        'applied': len(events),
+        'entries': [entry.to_dict() for entry in entries.values()]
+    })
+
+
+with app.app_context():
+    if not db.session.get(PokedexSummary, POKEDEX_SUMMARY_ID):
+        refresh_pokedex_summary()
+        db.session.commit()
+
+
+@app.route('/api/pokedex/encounter-buffer', methods=['GET'])
+def get_encounter_buffer():
+    return jsonify({'success': True, 'enabled': encounter_buffer is not None, 'buffer': encounter_buffer.stats() if encounter_buffer else None})
+
+
+@app.route('/api/pokedex/encounter-buffer/flush', methods=['POST'])
+def flush_encounter_buffer():
+    flushed = encounter_buffer.flush() if encounter_buffer else 0
+    return jsonify({'success': True, 'flushedSpecies': flushed, 'buffer': encounter_buffer.stats() if encounter_buffer else None})
+
+
 @app.route('/api/pokedex/stats', methods=['GET'])
 def get_pokedex_stats():
-    total = 151
-    encountered = PokedexEntry.query.filter_by(encountered=True).count()
-    caught = PokedexEntry.query.filter_by(caught=True).count()
+    return cached_pokedex_response('stats', build_pokedex_stats)
+
+def build_pokedex_stats():
+    total = POKEDEX_SIZE
+    summary = db.session.get(PokedexSummary, POKEDEX_SUMMARY_ID)
+    encountered = summary.encountered if summary else 0
+    caught = summary.caught if summary else 0
     
-    return jsonify({
+    return {
         'total': total,
         'encountered': encountered,
         'caught': caught,
         'encounterPercent': round((encountered / total) * 100, 1),
         'catchPercent': round((caught / total) * 100, 1)
-    })
+    }
 
 
-@app.route('/api/battle/calculate-damage', methods=['POST'])
-def calculate_damage():
-    try:
-        response = requests.post(f'{BATTLE_CALC_URL}/api/calculate-damage', json=request.json, timeout=5)
-        return jsonify(response.json()), response.status_code
-    except requests.exceptions.RequestException as e:
-        return jsonify({'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}), 503
+# ============================================
+# BATTLE CALCULATOR PROXY (pooled keep-alive session)
+# ============================================
+
+class BattleCalcClient:
+    """Shared keep-alive session to the Node battle-calc service with per-route latency metrics"""
+
+    def __init__(self, base_url, pool_size, retries, timeout):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=retries, read=0, backoff_factor=0.1,
+                              allowed_methods=frozenset(['GET', 'POST'])),
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def request(self, method, route, payload=None):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return self.session.request(method, f'{self.base_url}{route}', json=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            self._record(route, (time.perf_counter() - started) * 1000, failed)
+
+    def _record(self, route, elapsed_ms, failed):
+        with self._lock:
+            stats = self._routes.setdefault(route, {'requests': 0, 'errors': 0, 'totalMs': 0.0, 'maxMs': 0.0})
+            stats['requests'] += 1
+            stats['errors'] += int(failed)
+            stats['totalMs'] += elapsed_ms
+            stats['maxMs'] = max(stats['maxMs'], elapsed_ms)
+
+    def connection_stats(self):
+        opened = 0
+        requests_sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                requests_sent += pool.num_requests
+        return {'opened': opened, 'reused': max(0, requests_sent - opened), 'requests': requests_sent}
+
+    def metrics(self):
+        with self._lock:
+            routes = {
+                route: {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'avgMs': round(stats['totalMs'] / stats['requests'], 2) if stats['requests'] else 0,
+                    'maxMs': round(stats['maxMs'], 2)
+                }
+                for route, stats in self._routes.items()
+            }
+        return {
+            'baseUrl': self.base_url,
+            'poolSize': self.pool_size,
+            'retries': self.retries,
+            'timeout': self.timeout,
+            'connections': self.connection_stats(),
+            'routes': routes
+        }
 
 
-@app.route('/api/battle/calculate-stats', methods=['POST'])
-def calculate_stats():
-    try:
-        response = requests.post(f'{BATTLE_CALC_URL}/api/calculate-stats', json=request.json, timeout=5)
-        return jsonify(response.json()), response.status_code
-    except requests.exceptions.RequestException as e:
-        return jsonify({'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}), 503
+battle_calc = BattleCalcClient(BATTLE_CALC_URL, BATTLE_CALC_POOL_SIZE, BATTLE_CALC_RETRIES, BATTLE_CALC_TIMEOUT)
 
 
-@app.route('/api/battle/move-info', methods=['POST'])
-def get_move_info():
+def proxy_battle_calc(method, route, payload=None):
     try:
-        response = requests.post(f'{BATTLE_CALC_URL}/api/get-move-info', json=request.json, timeout=5)
+        response = battle_calc.request(method, route, payload)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException as e:
         return jsonify({'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}), 503
 
 
-@app.route('/api/battle/type-effectiveness', methods=['POST'])
-def get_type_effectiveness():
-    try:
-        response = requests.post(f'{BATTLE_CALC_URL}/api/type-effectiveness', json=request.json, timeout=5)
-        return jsonify(response.json()), response.status_code
+class LRUTTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL (ttl=None never expires)"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl if self.ttl is not None else float('inf'), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, prefix=None):
+        """Drop every entry, or only those whose key starts with prefix; returns the count removed"""
+        with self._lock:
+            if prefix is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxSize': self.maxsize,
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+
+battle_calc_cache = LRUTTLCache(BATTLE_CALC_CACHE_SIZE, BATTLE_CALC_CACHE_TTL)
+
+
+def normalize_battle_calc_payload(payload):
+    """Canonical form of a damage/stats payload so equivalent requests share a cache key"""
+    def normalize_pokemon(data):
+        data = data or {}
+        evs = data.get('evs') or {}
+        ivs = data.get('ivs') or {}
+        return {
+            'name': data.get('name'),
+            'level': data.get('level') or 50,
+            'nature': data.get('nature') or 'Hardy',
+            'ability': data.get('ability') or 'Static',
+            'item': data.get('item') or None,
+            'evs': {key: evs.get(key) or 0 for key in ('hp', 'attack', 'defense', 'spAttack', 'spDefense', 'speed')},
+            'ivs': {key: 31 if ivs.get(key) is None else ivs[key] for key in ('hp', 'attack', 'defense', 'spAttack', 'spDefense', 'speed')}
+        }
+
+    payload = payload or {}
+    if 'attacker' in payload or 'defender' in payload:
+        move = payload.get('move') or {}
+        return {
+            'attacker': normalize_pokemon(payload.get('attacker')),
+            'defender': normalize_pokemon(payload.get('defender')),
+            'move': move.get('name') if isinstance(move, dict) else move
+        }
+    return normalize_pokemon(payload)
+
+
+def battle_calc_cache_key(route, payload):
+    canonical = json.dumps(normalize_battle_calc_payload(payload), sort_keys=True, separators=(',', ':'))
+    return f'{route}:{hashlib.sha256(canonical.encode()).hexdigest()}'
+
+
+def roll_cached_damage(result):
+    """Re-roll the per-hit damage from the cached deterministic range, matching battle-calc"""
+    result = dict(result)
+    avg_damage = result.get('avgDamage')
+    if avg_damage is not None:
+        result['damage'] = max(1, int(avg_damage * (0.85 + random.random() * 0.15)))
+    return result
+
+
+class ShadowComparator:
+    """Counts agreement between the native engine and battle-calc when running in shadow mode"""
+
+    COMPARED_FIELDS = ('minDamage', 'maxDamage', 'stats')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compared = 0
+        self.mismatches = 0
+        self.last_mismatch = None
+
+    def compare(self, route, payload, native_result, proxy_result):
+        diffs = {
+            field: {'native': native_result.get(field), 'proxy': proxy_result.get(field)}
+            for field in self.COMPARED_FIELDS
+            if field in proxy_result and native_result.get(field) != proxy_result.get(field)
+        }
+        with self._lock:
+            self.compared += 1
+            if diffs:
+                self.mismatches += 1
+                self.last_mismatch = {'route': route, 'payload': payload, 'diffs': diffs}
+        if diffs:
+            app.logger.warning('Native battle calc disagrees with battle-calc on %s: %s', route, diffs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'compared': self.compared,
+                'mismatches': self.mismatches,
+                'agreementRate': round(1 - self.mismatches / self.compared, 4) if self.compared else None,
+                'lastMismatch': self.last_mismatch
+            }
+
+
+shadow_comparator = ShadowComparator()
+
+
+def get_battle_calc_mode():
+    return BATTLE_CALC_MODE if BATTLE_CALC_MODE in BATTLE_CALC_MODES else 'proxy'
+
+
+def run_battle_calc(route, payload):
+    """Compute a damage/stats result with the configured engine; returns (result, status_code).
+
+    Payloads the native engine cannot model (unknown species or moves, unsupported held items)
+    always go to battle-calc, in native mode too, and are left out of shadow comparisons.
+    """
+    mode = get_battle_calc_mode()
+    native = native_supports(route, payload)
+    if mode == 'native' and native:
+        return NATIVE_BATTLE_CALC[route](payload or {}), 200
+
+    try:
+        response = battle_calc.request('POST', route, payload)
     except requests.exceptions.RequestException as e:
-        return jsonify({'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}), 503
+        if mode == 'shadow' and native:
+            return NATIVE_BATTLE_CALC[route](payload or {}), 200
+        return {'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}, 503
+
+    result = response.json()
+    if mode == 'shadow' and native and response.status_code == 200 and result.get('success'):
+        shadow_comparator.compare(route, payload, NATIVE_BATTLE_CALC[route](payload or {}), result)
+    return result, response.status_code
+
+
+def cached_battle_calc(route, payload, finalize=None):
+    key = battle_calc_cache_key(route, payload)
+    cached = battle_calc_cache.get(key)
+    if cached is None:
+        result, status_code = run_battle_calc(route, payload)
+        if status_code != 200 or not result.get('success'):
+            return jsonify(result), status_code
+        battle_calc_cache.set(key, result)
+        cached = result
+    return jsonify(finalize(cached) if finalize else cached), 200
+
+
+@app.route('/api/battle/calculate-damage', methods=['POST'])
+def calculate_damage():
+    return cached_battle_calc('/api/calculate-damage', request.json, roll_cached_damage)
+
+
+@app.route('/api/battle/calculate-stats', methods=['POST'])
+def calculate_stats():
+    return cached_battle_calc('/api/calculate-stats', request.json)
+
+
+@app.route('/api/battle/move-info', methods=['POST'])
+def get_move_info():
+    return proxy_battle_calc('POST', '/api/get-move-info', request.json)
+
+
+MAX_TYPE_EFFECTIVENESS_PAIRS = 10000
+
+def parse_defender_types(query):
+    """Defending types of a type-effectiveness query: defenderTypes, or a species' types from defenderId"""
+    if query.get('defenderId') is not None:
+        defender_id = query['defenderId']
+        if defender_id not in SPECIES:
+            raise ValueError(f'Unknown species: {defender_id}')
+        return SPECIES.get_types(defender_id)
+    defender_types = query.get('defenderTypes')
+    if not isinstance(defender_types, list):
+        raise ValueError('defenderTypes must be an array')
+    return defender_types
+
+
+@app.route('/api/battle/type-effectiveness', methods=['POST'])
+def get_type_effectiveness():
+    """Served from the precomputed type matrix; same response as battle-calc's /api/type-effectiveness"""
+    data = request.get_json(silent=True) or {}
+    try:
+        multiplier = get_type_effectiveness_multiplier(data.get('attackType'), parse_defender_types(data))
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'effectiveness': multiplier,
+        'message': get_effectiveness_message(multiplier)
+    })
+
+
+@app.route('/api/battle/type-effectiveness/batch', methods=['POST'])
+def get_type_effectiveness_batch():
+    """Multipliers for many attacker/defender pairs in one call.
+
+    Body: {"pairs": [{"attackType": "Fire", "defenderTypes": ["Grass", "Steel"]},
+                     {"attackType": "Electric", "defenderId": 7}, ...]}.
+    Returns {"effectiveness": [4, 2, ...]} in the order of the pairs.
+    """
+    data = request.get_json(silent=True) or {}
+    pairs = data.get('pairs')
+    if not isinstance(pairs, list):
+        return jsonify({'success': False, 'error': 'pairs must be an array'}), 400
+    if len(pairs) > MAX_TYPE_EFFECTIVENESS_PAIRS:
+        return jsonify({'success': False, 'error': f'At most {MAX_TYPE_EFFECTIVENESS_PAIRS} pairs per batch'}), 400
+    try:
+        effectiveness = [
+            get_type_effectiveness_multiplier(pair.get('attackType'), parse_defender_types(pair))
+            for pair in pairs
+        ]
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return json_response({'success': True, 'effectiveness': effectiveness})
 
 
 @app.route('/api/battle/health', methods=['GET'])
 def battle_health():
-    try:
-        response = requests.get(f'{BATTLE_CALC_URL}/api/health', timeout=5)
-        return jsonify(response.json()), response.status_code
-    except requests.exceptions.RequestException as e:
-        return jsonify({'success': False, 'error': f'Battle calculator unavailable: {str(e)}'}), 503
+    return proxy_battle_calc('GET', '/api/health')
 
 
-POKEMON_BASE_STATS = {
-    25: {'name': 'Pikachu', 'types': ['Electric'], 'hp': 35, 'attack': 55, 'defense': 40, 'spAttack': 50, 'spDefense': 50, 'speed': 90, 'catchRate': 190},
-    7: {'name': 'Squirtle', 'types': ['Water'], 'hp': 44, 'attack': 48, 'defense': 65, 'spAttack': 50, 'spDefense': 64, 'speed': 43, 'catchRate': 45},
-    1: {'name': 'Bulbasaur', 'types': ['Grass', 'Poison'], 'hp': 45, 'attack': 49, 'defense': 49, 'spAttack': 65, 'spDefense': 65, 'speed': 45, 'catchRate': 45},
-    27: {'name': 'Sandshrew', 'types': ['Ground'], 'hp': 50, 'attack': 75, 'defense': 85, 'spAttack': 20, 'spDefense': 30, 'speed': 40, 'catchRate': 255},
-    135: {'name': 'Jolteon', 'types': ['Electric'], 'hp': 65, 'attack': 65, 'defense': 60, 'spAttack': 110, 'spDefense': 95, 'speed': 130, 'catchRate': 45},
-    143: {'name': 'Snorlax', 'types': ['Normal'], 'hp': 160, 'attack': 110, 'defense': 65, 'spAttack': 65, 'spDefense': 110, 'speed': 30, 'catchRate': 25},
-}
+@app.route('/api/battle/proxy-metrics', methods=['GET'])
+def battle_proxy_metrics():
+    return jsonify({
+        'success': True,
+        'mode': get_battle_calc_mode(),
+        'metrics': battle_calc.metrics(),
+        'cache': battle_calc_cache.stats(),
+        'statCache': stat_table_cache.stats(),
+        'derivedStatsCache': derived_stats_cache.stats(),
+        'shadow': shadow_comparator.stats()
+    })
+
+
+@app.route('/api/battle/cache/invalidate', methods=['POST'])
+def invalidate_battle_calc_cache():
+    data = request.get_json(silent=True) or {}
+    route = data.get('route')
+    removed = battle_calc_cache.invalidate(f'{route}:' if route else None)
+    return jsonify({'success': True, 'removed': removed, 'cache': battle_calc_cache.stats()})
+
+
+# ============================================
+# SPECIES TABLE
+# ============================================
+# All 151 species, parsed once at startup from src/shared/data/pokemon-database.js (the
+# data the client already ships) into flat arrays indexed by National Dex number: six
+# base stats per species in STAT_ORDER, types as a bitmask over TYPE_NAMES plus the
+# primary type (a mask alone loses the type order), and catch rates.
+SPECIES_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'shared', 'data', 'pokemon-database.js')
+TYPE_NAMES = (
+    'Normal', 'Fire', 'Water', 'Electric', 'Grass', 'Ice', 'Fighting', 'Poison', 'Ground',
+    'Flying', 'Psychic', 'Bug', 'Rock', 'Ghost', 'Dragon', 'Dark', 'Steel', 'Fairy'
+)
+TYPE_IDS = {name: index for index, name in enumerate(TYPE_NAMES)}
+SPECIES_ENTRY = re.compile(
+    r"\{ id: (\d+), name: (?:'([^']+)'|\"([^\"]+)\"), types: \[([^\]]*)\], "
+    r"baseStats: \{ hp: (\d+), attack: (\d+), defense: (\d+), spAttack: (\d+), spDefense: (\d+), speed: (\d+) \}, "
+    r"catchRate: (\d+)"
+)
+
+class SpeciesTable:
+    """Preallocated per-species arrays with O(1) lookup by National Dex number"""
+
+    def __init__(self, size):
+        self.size = size
+        self.names = [None] * (size + 1)
+        self.base_stats = array('H', bytes(2 * 6 * (size + 1)))
+        self.type_masks = array('L', bytes(array('L').itemsize * (size + 1)))
+        self.primary_types = array('B', bytes(size + 1))
+        self.catch_rates = array('B', bytes(size + 1))
+        self.ids_by_name = {}
+
+    def add(self, pokemon_id, name, types, base_stats, catch_rate):
+        if not 1 <= pokemon_id <= self.size:
+            raise ValueError(f'Species id {pokemon_id} outside 1..{self.size}')
+        self.names[pokemon_id] = name
+        self.base_stats[6 * pokemon_id:6 * pokemon_id + 6] = array('H', base_stats)
+        self.type_masks[pokemon_id] = sum(1 << TYPE_IDS[t] for t in set(types))
+        self.primary_types[pokemon_id] = TYPE_IDS[types[0]]
+        self.catch_rates[pokemon_id] = catch_rate
+        self.ids_by_name[name.lower()] = pokemon_id
+
+    def __contains__(self, pokemon_id):
+        return isinstance(pokemon_id, int) and 1 <= pokemon_id <= self.size and self.names[pokemon_id] is not None
+
+    def __len__(self):
+        return len(self.ids_by_name)
+
+    def check(self, pokemon_id):
+        if pokemon_id not in self:
+            raise ValueError(f'Unknown species: {pokemon_id}')
+
+    def get_base_stats(self, pokemon_id):
+        self.check(pokemon_id)
+        return tuple(self.base_stats[6 * pokemon_id:6 * pokemon_id + 6])
+
+    def get_types(self, pokemon_id):
+        self.check(pokemon_id)
+        primary = self.primary_types[pokemon_id]
+        mask = self.type_masks[pokemon_id] & ~(1 << primary)
+        return [TYPE_NAMES[primary]] + [name for index, name in enumerate(TYPE_NAMES) if mask >> index & 1]
+
+    def get_type_ids(self, pokemon_id):
+        """(primary, secondary) type ids; the primary twice for a single-typed species"""
+        types = self.get_types(pokemon_id)
+        return TYPE_IDS[types[0]], TYPE_IDS[types[-1]]
+
+    def get_species_id(self, name):
+        return self.ids_by_name.get((name or '').lower())
+
+    def to_dict(self, pokemon_id):
+        return {
+            'id': pokemon_id,
+            'name': self.names[pokemon_id],
+            'types': self.get_types(pokemon_id),
+            'baseStats': dict(zip(STAT_ORDER, self.get_base_stats(pokemon_id))),
+            'catchRate': self.catch_rates[pokemon_id]
+        }
+
+
+def load_species_table(path=SPECIES_DATABASE_PATH, size=POKEDEX_SIZE):
+    """Species table from the client's Pokemon database; fails at startup if any species is missing"""
+    table = SpeciesTable(size)
+    with open(path, encoding='utf-8') as f:
+        for match in SPECIES_ENTRY.finditer(f.read()):
+            pokemon_id, name, types = int(match.group(1)), match.group(2) or match.group(3), match.group(4)
+            table.add(
+                pokemon_id, name,
+                [t.strip().strip("'") for t in types.split(',') if t.strip()],
+                [int(value) for value in match.group(5, 6, 7, 8, 9, 10)],
+                int(match.group(11))
+            )
+    missing = [pokemon_id for pokemon_id in range(1, size + 1) if pokemon_id not in table]
+    if missing:
+        raise RuntimeError(f'{path} has no entry for species {missing[:10]}')
+    return table
+
+SPECIES = load_species_table()
+
 
 def calculate_stat(base, iv, ev, level, nature_mod=1.0):
     return int(((2 * base + iv + ev // 4) * level // 100 + 5) * nature_mod)
@@ -1019,30 +2574,352 @@ def get_nature_mod(nature, stat):
         return 0.9
     return 1.0
 
+# Final stats are a pure function of (species, level, IVs, EVs, nature) and the same
+# tuples recur thousands of times per sweep, so they are memoized in a bounded LRU.
+STAT_CACHE_SIZE = int(os.environ.get('STAT_CACHE_SIZE', 4096))
+STAT_ORDER = ('hp', 'attack', 'defense', 'spAttack', 'spDefense', 'speed')
+NATURE_IDS = {nature: index for index, nature in enumerate(NATURES)}
+NATURE_MULTIPLIERS = tuple(tuple(get_nature_mod(nature, stat) for stat in STAT_ORDER) for nature in NATURES)
+
+stat_table_cache = LRUTTLCache(STAT_CACHE_SIZE, None)
+
+def get_final_stats(pokemon_id, level, ivs, evs, nature):
+    """Final stats for a species; missing IVs default to 31, EVs to 0 and unknown natures to Hardy"""
+    SPECIES.check(pokemon_id)
+    iv_values = tuple(31 if ivs.get(stat) is None else ivs[stat] for stat in STAT_ORDER)
+    ev_values = tuple(evs.get(stat) or 0 for stat in STAT_ORDER)
+    nature_id = NATURE_IDS.get(nature, 0)
+    key = (pokemon_id, level, iv_values, ev_values, nature_id)
+
+    stats = stat_table_cache.get(key)
+    if stats is None:
+        base = SPECIES.get_base_stats(pokemon_id)
+        multipliers = NATURE_MULTIPLIERS[nature_id]
+        stats = (calculate_hp(base[0], iv_values[0], ev_values[0], level),) + tuple(
+            calculate_stat(base[i], iv_values[i], ev_values[i], level, multipliers[i])
+            for i in range(1, len(STAT_ORDER))
+        )
+        stat_table_cache.set(key, stats)
+    return dict(zip(STAT_ORDER, stats))
+
+# Held items that scale the displayed stats, as src/shared/utils/stats.js applies them
+ITEM_STAT_BONUSES = {
+    'choice-band': {'attack': 1.5},
+    'choice-specs': {'spAttack': 1.5},
+    'choice-scarf': {'speed': 1.5},
+    'assault-vest': {'spDefense': 1.5},
+    'eviolite': {'defense': 1.5, 'spDefense': 1.5}
+}
+
+# The stats shown for a stored Pokemon or the companion, cached on every input they
+# depend on. Any change through update_pokemon, equip or update_companion changes the
+# key, so an edited Pokemon is never served stale stats, in this worker or any other.
+DERIVED_STATS_CACHE_SIZE = int(os.environ.get('DERIVED_STATS_CACHE_SIZE', 4096))
+derived_stats_cache = LRUTTLCache(DERIVED_STATS_CACHE_SIZE, None)
+
+def get_derived_stats(pokemon_id, level, nature, item_id, evs, ivs):
+    """Final stats with held-item bonuses from EV/IV tuples in STAT_ORDER; None for an unknown species"""
+    if pokemon_id not in SPECIES:
+        return None
+    key = (pokemon_id, level, nature, item_id, tuple(evs), tuple(ivs))
+    stats = derived_stats_cache.get(key)
+    if stats is None:
+        stats = get_final_stats(pokemon_id, level or 1, dict(zip(STAT_ORDER, ivs)), dict(zip(STAT_ORDER, evs)), nature)
+        for stat, bonus in ITEM_STAT_BONUSES.get(item_id, {}).items():
+            stats[stat] = int(stats[stat] * bonus)
+        derived_stats_cache.set(key, stats)
+    return stats
+
 def create_pokemon_for_test(pokemon_id, level, evs, ivs, nature):
-    base = POKEMON_BASE_STATS.get(pokemon_id, POKEMON_BASE_STATS[25])
-    stats = {
-        'hp': calculate_hp(base['hp'], ivs['hp'], evs['hp'], level),
-        'attack': calculate_stat(base['attack'], ivs['attack'], evs['attack'], level, get_nature_mod(nature, 'attack')),
-        'defense': calculate_stat(base['defense'], ivs['defense'], evs['defense'], level, get_nature_mod(nature, 'defense')),
-        'spAttack': calculate_stat(base['spAttack'], ivs['spAttack'], evs['spAttack'], level, get_nature_mod(nature, 'spAttack')),
-        'spDefense': calculate_stat(base['spDefense'], ivs['spDefense'], evs['spDefense'], level, get_nature_mod(nature, 'spDefense')),
-        'speed': calculate_stat(base['speed'], ivs['speed'], evs['speed'], level, get_nature_mod(nature, 'speed'))
-    }
+    species = SPECIES.to_dict(pokemon_id)
+    stats = get_final_stats(pokemon_id, level, ivs, evs, nature)
     return {
         'id': pokemon_id,
-        'name': base['name'],
-        'types': base['types'],
+        'name': species['name'],
+        'types': species['types'],
         'level': level,
         'evs': evs,
         'ivs': ivs,
         'nature': nature,
         'stats': stats,
-        'baseStats': {'hp': base['hp'], 'attack': base['attack'], 'defense': base['defense'], 
-                      'spAttack': base['spAttack'], 'spDefense': base['spDefense'], 'speed': base['speed']},
-        'catchRate': base['catchRate']
+        'baseStats': species['baseStats'],
+        'catchRate': species['catchRate']
+    }
+
+# ============================================
+# NATIVE DAMAGE ENGINE (mirrors @smogon/calc Gen 5+ formula)
+# ============================================
+
+STAT_SHORT_NAMES = {'hp': 'hp', 'attack': 'atk', 'defense': 'def', 'spAttack': 'spa', 'spDefense': 'spd', 'speed': 'spe'}
+
+MOVE_DATA = {
+    'tackle': {'name': 'Tackle', 'type': 'Normal', 'power': 40, 'category': 'Physical'},
+    'scratch': {'name': 'Scratch', 'type': 'Normal', 'power': 40, 'category': 'Physical'},
+    'quick-attack': {'name': 'Quick Attack', 'type': 'Normal', 'power': 40, 'category': 'Physical'},
+    'body-slam': {'name': 'Body Slam', 'type': 'Normal', 'power': 85, 'category': 'Physical'},
+    'slam': {'name': 'Slam', 'type': 'Normal', 'power': 80, 'category': 'Physical'},
+    'swift': {'name': 'Swift', 'type': 'Normal', 'power': 60, 'category': 'Special'},
+    'hyper-beam': {'name': 'Hyper Beam', 'type': 'Normal', 'power': 150, 'category': 'Special'},
+    'ember': {'name': 'Ember', 'type': 'Fire', 'power': 40, 'category': 'Special'},
+    'fire-spin': {'name': 'Fire Spin', 'type': 'Fire', 'power': 35, 'category': 'Special'},
+    'flame-wheel': {'name': 'Flame Wheel', 'type': 'Fire', 'power': 60, 'category': 'Physical'},
+    'flamethrower': {'name': 'Flamethrower', 'type': 'Fire', 'power': 90, 'category': 'Special'},
+    'fire-blast': {'name': 'Fire Blast', 'type': 'Fire', 'power': 110, 'category': 'Special'},
+    'water-gun': {'name': 'Water Gun', 'type': 'Water', 'power': 40, 'category': 'Special'},
+    'bubble-beam': {'name': 'Bubble Beam', 'type': 'Water', 'power': 65, 'category': 'Special'},
+    'surf': {'name': 'Surf', 'type': 'Water', 'power': 90, 'category': 'Special'},
+    'hydro-pump': {'name': 'Hydro Pump', 'type': 'Water', 'power': 110, 'category': 'Special'},
+    'thunder-shock': {'name': 'Thunder Shock', 'type': 'Electric', 'power': 40, 'category': 'Special'},
+    'spark': {'name': 'Spark', 'type': 'Electric', 'power': 65, 'category': 'Physical'},
+    'thunderbolt': {'name': 'Thunderbolt', 'type': 'Electric', 'power': 90, 'category': 'Special'},
+    'thunder': {'name': 'Thunder', 'type': 'Electric', 'power': 110, 'category': 'Special'},
+    'thunder-wave': {'name': 'Thunder Wave', 'type': 'Electric', 'power': 0, 'category': 'Status'},
+    'vine-whip': {'name': 'Vine Whip', 'type': 'Grass', 'power': 45, 'category': 'Physical'},
+    'razor-leaf': {'name': 'Razor Leaf', 'type': 'Grass', 'power': 55, 'category': 'Physical'},
+    'magical-leaf': {'name': 'Magical Leaf', 'type': 'Grass', 'power': 60, 'category': 'Special'},
+    'solar-beam': {'name': 'Solar Beam', 'type': 'Grass', 'power': 120, 'category': 'Special'},
+    'leech-seed': {'name': 'Leech Seed', 'type': 'Grass', 'power': 0, 'category': 'Status'},
+    'confusion': {'name': 'Confusion', 'type': 'Psychic', 'power': 50, 'category': 'Special'},
+    'psybeam': {'name': 'Psybeam', 'type': 'Psychic', 'power': 65, 'category': 'Special'},
+    'psychic': {'name': 'Psychic', 'type': 'Psychic', 'power': 90, 'category': 'Special'},
+    'psyshock': {'name': 'Psyshock', 'type': 'Psychic', 'power': 80, 'category': 'Special', 'targetsDefense': True},
+    'hypnosis': {'name': 'Hypnosis', 'type': 'Psychic', 'power': 0, 'category': 'Status'},
+    'karate-chop': {'name': 'Karate Chop', 'type': 'Fighting', 'power': 50, 'category': 'Physical'},
+    'low-kick': {'name': 'Low Kick', 'type': 'Fighting', 'power': 50, 'category': 'Physical'},
+    'cross-chop': {'name': 'Cross Chop', 'type': 'Fighting', 'power': 100, 'category': 'Physical'},
+    'close-combat': {'name': 'Close Combat', 'type': 'Fighting', 'power': 120, 'category': 'Physical'},
+    'rock-throw': {'name': 'Rock Throw', 'type': 'Rock', 'power': 50, 'category': 'Physical'},
+    'rock-slide': {'name': 'Rock Slide', 'type': 'Rock', 'power': 75, 'category': 'Physical'},
+    'stone-edge': {'name': 'Stone Edge', 'type': 'Rock', 'power': 100, 'category': 'Physical'},
+    'power-gem': {'name': 'Power Gem', 'type': 'Rock', 'power': 80, 'category': 'Special'},
+    'mud-slap': {'name': 'Mud-Slap', 'type': 'Ground', 'power': 20, 'category': 'Special'},
+    'dig': {'name': 'Dig', 'type': 'Ground', 'power': 80, 'category': 'Physical'},
+    'earthquake': {'name': 'Earthquake', 'type': 'Ground', 'power': 100, 'category': 'Physical'},
+    'earth-power': {'name': 'Earth Power', 'type': 'Ground', 'power': 90, 'category': 'Special'},
+    'gust': {'name': 'Gust', 'type': 'Flying', 'power': 40, 'category': 'Special'},
+    'peck': {'name': 'Peck', 'type': 'Flying', 'power': 35, 'category': 'Physical'},
+    'wing-attack': {'name': 'Wing Attack', 'type': 'Flying', 'power': 60, 'category': 'Physical'},
+    'aerial-ace': {'name': 'Aerial Ace', 'type': 'Flying', 'power': 60, 'category': 'Physical'},
+    'air-slash': {'name': 'Air Slash', 'type': 'Flying', 'power': 75, 'category': 'Special'},
+    'poison-sting': {'name': 'Poison Sting', 'type': 'Poison', 'power': 15, 'category': 'Physical'},
+    'acid': {'name': 'Acid', 'type': 'Poison', 'power': 40, 'category': 'Special'},
+    'sludge': {'name': 'Sludge', 'type': 'Poison', 'power': 65, 'category': 'Special'},
+    'sludge-bomb': {'name': 'Sludge Bomb', 'type': 'Poison', 'power': 90, 'category': 'Special'},
+    'bug-bite': {'name': 'Bug Bite', 'type': 'Bug', 'power': 60, 'category': 'Physical'},
+    'x-scissor': {'name': 'X-Scissor', 'type': 'Bug', 'power': 80, 'category': 'Physical'},
+    'signal-beam': {'name': 'Signal Beam', 'type': 'Bug', 'power': 75, 'category': 'Special'},
+    'bug-buzz': {'name': 'Bug Buzz', 'type': 'Bug', 'power': 90, 'category': 'Special'},
+    'lick': {'name': 'Lick', 'type': 'Ghost', 'power': 30, 'category': 'Physical'},
+    'shadow-punch': {'name': 'Shadow Punch', 'type': 'Ghost', 'power': 60, 'category': 'Physical'},
+    'shadow-ball': {'name': 'Shadow Ball', 'type': 'Ghost', 'power': 80, 'category': 'Special'},
+    'hex': {'name': 'Hex', 'type': 'Ghost', 'power': 65, 'category': 'Special'},
+    'night-shade': {'name': 'Night Shade', 'type': 'Ghost', 'power': 0, 'category': 'Special', 'fixedDamage': 'level'},
+    'powder-snow': {'name': 'Powder Snow', 'type': 'Ice', 'power': 40, 'category': 'Special'},
+    'ice-shard': {'name': 'Ice Shard', 'type': 'Ice', 'power': 40, 'category': 'Physical'},
+    'ice-beam': {'name': 'Ice Beam', 'type': 'Ice', 'power': 90, 'category': 'Special'},
+    'blizzard': {'name': 'Blizzard', 'type': 'Ice', 'power': 110, 'category': 'Special'},
+    'dragon-rage': {'name': 'Dragon Rage', 'type': 'Dragon', 'power': 0, 'category': 'Special', 'fixedDamage': 40},
+    'dragon-claw': {'name': 'Dragon Claw', 'type': 'Dragon', 'power': 80, 'category': 'Physical'},
+    'dragon-pulse': {'name': 'Dragon Pulse', 'type': 'Dragon', 'power': 85, 'category': 'Special'},
+    'outrage': {'name': 'Outrage', 'type': 'Dragon', 'power': 120, 'category': 'Physical'},
+    'bite': {'name': 'Bite', 'type': 'Dark', 'power': 60, 'category': 'Physical'},
+    'crunch': {'name': 'Crunch', 'type': 'Dark', 'power': 80, 'category': 'Physical'},
+    'dark-pulse': {'name': 'Dark Pulse', 'type': 'Dark', 'power': 80, 'category': 'Special'},
+    'night-slash': {'name': 'Night Slash', 'type': 'Dark', 'power': 70, 'category': 'Physical'},
+    'metal-claw': {'name': 'Metal Claw', 'type': 'Steel', 'power': 50, 'category': 'Physical'},
+    'iron-head': {'name': 'Iron Head', 'type': 'Steel', 'power': 80, 'category': 'Physical'},
+    'flash-cannon': {'name': 'Flash Cannon', 'type': 'Steel', 'power': 80, 'category': 'Special'},
+    'meteor-mash': {'name': 'Meteor Mash', 'type': 'Steel', 'power': 90, 'category': 'Physical'},
+    'fairy-wind': {'name': 'Fairy Wind', 'type': 'Fairy', 'power': 40, 'category': 'Special'},
+    'draining-kiss': {'name': 'Draining Kiss', 'type': 'Fairy', 'power': 50, 'category': 'Special'},
+    'dazzling-gleam': {'name': 'Dazzling Gleam', 'type': 'Fairy', 'power': 80, 'category': 'Special'},
+    'moonblast': {'name': 'Moonblast', 'type': 'Fairy', 'power': 95, 'category': 'Special'}
+}
+
+# Held-item stat and damage modifiers, in the 4096-based fixed point @smogon/calc uses.
+# Items are keyed by slug ('Mystic Water' -> 'mystic-water') rather than POKEMON_ITEMS id,
+# since battle-calc payloads may name any item @smogon/calc knows.
+ITEM_STAT_MODIFIERS = {
+    'choice-band': {'attack': 6144},
+    'choice-specs': {'spAttack': 6144},
+    'assault-vest': {'spDefense': 6144},
+    'light-ball': {'attack': 8192, 'spAttack': 8192}
+}
+# Stat modifiers that only apply to one holder species
+ITEM_HOLDER_SPECIES = {
+    'light-ball': 'Pikachu'
+}
+ITEM_FINAL_MODIFIERS = {
+    'life-orb': 5324
+}
+# Base power x4915/4096 for moves of the item's type
+ITEM_TYPE_BOOSTS = {
+    'silk-scarf': 'Normal', 'charcoal': 'Fire', 'mystic-water': 'Water', 'magnet': 'Electric',
+    'miracle-seed': 'Grass', 'never-melt-ice': 'Ice', 'black-belt': 'Fighting', 'poison-barb': 'Poison',
+    'soft-sand': 'Ground', 'sharp-beak': 'Flying', 'twisted-spoon': 'Psychic', 'silver-powder': 'Bug',
+    'hard-stone': 'Rock', 'spell-tag': 'Ghost', 'dragon-fang': 'Dragon', 'black-glasses': 'Dark',
+    'metal-coat': 'Steel', 'fairy-feather': 'Fairy'
+}
+ITEM_TYPE_BOOST_MODIFIER = 4915
+# Items @smogon/calc holds without changing the damage numbers
+DAMAGE_NEUTRAL_ITEMS = frozenset({
+    'poke-ball', 'great-ball', 'ultra-ball', 'master-ball', 'leftovers', 'choice-scarf', 'focus-sash',
+    'rocky-helmet', 'black-sludge', 'sitrus-berry', 'lum-berry', 'oran-berry', 'exp-share', 'lucky-egg',
+    'soothe-bell', 'macho-brace', 'power-bracer', 'power-belt', 'power-lens', 'power-band', 'power-anklet',
+    'power-weight', 'everstone', 'dragon-scale'
+})
+NATIVE_DAMAGE_ITEMS = DAMAGE_NEUTRAL_ITEMS | set(ITEM_STAT_MODIFIERS) | set(ITEM_FINAL_MODIFIERS) | set(ITEM_TYPE_BOOSTS)
+
+def item_slug(item):
+    return re.sub(r'[^a-z0-9]+', '-', item.lower()).strip('-') if isinstance(item, str) and item else None
+
+def native_knows_species(data):
+    name = (data or {}).get('name')
+    return not name or SPECIES.get_species_id(name) is not None
+
+def native_knows_item(data):
+    item = item_slug((data or {}).get('item'))
+    return not item or item in NATIVE_DAMAGE_ITEMS
+
+def native_supports(route, payload):
+    """False when the native engine would have to guess (battle-calc must answer): unknown
+    species or moves, and held items it does not model. Missing names keep battle-calc's defaults.
+    """
+    payload = payload or {}
+    if route != '/api/calculate-damage':
+        return native_knows_species(payload)
+    move = payload.get('move')
+    move_name = move.get('name') if isinstance(move, dict) else move
+    if move_name and normalize_move_name(move_name) not in MOVE_DATA:
+        return False
+    sides = [payload.get('attacker'), payload.get('defender')]
+    return all(native_knows_species(side) and native_knows_item(side) for side in sides)
+
+def get_item_stat_modifier(pokemon, stat):
+    holder = ITEM_HOLDER_SPECIES.get(pokemon['item'])
+    if holder and holder != pokemon['name']:
+        return None
+    return ITEM_STAT_MODIFIERS.get(pokemon['item'], {}).get(stat)
+
+def poke_round(value):
+    return int(value) + 1 if value % 1 > 0.5 else int(value)
+
+def apply_modifier(value, modifier):
+    return poke_round(value * modifier / 4096)
+
+def get_species_by_name(name):
+    # a missing name is Pikachu in battle-calc too; unknown names never reach here (native_supports)
+    pokemon_id = SPECIES.get_species_id(name) or 25
+    return pokemon_id, SPECIES.to_dict(pokemon_id)
+
+def build_native_pokemon(data):
+    """Species, final stats and item for a battle-calc payload, filling the same defaults as battle-calc"""
+    data = data or {}
+    evs = data.get('evs') or {}
+    ivs = data.get('ivs') or {}
+    level = data.get('level') or 50
+    nature = data.get('nature') if data.get('nature') in NATURE_MODIFIERS else 'Hardy'
+    pokemon_id, species = get_species_by_name(data.get('name'))
+
+    stats = get_final_stats(pokemon_id, level, ivs, evs, nature)
+
+    return {
+        'id': pokemon_id,
+        'name': species['name'],
+        'types': species['types'],
+        'level': level,
+        'stats': stats,
+        'item': item_slug(data.get('item'))
+    }
+
+def get_native_move(move):
+    move_name = move.get('name') if isinstance(move, dict) else move
+    return MOVE_DATA.get(normalize_move_name(move_name), MOVE_DATA['tackle'])
+
+def native_damage_rolls(attacker, defender, move):
+    """The 16 damage rolls (85%..100%) battle-calc would return for this matchup"""
+    if move['category'] == 'Status':
+        return [0]
+
+    effectiveness = get_type_effectiveness_multiplier(move['type'], defender['types'])
+    if effectiveness == 0:
+        return [0]
+
+    fixed = move.get('fixedDamage')
+    if fixed is not None:
+        return [attacker['level'] if fixed == 'level' else fixed]
+
+    is_physical = move['category'] == 'Physical'
+    attack_stat = 'attack' if is_physical else 'spAttack'
+    defense_stat = 'defense' if is_physical or move.get('targetsDefense') else 'spDefense'
+
+    power = move['power']
+    if ITEM_TYPE_BOOSTS.get(attacker['item']) == move['type']:
+        power = max(1, apply_modifier(power, ITEM_TYPE_BOOST_MODIFIER))
+
+    attack = attacker['stats'][attack_stat]
+    attack_mod = get_item_stat_modifier(attacker, attack_stat)
+    if attack_mod:
+        attack = apply_modifier(attack, attack_mod)
+
+    defense = defender['stats'][defense_stat]
+    defense_mod = get_item_stat_modifier(defender, defense_stat)
+    if defense_mod:
+        defense = apply_modifier(defense, defense_mod)
+    defense = max(1, defense)
+
+    base_damage = ((2 * attacker['level']) // 5 + 2) * power * attack // defense // 50 + 2
+    stab = move['type'] in attacker['types']
+    final_mod = ITEM_FINAL_MODIFIERS.get(attacker['item'])
+
+    rolls = []
+    for roll in range(85, 101):
+        damage = base_damage * roll // 100
+        if stab:
+            damage = apply_modifier(damage, 6144)
+        damage = int(damage * effectiveness)
+        if final_mod:
+            damage = apply_modifier(max(1, damage), final_mod)
+        rolls.append(max(1, damage))
+    return rolls
+
+def to_short_stats(stats):
+    return {STAT_SHORT_NAMES[stat]: value for stat, value in stats.items()}
+
+def native_calculate_damage(payload):
+    attacker = build_native_pokemon(payload.get('attacker'))
+    defender = build_native_pokemon(payload.get('defender'))
+    move = get_native_move(payload.get('move') or 'Tackle')
+
+    rolls = native_damage_rolls(attacker, defender, move)
+    min_damage, max_damage = rolls[0], rolls[-1]
+    avg_damage = (min_damage + max_damage) // 2
+
+    return {
+        'success': True,
+        'damage': max(1, int(avg_damage * (0.85 + random.random() * 0.15))),
+        'minDamage': min_damage,
+        'maxDamage': max_damage,
+        'avgDamage': avg_damage,
+        'attackerStats': to_short_stats(attacker['stats']),
+        'defenderStats': to_short_stats(defender['stats']),
+        'movePower': move['power'],
+        'moveType': move['type']
+    }
+
+def native_calculate_stats(payload):
+    pokemon = build_native_pokemon(payload)
+    return {
+        'success': True,
+        'stats': pokemon['stats'],
+        'rawStats': to_short_stats(pokemon['stats'])
     }
 
+NATIVE_BATTLE_CALC = {
+    '/api/calculate-damage': native_calculate_damage,
+    '/api/calculate-stats': native_calculate_stats
+}
+
 TEST_BATTLE_CONFIGS = {
     'ev_comparison': {
         'description': 'EV Comparison - Pikachu with 252 Atk/Spe EVs vs No EVs',
@@ -1235,7 +3112,11 @@ def start_test_battle():
 
 DEFAULT_ABILITY = 'Static'
 
-def simulate_battle(companion, enemy):
+def apply_type_effectiveness(damage, multiplier):
+    """Hit damage after the type multiplier: nothing against an immune target, otherwise at least 1"""
+    return max(1, int(damage * multiplier)) if multiplier else 0
+
+def simulate_battle(companion, enemy, rng=random):
     """Simulate a full battle between companion and enemy, return winner info."""
     companion_hp = companion['stats']['hp']
     enemy_hp = enemy['stats']['hp']
@@ -1247,6 +3128,8 @@ def simulate_battle(companion, enemy):
     enemy_atk = max(enemy['stats']['attack'], enemy['stats']['spAttack'])
     companion_def = (companion['stats']['defense'] + companion['stats']['spDefense']) // 2
     enemy_def = (enemy['stats']['defense'] + enemy['stats']['spDefense']) // 2
+    companion_effectiveness = get_species_matchup(companion['id'], enemy['id'])
+    enemy_effectiveness = get_species_matchup(enemy['id'], companion['id'])
     
     turn = 0
     max_turns = 100
@@ -1260,18 +3143,18 @@ def simulate_battle(companion, enemy):
             first_attacker = 'enemy'
         
         if first_attacker == 'companion':
-            damage = max(1, (companion_atk * companion['level'] // 50) - (enemy_def // 4) + random.randint(1, 10))
+            damage = apply_type_effectiveness(max(1, (companion_atk * companion['level'] // 50) - (enemy_def // 4) + rng.randint(1, 10)), companion_effectiveness)
             enemy_hp -= damage
             if enemy_hp <= 0:
                 break
-            damage = max(1, (enemy_atk * enemy['level'] // 50) - (companion_def // 4) + random.randint(1, 10))
+            damage = apply_type_effectiveness(max(1, (enemy_atk * enemy['level'] // 50) - (companion_def // 4) + rng.randint(1, 10)), enemy_effectiveness)
             companion_hp -= damage
         else:
-            damage = max(1, (enemy_atk * enemy['level'] // 50) - (companion_def // 4) + random.randint(1, 10))
+            damage = apply_type_effectiveness(max(1, (enemy_atk * enemy['level'] // 50) - (companion_def // 4) + rng.randint(1, 10)), enemy_effectiveness)
             companion_hp -= damage
             if companion_hp <= 0:
                 break
-            damage = max(1, (companion_atk * companion['level'] // 50) - (enemy_def // 4) + random.randint(1, 10))
+            damage = apply_type_effectiveness(max(1, (companion_atk * companion['level'] // 50) - (enemy_def // 4) + rng.randint(1, 10)), companion_effectiveness)
             enemy_hp -= damage
     
     if companion_hp > 0 and enemy_hp <= 0:
@@ -1298,7 +3181,7 @@ def simulate_battle(companion, enemy):
         'enemyHpRemaining': max(0, enemy_hp)
     }
 
-def run_single_battle_simulation(test_type, ability):
+def run_single_battle_simulation(test_type, ability, rng=random):
     config = TEST_BATTLE_CONFIGS[test_type]
     
     companion_cfg = config['companion']
@@ -1321,7 +3204,7 @@ def run_single_battle_simulation(test_type, ability):
     )
     enemy['ability'] = ability
     
-    battle_result = simulate_battle(companion, enemy)
+    battle_result = simulate_battle(companion, enemy, rng)
     
     return {
         'testType': test_type,
@@ -1334,59 +3217,476 @@ def run_single_battle_simulation(test_type, ability):
     }
 
 
+MAX_VECTORIZED_ITERATIONS = 1_000_000
+VECTORIZED_CHUNK_ELEMENTS = 4_000_000
+
+def get_test_combatants(test_type, ability):
+    config = TEST_BATTLE_CONFIGS[test_type]
+    combatants = []
+    for side in ('companion', 'enemy'):
+        cfg = config[side]
+        pokemon = create_pokemon_for_test(cfg['pokemon_id'], cfg['level'], cfg['evs'], cfg['ivs'], cfg['nature'])
+        pokemon['ability'] = ability
+        combatants.append(pokemon)
+    return combatants
+
+def get_simulation_profile(pokemon, opponent):
+    """Fixed per-hit damage base, type multiplier and HP used by simulate_battle, computed once per matchup"""
+    attack = max(pokemon['stats']['attack'], pokemon['stats']['spAttack'])
+    opponent_defense = (opponent['stats']['defense'] + opponent['stats']['spDefense']) // 2
+    return {
+        'hp': pokemon['stats']['hp'],
+        'speed': pokemon['stats']['speed'],
+        'damageBase': (attack * pokemon['level'] // 50) - (opponent_defense // 4),
+        'effectiveness': get_species_matchup(pokemon['id'], opponent['id'])
+    }
+
+def hits_to_faint(damage_base, effectiveness, target_hp, battles, max_hits, rng):
+    """Hit number on which each battle's target faints (max_hits + 1 if it survives) and total damage rolled.
+
+    Only as many rolls are drawn as the weakest possible hits would need to faint the target,
+    so the total is exact whenever the target can survive max_hits hits.
+    """
+    if not effectiveness:
+        return np.full(battles, max_hits + 1), np.zeros(battles, dtype=np.int64)
+    weakest_hit = apply_type_effectiveness(max(1, damage_base + 1), effectiveness)
+    needed = min(max_hits, -(-target_hp // weakest_hit))
+    rolls = np.maximum(1, damage_base + rng.integers(1, 11, size=(battles, needed), dtype=np.int32))
+    if effectiveness != 1:
+        rolls = np.maximum(1, (rolls * effectiveness).astype(np.int32))
+    dealt = np.cumsum(rolls, axis=1, dtype=np.int64)
+    fainted = dealt >= target_hp
+    hit = np.where(fainted.any(axis=1), fainted.argmax(axis=1) + 1, max_hits + 1)
+    return hit, dealt[:, -1]
+
+def simulate_battles_vectorized(companion, enemy, battles, rng, max_turns=100):
+    """Array form of simulate_battle: returns (winner codes, turns) for `battles` independent runs.
+
+    Winner codes are 1 = companion, -1 = enemy, 0 = tie.
+    """
+    companion_profile = get_simulation_profile(companion, enemy)
+    enemy_profile = get_simulation_profile(enemy, companion)
+    companion_first = companion_profile['speed'] >= enemy_profile['speed']
+
+    chunk = max(1, VECTORIZED_CHUNK_ELEMENTS // max_turns)
+
+    winners = np.empty(battles, dtype=np.int8)
+    turns = np.empty(battles, dtype=np.int16)
+    for start in range(0, battles, chunk):
+        size = min(chunk, battles - start)
+        companion_kill, companion_dealt = hits_to_faint(companion_profile['damageBase'], companion_profile['effectiveness'], enemy_profile['hp'], size, max_turns, rng)
+        enemy_kill, enemy_dealt = hits_to_faint(enemy_profile['damageBase'], enemy_profile['effectiveness'], companion_profile['hp'], size, max_turns, rng)
+
+        companion_wins = companion_kill <= enemy_kill if companion_first else companion_kill < enemy_kill
+        timeout = (companion_kill > max_turns) & (enemy_kill > max_turns)
+
+        companion_left = companion_profile['hp'] - enemy_dealt
+        enemy_left = enemy_profile['hp'] - companion_dealt
+        timeout_winner = np.sign(companion_left - enemy_left).astype(np.int8)
+
+        winner = np.where(companion_wins, 1, -1).astype(np.int8)
+        winners[start:start + size] = np.where(timeout, timeout_winner, winner)
+        turns[start:start + size] = np.where(timeout, max_turns, np.minimum(companion_kill, enemy_kill))
+    return winners, turns
+
+def wilson_interval(successes, trials, z=1.96):
+    if trials == 0:
+        return [0.0, 0.0]
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * ((p * (1 - p) / trials + z * z / (4 * trials * trials)) ** 0.5) / denominator
+    return [round(max(0.0, centre - margin), 6), round(min(1.0, centre + margin), 6)]
+
+def run_vectorized_simulation(test_type, ability, battles, rng):
+    companion, enemy = get_test_combatants(test_type, ability)
+    winners, turns = simulate_battles_vectorized(companion, enemy, battles, rng)
+
+    companion_wins = int(np.count_nonzero(winners == 1))
+    enemy_wins = int(np.count_nonzero(winners == -1))
+    histogram = np.bincount(turns)
+    return {
+        'testType': test_type,
+        'description': TEST_BATTLE_CONFIGS[test_type]['description'],
+        'battles': battles,
+        'companion': f"{companion['name']} (Lv{companion['level']}, {companion['nature']})",
+        'enemy': f"{enemy['name']} (Lv{enemy['level']}, {enemy['nature']})",
+        'companionWins': companion_wins,
+        'enemyWins': enemy_wins,
+        'ties': battles - companion_wins - enemy_wins,
+        'companionWinRate': round(companion_wins / battles, 6),
+        'companionWinRateCI95': wilson_interval(companion_wins, battles),
+        'meanTurns': round(float(turns.mean()), 3),
+        'turnHistogram': {str(turn): int(count) for turn, count in enumerate(histogram) if count}
+    }
+
+TEST_RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'static', 'test_results')
+
+def new_results_filename(suffix=None, extension='json'):
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    filename = f'test_results_{timestamp}_{suffix}.{extension}' if suffix else f'test_results_{timestamp}.{extension}'
+    if os.path.exists(os.path.join(TEST_RESULTS_DIR, filename)):
+        return new_results_filename(f'{suffix}_{uuid.uuid4().hex[:4]}' if suffix else uuid.uuid4().hex[:8], extension)
+    return filename
+
+def save_test_results(results, suffix=None):
+    results_filename = new_results_filename(suffix)
+    os.makedirs(TEST_RESULTS_DIR, exist_ok=True)
+    
+    full_path = os.path.join(TEST_RESULTS_DIR, results_filename)
+    with open(full_path, 'w') as f:
+        json.dump(results, f, separators=(',', ':'))
+    return results_filename
+
+# Battle sweeps are stored as fixed-width binary records instead of JSON:
+#   b'PKBR' | u32 header length | JSON header (params + testTypes table) | 4-byte records
+# Each record is (test type index u8, winner code i8, turns u16), so a 100k-iteration
+# sweep of 17 configs is ~6.8 MB and can be scanned through a memory map.
+BATTLE_RESULTS_MAGIC = b'PKBR'
+BATTLE_RECORD = struct.Struct('<BbH')
+BATTLE_RECORDS_PER_READ = 65536
+WINNER_CODES = {'companion': 1, 'enemy': -1, 'tie': 0}
+WINNER_LABELS = {code: winner for winner, code in WINNER_CODES.items()}
+
+def read_battle_results_header(f):
+    if f.read(4) != BATTLE_RESULTS_MAGIC:
+        raise ValueError('Not a battle results file')
+    (header_length,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(header_length)), 8 + header_length
+
+def iter_battle_records(path):
+    """Yield (testType, winner, turns) for every battle in a binary results file"""
+    with open(path, 'rb') as f:
+        header, offset = read_battle_results_header(f)
+        test_types = header['testTypes']
+        end = offset + (os.fstat(f.fileno()).st_size - offset) // BATTLE_RECORD.size * BATTLE_RECORD.size
+        if end == offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            step = BATTLE_RECORD.size * BATTLE_RECORDS_PER_READ
+            for start in range(offset, end, step):
+                for index, code, turns in BATTLE_RECORD.iter_unpack(data[start:min(start + step, end)]):
+                    yield test_types[index], WINNER_LABELS[code], turns
+
+def index_test_run(filename, mode, params, summary, configs, complete=True, created_at=None):
+    """Record a stored run and its per-config counts in the test_runs index"""
+    seed = params.get('seed')
+    with app.app_context():
+        run = TestRun(
+            filename=filename,
+            mode=mode,
+            ability=params.get('ability'),
+            iterations=params.get('iterations'),
+            workers=params.get('workers'),
+            seed=seed if isinstance(seed, int) else None,
+            complete=complete,
+            size=os.path.getsize(os.path.join(TEST_RESULTS_DIR, filename)),
+            companion_wins=summary['companionWins'],
+            enemy_wins=summary['enemyWins'],
+            ties=summary['ties'],
+            total_battles=summary['totalBattles'],
+            created_at=created_at or datetime.utcnow()
+        )
+        for test_type, counts in configs.items():
+            run.configs.append(TestRunConfig(
+                test_type=test_type,
+                companion_wins=counts['companionWins'],
+                enemy_wins=counts['enemyWins'],
+                ties=counts['ties'],
+                battles=counts['battles'],
+                total_turns=counts['totalTurns']
+            ))
+        db.session.add(run)
+        db.session.commit()
+        return run.results_url
+
+def index_existing_test_results():
+    """Add result files written before the index existed; legacy damage reports are listed without a summary
+
+    Runs at import in every worker, so a file another worker indexed concurrently is skipped.
+    """
+    if not os.path.exists(TEST_RESULTS_DIR):
+        return
+    indexed = {filename for (filename,) in db.session.query(TestRun.filename)}
+    for filename in sorted(os.listdir(TEST_RESULTS_DIR)):
+        if filename in indexed or not filename.endswith(('.json', '.ndjson', '.pkbr')):
+            continue
+        summary = BattleSummary()
+        params = {}
+        mode = 'legacy'
+        path = os.path.join(TEST_RESULTS_DIR, filename)
+        try:
+            if filename.endswith('.pkbr'):
+                with open(path, 'rb') as f:
+                    params = read_battle_results_header(f)[0]
+                mode = 'battles'
+                for test_type, winner, turns in iter_battle_records(path):
+                    summary.add(test_type, winner, turns)
+            elif filename.endswith('.ndjson'):
+                mode = 'battles'
+                with open(path) as f:
+                    for line in f:
+                        record = json.loads(line)
+                        if record['type'] == 'header':
+                            params = record
+                        elif record['type'] == 'battle':
+                            summary.add(record['testType'], record['winner'], record['turns'])
+            else:
+                with open(path) as f:
+                    data = json.load(f)
+                params = data
+                if data.get('mode') == 'vectorized':
+                    mode = 'vectorized'
+                    for c in data['configs']:
+                        summary.configs[c['testType']] = {
+                            'companionWins': c['companionWins'],
+                            'enemyWins': c['enemyWins'],
+                            'ties': c['ties'],
+                            'battles': c['battles'],
+                            'totalTurns': round(c['meanTurns'] * c['battles'])
+                        }
+        except (ValueError, KeyError) as e:
+            app.logger.warning('Skipping unreadable test results file %s: %s', filename, e)
+            continue
+        try:
+            index_test_run(filename, mode, params, summary.to_dict(), summary.configs,
+                           created_at=datetime.fromtimestamp(os.path.getmtime(path)))
+        except IntegrityError:
+            # another worker importing the module indexed this file first
+            db.session.rollback()
+
+
+def record_vectorized_results(iterations, ability, seed, configs, suffix=None):
+    summary = {
+        'companionWins': sum(c['companionWins'] for c in configs),
+        'enemyWins': sum(c['enemyWins'] for c in configs),
+        'ties': sum(c['ties'] for c in configs),
+        'totalBattles': sum(c['battles'] for c in configs)
+    }
+    results_filename = save_test_results({
+        'generatedAt': datetime.utcnow().isoformat(),
+        'mode': 'vectorized',
+        'iterations': iterations,
+        'ability': ability,
+        'seed': seed,
+        'summary': summary,
+        'configs': configs
+    }, suffix)
+    results_url = index_test_run(results_filename, 'vectorized', {'iterations': iterations, 'seed': seed, 'ability': ability}, summary, {
+        c['testType']: {
+            'companionWins': c['companionWins'],
+            'enemyWins': c['enemyWins'],
+            'ties': c['ties'],
+            'battles': c['battles'],
+            'totalTurns': round(c['meanTurns'] * c['battles'])
+        } for c in configs
+    })
+    return results_url, summary
+
+def run_vectorized_tests(iterations, ability, seed):
+    if np is None:
+        return jsonify({'success': False, 'error': 'Vectorized mode requires numpy to be installed'}), 503
+
+    rng = np.random.default_rng(seed)
+    configs = [run_vectorized_simulation(test_type, ability, iterations, rng) for test_type in TEST_BATTLE_CONFIGS]
+    results_url, summary = record_vectorized_results(iterations, ability, seed, configs)
+
+    return jsonify({
+        'success': True,
+        'message': f'Completed {iterations} vectorized battle(s) per test',
+        'resultsFile': results_url,
+        'summary': summary,
+        'configs': configs
+    })
+
+MAX_ITERATIONS_PER_WORKER = 100
+
+def run_simulation_iterations(iteration_indices, ability, seed=None):
+    """Run every test config once per iteration index.
+
+    With a seed, each iteration draws from its own Random(seed:index) stream, so the
+    results do not depend on how iterations are split across worker processes.
+    """
+    results = []
+    for iteration in iteration_indices:
+        rng = random.Random(f'{seed}:{iteration}') if seed is not None else random
+        for test_type in TEST_BATTLE_CONFIGS.keys():
+            results.append(run_single_battle_simulation(test_type, ability, rng))
+    return results
+
+def iter_battle_chunks(iterations, ability, workers, seed):
+    """Yield battle results chunk by chunk in iteration order.
+
+    With several workers, at most two chunks per worker are in flight, so memory stays
+    bounded by the chunk size rather than the sweep size.
+    """
+    chunk = max(1, min(MAX_ITERATIONS_PER_WORKER, iterations // 100))
+    chunks = (range(start, min(start + chunk, iterations)) for start in range(0, iterations, chunk))
+
+    if workers <= 1:
+        for iteration_indices in chunks:
+            yield run_simulation_iterations(iteration_indices, ability, seed)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(run_simulation_iterations, c, ability, seed) for c in islice(chunks, workers * 2))
+        try:
+            while pending:
+                part = pending.popleft().result()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(pool.submit(run_simulation_iterations, next_chunk, ability, seed))
+                yield part
+        finally:
+            for future in pending:
+                future.cancel()
+
+class BattleSummary:
+    """Running per-config win/loss/turn counters for a sweep"""
+
+    def __init__(self):
+        self.configs = {}
+
+    def add(self, test_type, winner, turns):
+        counts = self.configs.get(test_type)
+        if counts is None:
+            counts = self.configs[test_type] = {'companionWins': 0, 'enemyWins': 0, 'ties': 0, 'battles': 0, 'totalTurns': 0}
+        if winner == 'companion':
+            counts['companionWins'] += 1
+        elif winner == 'enemy':
+            counts['enemyWins'] += 1
+        else:
+            counts['ties'] += 1
+        counts['battles'] += 1
+        counts['totalTurns'] += turns
+
+    def to_dict(self):
+        return {
+            'companionWins': sum(c['companionWins'] for c in self.configs.values()),
+            'enemyWins': sum(c['enemyWins'] for c in self.configs.values()),
+            'ties': sum(c['ties'] for c in self.configs.values()),
+            'totalBattles': sum(c['battles'] for c in self.configs.values())
+        }
+
+def ndjson_line(record):
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+class BattleResultsWriter:
+    """Streams a sweep to static/test_results as binary battle records and indexes it on close.
+
+    write() returns the battle as an NDJSON line so callers can stream it onwards.
+    """
+
+    def __init__(self, params, suffix=None):
+        self.filename = new_results_filename(suffix, 'pkbr')
+        self.params = params
+        self.summary = BattleSummary()
+        self.results_url = None
+        test_types = list(TEST_BATTLE_CONFIGS)
+        self._test_type_index = {test_type: index for index, test_type in enumerate(test_types)}
+        header = {'generatedAt': datetime.utcnow().isoformat(), **params, 'testTypes': test_types}
+        encoded = json.dumps(header, separators=(',', ':')).encode()
+        os.makedirs(TEST_RESULTS_DIR, exist_ok=True)
+        self._file = open(os.path.join(TEST_RESULTS_DIR, self.filename), 'wb')
+        self._file.write(BATTLE_RESULTS_MAGIC + struct.pack('<I', len(encoded)) + encoded)
+        self.header_line = ndjson_line({'type': 'header', **header})
+
+    def write(self, result):
+        winner, turns = result['winner'], result['turns']
+        self.summary.add(result['testType'], winner, turns)
+        self._file.write(BATTLE_RECORD.pack(self._test_type_index[result['testType']], WINNER_CODES[winner], turns))
+        return ndjson_line({'type': 'battle', **result})
+
+    def _finish(self, complete):
+        self._file.close()
+        self.results_url = index_test_run(self.filename, 'battles', self.params, self.summary.to_dict(), self.summary.configs, complete)
+
+    def close(self):
+        self._finish(True)
+        return ndjson_line({'type': 'summary', 'completedAt': datetime.utcnow().isoformat(), **self.summary.to_dict()})
+
+    def abort(self):
+        self._finish(False)
+
+MAX_SEED = 2 ** 32 - 1
+
+def parse_int_param(data, key, default, minimum, maximum):
+    """Read an integer request field, raising ValueError unless minimum <= value <= maximum"""
+    value = data.get(key, default)
+    if isinstance(value, bool):
+        raise ValueError(f'{key} must be an integer')
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} must be an integer') from None
+    if not minimum <= value <= maximum:
+        raise ValueError(f'{key} must be between {minimum} and {maximum}')
+    return value
+
+def parse_sweep_params(data, max_iterations=None, default_iterations=1):
+    """Validate sweep parameters from a request body; raises ValueError with a client-facing message"""
+    workers = parse_int_param(data, 'workers', 1, 1, os.cpu_count() or 1)
+    seed = data.get('seed')
+    if seed is not None:
+        seed = parse_int_param(data, 'seed', None, 0, MAX_SEED)
+    elif workers > 1:
+        seed = random.randrange(2 ** 32)
+    if max_iterations is None:
+        max_iterations = MAX_ITERATIONS_PER_WORKER * workers
+    return {
+        'iterations': parse_int_param(data, 'iterations', default_iterations, 1, max_iterations),
+        'workers': workers,
+        'seed': seed,
+        'ability': data.get('ability', DEFAULT_ABILITY)
+    }
+
+def stream_battle_sweep(writer, params, on_chunk=None):
+    """Run a sweep through an open results writer; yields each NDJSON line as it is written"""
+    completed = False
+    try:
+        yield writer.header_line
+        for part in iter_battle_chunks(params['iterations'], params['ability'], params['workers'], params['seed']):
+            for result in part:
+                yield writer.write(result)
+            if on_chunk:
+                on_chunk(len(part))
+        completed = True
+        yield writer.close()
+    finally:
+        if not completed:
+            writer.abort()
+
+def run_battle_sweep(params, suffix=None, on_chunk=None):
+    writer = BattleResultsWriter(params, suffix)
+    for _ in stream_battle_sweep(writer, params, on_chunk):
+        pass
+    return writer.results_url, writer.summary.to_dict()
+
 @app.route('/api/run-all-tests', methods=['POST'])
 def run_all_tests():
+    data = request.get_json(silent=True) or {}
+    vectorized = data.get('mode') == 'vectorized'
     try:
-        data = request.get_json() or {}
-        iterations = min(data.get('iterations', 1), 100)
-        ability = data.get('ability', DEFAULT_ABILITY)
-        
-        all_results = []
-        companion_wins = 0
-        enemy_wins = 0
-        ties = 0
-        
-        for iteration in range(iterations):
-            for test_type in TEST_BATTLE_CONFIGS.keys():
-                result = run_single_battle_simulation(test_type, ability)
-                all_results.append(result)
-                
-                if result['winner'] == 'companion':
-                    companion_wins += 1
-                elif result['winner'] == 'enemy':
-                    enemy_wins += 1
-                else:
-                    ties += 1
-        
-        results_filename = f'test_results_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.json'
-        results_path = os.path.join(os.path.dirname(__file__), 'static', 'test_results')
-        os.makedirs(results_path, exist_ok=True)
+        if vectorized:
+            params = parse_sweep_params(data, MAX_VECTORIZED_ITERATIONS, default_iterations=1000)
+        else:
+            params = parse_sweep_params(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        if vectorized:
+            return run_vectorized_tests(params['iterations'], params['ability'], params['seed'])
         
-        full_path = os.path.join(results_path, results_filename)
-        with open(full_path, 'w') as f:
-            import json
-            json.dump({
-                'generatedAt': datetime.utcnow().isoformat(),
-                'iterations': iterations,
-                'summary': {
-                    'companionWins': companion_wins,
-                    'enemyWins': enemy_wins,
-                    'ties': ties,
-                    'totalBattles': len(all_results)
-                },
-                'battles': all_results
-            }, f, indent=2)
+        results_url, summary = run_battle_sweep(params)
         
         return jsonify({
             'success': True,
-            'message': f'Completed {iterations} iteration(s) of all tests',
-            'resultsFile': f'/static/test_results/{results_filename}',
-            'summary': {
-                'companionWins': companion_wins,
-                'enemyWins': enemy_wins,
-                'ties': ties,
-                'totalBattles': len(all_results)
-            }
+            'message': f"Completed {params['iterations']} iteration(s) of all tests",
+            'resultsFile': results_url,
+            'workers': params['workers'],
+            'seed': params['seed'],
+            'summary': summary
         })
         
     except Exception as e:
@@ -1395,31 +3695,286 @@ def run_all_tests():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/run-all-tests/stream', methods=['POST'])
+def stream_all_tests():
+    """Same sweep as /api/run-all-tests, streamed back as NDJSON with chunked transfer encoding.
+
+    Nothing is held in memory beyond the in-flight chunks, so this accepts job-sized sweeps.
+    """
+    try:
+        params = parse_sweep_params(request.get_json(silent=True) or {}, MAX_JOB_ITERATIONS)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    writer = BattleResultsWriter(params)
+    return Response(stream_battle_sweep(writer, params), mimetype='application/x-ndjson',
+                    headers={'X-Results-Filename': writer.filename})
+
+
+# ============================================
+# BACKGROUND TEST SWEEP JOBS
+# ============================================
+# Jobs live in the memory of the process that accepted them; with several
+# gunicorn workers, poll status through the same worker (or run one worker).
+
+MAX_JOB_ITERATIONS = 100_000
+SIMULATION_JOB_THREADS = int(os.environ.get('SIMULATION_JOB_THREADS', 1))
+SIMULATION_JOB_HISTORY = 100
+
+class JobCancelled(Exception):
+    pass
+
+class SimulationJob:
+    def __init__(self, params, total):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.state = 'queued'
+        self.done = 0
+        self.total = total
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.results_url = None
+        self.summary = None
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def advance(self, battles):
+        self.done += battles
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def eta_seconds(self):
+        if self.state != 'running' or not self.done or not self.started_at:
+            return None
+        elapsed = (datetime.utcnow() - self.started_at).total_seconds()
+        return round(elapsed / self.done * (self.total - self.done), 1)
+
+    def to_dict(self):
+        return {
+            'jobId': self.id,
+            'state': self.state,
+            'params': self.params,
+            'progress': {
+                'done': self.done,
+                'total': self.total,
+                'percent': round(self.done / self.total * 100, 1) if self.total else 100.0
+            },
+            'etaSeconds': self.eta_seconds(),
+            'createdAt': self.created_at.isoformat(),
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+            'resultsFile': self.results_url,
+            'summary': self.summary,
+            'error': self.error
+        }
+
+def run_battle_sweep_job(job):
+    return run_battle_sweep(job.params, suffix=job.id[:8], on_chunk=job.advance)
+
+def run_vectorized_sweep_job(job):
+    params = job.params
+    rng = np.random.default_rng(params['seed'])
+    configs = []
+    for test_type in TEST_BATTLE_CONFIGS:
+        configs.append(run_vectorized_simulation(test_type, params['ability'], params['iterations'], rng))
+        job.advance(params['iterations'])
+    return record_vectorized_results(params['iterations'], params['ability'], params['seed'], configs, suffix=job.id[:8])
+
+class SimulationJobQueue:
+    def __init__(self, threads):
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='simulation-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params):
+        total = params['iterations'] * len(TEST_BATTLE_CONFIGS)
+        job = SimulationJob(params, total)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job and job.state in ('queued', 'running'):
+            job.cancel_event.set()
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished_at = datetime.utcnow()
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state not in ('queued', 'running')]
+        for job_id in finished[:max(0, len(self._jobs) - SIMULATION_JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            return
+        job.state = 'running'
+        job.started_at = datetime.utcnow()
+        try:
+            if job.params['mode'] == 'vectorized':
+                job.results_url, job.summary = run_vectorized_sweep_job(job)
+            else:
+                job.results_url, job.summary = run_battle_sweep_job(job)
+            job.state = 'completed'
+        except JobCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            app.logger.exception('Simulation job %s failed', job.id)
+            job.state = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+
+simulation_jobs = SimulationJobQueue(SIMULATION_JOB_THREADS)
+
+
+@app.route('/api/test-jobs', methods=['POST'])
+def submit_test_job():
+    data = request.get_json(silent=True) or {}
+    mode = 'vectorized' if data.get('mode') == 'vectorized' else 'battles'
+    if mode == 'vectorized' and np is None:
+        return jsonify({'success': False, 'error': 'Vectorized mode requires numpy to be installed'}), 503
+
+    max_iterations = MAX_VECTORIZED_ITERATIONS if mode == 'vectorized' else MAX_JOB_ITERATIONS
+    try:
+        params = parse_sweep_params(data, max_iterations)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    job = simulation_jobs.submit({'mode': mode, **params})
+    return jsonify({'success': True, 'jobId': job.id, 'statusUrl': f'/api/test-jobs/{job.id}', 'job': job.to_dict()}), 202
+
+
+@app.route('/api/test-jobs', methods=['GET'])
+def list_test_jobs():
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in reversed(simulation_jobs.list())]})
+
+
+@app.route('/api/test-jobs/<job_id>', methods=['GET'])
+def get_test_job(job_id):
+    job = simulation_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@app.route('/api/test-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_test_job(job_id):
+    job = simulation_jobs.cancel(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
 @app.route('/api/test-results', methods=['GET'])
 def list_test_results():
     try:
-        results_path = os.path.join(os.path.dirname(__file__), 'static', 'test_results')
-        if not os.path.exists(results_path):
-            return jsonify({'success': True, 'files': []})
-        
-        files = []
-        for filename in os.listdir(results_path):
-            if filename.endswith('.json'):
-                file_path = os.path.join(results_path, filename)
-                files.append({
-                    'filename': filename,
-                    'url': f'/static/test_results/{filename}',
-                    'size': os.path.getsize(file_path),
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                })
-        
-        files.sort(key=lambda x: x['modified'], reverse=True)
-        return jsonify({'success': True, 'files': files})
+        query = TestRun.query
+        if request.args.get('mode'):
+            query = query.filter(TestRun.mode == request.args['mode'])
+        if request.args.get('ability'):
+            query = query.filter(TestRun.ability == request.args['ability'])
+        limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+        runs = query.order_by(TestRun.created_at.desc(), TestRun.id.desc()).limit(limit).all()
+        return jsonify({'success': True, 'files': [run.to_dict() for run in runs]})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/test-results/<int:run_id>/battles', methods=['GET'])
+def get_test_run_battles(run_id):
+    """Decode a binary battle sweep back into NDJSON, optionally filtered by ?testType="""
+    run = db.session.get(TestRun, run_id)
+    if not run or not run.filename.endswith('.pkbr'):
+        return jsonify({'success': False, 'error': 'Battle results not found'}), 404
+    path = os.path.join(TEST_RESULTS_DIR, run.filename)
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'Results file is missing'}), 404
+    test_type = request.args.get('testType')
+    run_info = run.to_dict()
+
+    def generate():
+        yield ndjson_line({'type': 'header', **run_info})
+        for record_type, winner, turns in iter_battle_records(path):
+            if test_type is None or record_type == test_type:
+                yield ndjson_line({'type': 'battle', 'testType': record_type, 'winner': winner, 'turns': turns})
+
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'inline; filename="{run.filename[:-5]}.ndjson"'})
+
+
+@app.route('/api/test-results/aggregate', methods=['GET'])
+def aggregate_test_results():
+    """Win rates per test config summed across indexed runs.
+
+    Filters: mode, ability, testType, since (ISO timestamp), runIds (comma separated).
+    """
+    try:
+        query = db.session.query(
+            TestRunConfig.test_type,
+            db.func.count(db.distinct(TestRunConfig.run_id)),
+            db.func.sum(TestRunConfig.companion_wins),
+            db.func.sum(TestRunConfig.enemy_wins),
+            db.func.sum(TestRunConfig.ties),
+            db.func.sum(TestRunConfig.battles),
+            db.func.sum(TestRunConfig.total_turns)
+        ).join(TestRun)
+        if request.args.get('mode'):
+            query = query.filter(TestRun.mode == request.args['mode'])
+        if request.args.get('ability'):
+            query = query.filter(TestRun.ability == request.args['ability'])
+        if request.args.get('testType'):
+            query = query.filter(TestRunConfig.test_type == request.args['testType'])
+        if request.args.get('since'):
+            query = query.filter(TestRun.created_at >= datetime.fromisoformat(request.args['since']))
+        if request.args.get('runIds'):
+            query = query.filter(TestRun.id.in_([int(run_id) for run_id in request.args['runIds'].split(',')]))
+
+        configs = {}
+        totals = {'companionWins': 0, 'enemyWins': 0, 'ties': 0, 'battles': 0}
+        for test_type, runs, companion_wins, enemy_wins, ties, battles, total_turns in query.group_by(TestRunConfig.test_type):
+            configs[test_type] = {
+                'runs': runs,
+                'battles': battles,
+                'companionWins': companion_wins,
+                'enemyWins': enemy_wins,
+                'ties': ties,
+                'companionWinRate': round(companion_wins / battles, 6) if battles else 0.0,
+                'companionWinRateCI95': wilson_interval(companion_wins, battles),
+                'meanTurns': round(total_turns / battles, 3) if battles else 0.0
+            }
+            totals['companionWins'] += companion_wins
+            totals['enemyWins'] += enemy_wins
+            totals['ties'] += ties
+            totals['battles'] += battles
+
+        totals['companionWinRate'] = round(totals['companionWins'] / totals['battles'], 6) if totals['battles'] else 0.0
+        return jsonify({'success': True, 'configs': configs, 'overall': totals})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+with app.app_context():
+    index_existing_test_results()
+
+
 # ============================================
 # BATTLE MECHANICS API ENDPOINTS
 # ============================================
@@ -1512,6 +4067,76 @@ STATUS_EFFECTS = {
     }
 }
 
+
+# ============================================
+# PRECOMPILED CATALOG RESPONSES
+# ============================================
+# Natures, items and the move tables never change while the process runs, so each
+# catalog is serialized once at import into its response body (plus a gzip copy when
+# that is smaller) with a strong ETag derived from the bytes. /api/catalog bundles all
+# of them so a client can bootstrap with one request.
+CATALOG_GZIP = os.environ.get('CATALOG_GZIP', '1') != '0'
+
+def build_item_catalog():
+    return [{
+        'itemId': item_id,
+        'name': item_data['name'],
+        'description': item_data['description'],
+        'category': item_data['category'],
+        'sprite': item_data['sprite']
+    } for item_id, item_data in POKEMON_ITEMS.items()]
+
+class CatalogResponse:
+    """A JSON payload encoded once, with its gzip variant and strong ETags"""
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        gzipped = gzip.compress(self.body, compresslevel=9, mtime=0) if CATALOG_GZIP else None
+        self.gzip_body = gzipped if gzipped and len(gzipped) < len(self.body) else None
+
+    def to_response(self):
+        accepts_gzip = self.gzip_body is not None and request.accept_encodings['gzip'] > 0
+        response = Response(self.gzip_body if accepts_gzip else self.body, mimetype='application/json')
+        if self.gzip_body is not None:
+            response.vary.add('Accept-Encoding')
+        if accepts_gzip:
+            response.content_encoding = 'gzip'
+            # a different byte representation needs its own strong validator
+            response.set_etag(f'{self.etag}-gzip')
+        else:
+            response.set_etag(self.etag)
+        return response.make_conditional(request)
+
+    def stats(self):
+        return {'bytes': len(self.body), 'gzipBytes': len(self.gzip_body) if self.gzip_body else None, 'etag': self.etag}
+
+
+CATALOG_PAYLOADS = {
+    'natures': {'natures': NATURES, 'modifiers': NATURE_MODIFIERS},
+    'items': build_item_catalog(),
+    'statStageMoves': STAT_STAGE_MOVES,
+    'statusMoves': STATUS_MOVES,
+    'statusEffects': STATUS_EFFECTS
+}
+CATALOG_RESPONSES = {name: CatalogResponse(payload) for name, payload in CATALOG_PAYLOADS.items()}
+CATALOG_RESPONSES['bundle'] = CatalogResponse(CATALOG_PAYLOADS)
+
+def catalog_response(name):
+    return CATALOG_RESPONSES[name].to_response()
+
+
+@app.route('/api/catalog', methods=['GET'])
+def get_catalog_bundle():
+    return catalog_response('bundle')
+
+
+@app.route('/api/catalog/<name>', methods=['GET'])
+def get_catalog(name):
+    if name not in CATALOG_PAYLOADS:
+        return jsonify({'success': False, 'error': f'Unknown catalog: {name}'}), 404
+    return catalog_response(name)
+
 def get_stat_stage_multiplier(stage):
     """Pokemon formula for stat stage multipliers"""
     clamped = max(-6, min(6, stage))
@@ -1546,6 +4171,24 @@ def api_accuracy_evasion_multiplier():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def apply_stat_stage_change(current_stages, stat, change):
+    """Apply a stage change in place, clamped to -6..+6, and build the battle message"""
+    old_stage = current_stages.get(stat, 0)
+    new_stage = max(-6, min(6, old_stage + change))
+    current_stages[stat] = new_stage
+    actual_change = new_stage - old_stage
+    
+    if actual_change == 0:
+        message = f"{stat.capitalize()} won't go any {'higher' if change > 0 else 'lower'}!"
+    elif abs(actual_change) >= 3:
+        message = f"{stat.capitalize()} {'rose drastically' if actual_change > 0 else 'severely fell'}!"
+    elif abs(actual_change) >= 2:
+        message = f"{stat.capitalize()} {'sharply rose' if actual_change > 0 else 'harshly fell'}!"
+    else:
+        message = f"{stat.capitalize()} {'rose' if actual_change > 0 else 'fell'}!"
+    
+    return {'stages': current_stages, 'message': message, 'changed': actual_change != 0}
+
 @app.route('/api/battle/apply-stat-change', methods=['POST'])
 def api_apply_stat_change():
     try:
@@ -1554,25 +4197,13 @@ def api_apply_stat_change():
         stat = data.get('stat', 'attack')
         change = data.get('change', 0)
         
-        old_stage = current_stages.get(stat, 0)
-        new_stage = max(-6, min(6, old_stage + change))
-        current_stages[stat] = new_stage
-        actual_change = new_stage - old_stage
-        
-        if actual_change == 0:
-            message = f"{stat.capitalize()} won't go any {'higher' if change > 0 else 'lower'}!"
-        elif abs(actual_change) >= 3:
-            message = f"{stat.capitalize()} {'rose drastically' if actual_change > 0 else 'severely fell'}!"
-        elif abs(actual_change) >= 2:
-            message = f"{stat.capitalize()} {'sharply rose' if actual_change > 0 else 'harshly fell'}!"
-        else:
-            message = f"{stat.capitalize()} {'rose' if actual_change > 0 else 'fell'}!"
+        result = apply_stat_stage_change(current_stages, stat, change)
         
         return jsonify({
             'success': True,
-            'stages': current_stages,
-            'message': message,
-            'changed': actual_change != 0
+            'stages': result['stages'],
+            'message': result['message'],
+            'changed': result['changed']
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1589,19 +4220,24 @@ def api_get_stat_move_effects():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def get_status_effect(status):
+    """Return a fresh status effect dict, rolling sleep/confusion duration"""
+    effect = STATUS_EFFECTS.get(status)
+    if effect and status == 'sleep':
+        effect = dict(effect)
+        effect['turnsRemaining'] = random.randint(1, 3)
+    elif effect and status == 'confusion':
+        effect = dict(effect)
+        effect['turnsRemaining'] = random.randint(1, 4)
+    return effect
+
 @app.route('/api/battle/get-status-effect', methods=['POST'])
 def api_get_status_effect():
     try:
         data = request.get_json()
         status = data.get('status', '')
         
-        effect = STATUS_EFFECTS.get(status)
-        if effect and status == 'sleep':
-            effect = dict(effect)
-            effect['turnsRemaining'] = random.randint(1, 3)
-        elif effect and status == 'confusion':
-            effect = dict(effect)
-            effect['turnsRemaining'] = random.randint(1, 4)
+        effect = get_status_effect(status)
             
         return jsonify({'success': True, 'effect': effect})
     except Exception as e:
@@ -1619,6 +4255,61 @@ def api_get_status_move_effects():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def process_status_on_turn(status, max_hp, turn_count=1):
+    """Resolve one turn of a status condition: whether the holder can move and any HP loss"""
+    result = {'canMove': True, 'damage': 0, 'message': '', 'cured': False}
+    
+    if not status:
+        return result
+    
+    status_name = status.get('name', '')
+    
+    if status_name == 'paralysis':
+        if random.random() < status.get('skipTurnChance', 0.25):
+            result['canMove'] = False
+            result['message'] = "is paralyzed! It can't move!"
+            
+    elif status_name == 'burn':
+        result['damage'] = int(max_hp * status.get('endTurnDamagePercent', 0.0625))
+        result['message'] = 'is hurt by its burn!'
+        
+    elif status_name == 'poison':
+        result['damage'] = int(max_hp * status.get('endTurnDamagePercent', 0.125))
+        result['message'] = 'is hurt by poison!'
+        
+    elif status_name == 'badly-poisoned':
+        result['damage'] = int(max_hp * status.get('baseDamagePercent', 0.0625) * turn_count)
+        result['message'] = 'is hurt by poison!'
+        
+    elif status_name == 'sleep':
+        turns_remaining = status.get('turnsRemaining', 1)
+        if turns_remaining <= 0:
+            result['cured'] = True
+            result['message'] = 'woke up!'
+        else:
+            result['canMove'] = False
+            result['message'] = 'is fast asleep.'
+            
+    elif status_name == 'freeze':
+        if random.random() < status.get('thawChance', 0.2):
+            result['cured'] = True
+            result['message'] = 'thawed out!'
+        else:
+            result['canMove'] = False
+            result['message'] = 'is frozen solid!'
+            
+    elif status_name == 'confusion':
+        turns_remaining = status.get('turnsRemaining', 1)
+        if turns_remaining <= 0:
+            result['cured'] = True
+            result['message'] = 'snapped out of confusion!'
+        elif random.random() < status.get('hitSelfChance', 0.33):
+            result['canMove'] = False
+            result['damage'] = int(max_hp * 0.1)
+            result['message'] = 'hurt itself in its confusion!'
+    
+    return result
+
 @app.route('/api/battle/process-status-on-turn', methods=['POST'])
 def api_process_status_on_turn():
     try:
@@ -1627,61 +4318,19 @@ def api_process_status_on_turn():
         max_hp = data.get('maxHp', 100)
         turn_count = data.get('turnCount', 1)
         
-        result = {'canMove': True, 'damage': 0, 'message': '', 'cured': False}
-        
-        if not status:
-            return jsonify({'success': True, 'result': result})
-        
-        status_name = status.get('name', '')
-        
-        if status_name == 'paralysis':
-            if random.random() < status.get('skipTurnChance', 0.25):
-                result['canMove'] = False
-                result['message'] = "is paralyzed! It can't move!"
-                
-        elif status_name == 'burn':
-            result['damage'] = int(max_hp * status.get('endTurnDamagePercent', 0.0625))
-            result['message'] = 'is hurt by its burn!'
-            
-        elif status_name == 'poison':
-            result['damage'] = int(max_hp * status.get('endTurnDamagePercent', 0.125))
-            result['message'] = 'is hurt by poison!'
-            
-        elif status_name == 'badly-poisoned':
-            result['damage'] = int(max_hp * status.get('baseDamagePercent', 0.0625) * turn_count)
-            result['message'] = 'is hurt by poison!'
-            
-        elif status_name == 'sleep':
-            turns_remaining = status.get('turnsRemaining', 1)
-            if turns_remaining <= 0:
-                result['cured'] = True
-                result['message'] = 'woke up!'
-            else:
-                result['canMove'] = False
-                result['message'] = 'is fast asleep.'
-                
-        elif status_name == 'freeze':
-            if random.random() < status.get('thawChance', 0.2):
-                result['cured'] = True
-                result['message'] = 'thawed out!'
-            else:
-                result['canMove'] = False
-                result['message'] = 'is frozen solid!'
-                
-        elif status_name == 'confusion':
-            turns_remaining = status.get('turnsRemaining', 1)
-            if turns_remaining <= 0:
-                result['cured'] = True
-                result['message'] = 'snapped out of confusion!'
-            elif random.random() < status.get('hitSelfChance', 0.33):
-                result['canMove'] = False
-                result['damage'] = int(max_hp * 0.1)
-                result['message'] = 'hurt itself in its confusion!'
+        result = process_status_on_turn(status, max_hp, turn_count)
         
         return jsonify({'success': True, 'result': result})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def calculate_accuracy_with_stages(base_accuracy, attacker_accuracy_stage, defender_evasion_stage):
+    accuracy_multiplier = get_accuracy_evasion_multiplier(attacker_accuracy_stage)
+    evasion_multiplier = get_accuracy_evasion_multiplier(defender_evasion_stage)
+    
+    final_accuracy = base_accuracy * (accuracy_multiplier / evasion_multiplier)
+    return min(100, max(0, final_accuracy))
+
 @app.route('/api/battle/calculate-accuracy-with-stages', methods=['POST'])
 def api_calculate_accuracy_with_stages():
     try:
@@ -1690,23 +4339,344 @@ def api_calculate_accuracy_with_stages():
         attacker_accuracy_stage = data.get('attackerAccuracyStage', 0)
         defender_evasion_stage = data.get('defenderEvasionStage', 0)
         
-        accuracy_multiplier = get_accuracy_evasion_multiplier(attacker_accuracy_stage)
-        evasion_multiplier = get_accuracy_evasion_multiplier(defender_evasion_stage)
-        
-        final_accuracy = base_accuracy * (accuracy_multiplier / evasion_multiplier)
-        final_accuracy = min(100, max(0, final_accuracy))
+        final_accuracy = calculate_accuracy_with_stages(base_accuracy, attacker_accuracy_stage, defender_evasion_stage)
         
         return jsonify({'success': True, 'accuracy': final_accuracy})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def init_stat_stages():
+    return {'attack': 0, 'defense': 0, 'spAttack': 0, 'spDefense': 0, 'speed': 0, 'accuracy': 0, 'evasion': 0}
+
 @app.route('/api/battle/init-stat-stages', methods=['GET'])
 def api_init_stat_stages():
     return jsonify({
         'success': True,
-        'stages': {'attack': 0, 'defense': 0, 'spAttack': 0, 'spDefense': 0, 'speed': 0, 'accuracy': 0, 'evasion': 0}
+        'stages': init_stat_stages()
+    })
+
+
+
+# ============================================
+# BATCHED TURN RESOLUTION
+# ============================================
+
+TYPE_CHART = {
+    'Normal': {'Rock': 0.5, 'Ghost': 0, 'Steel': 0.5},
+    'Fire': {'Fire': 0.5, 'Water': 0.5, 'Grass': 2, 'Ice': 2, 'Bug': 2, 'Rock': 0.5, 'Dragon': 0.5, 'Steel': 2},
+    'Water': {'Fire': 2, 'Water': 0.5, 'Grass': 0.5, 'Ground': 2, 'Rock': 2, 'Dragon': 0.5},
+    'Electric': {'Water': 2, 'Electric': 0.5, 'Grass': 0.5, 'Ground': 0, 'Flying': 2, 'Dragon': 0.5},
+    'Grass': {'Fire': 0.5, 'Water': 2, 'Grass': 0.5, 'Poison': 0.5, 'Ground': 2, 'Flying': 0.5, 'Bug': 0.5, 'Rock': 2, 'Dragon': 0.5, 'Steel': 0.5},
+    'Ice': {'Fire': 0.5, 'Water': 0.5, 'Grass': 2, 'Ice': 0.5, 'Ground': 2, 'Flying': 2, 'Dragon': 2, 'Steel': 0.5},
+    'Fighting': {'Normal': 2, 'Ice': 2, 'Poison': 0.5, 'Flying': 0.5, 'Psychic': 0.5, 'Bug': 0.5, 'Rock': 2, 'Ghost': 0, 'Dark': 2, 'Steel': 2, 'Fairy': 0.5},
+    'Poison': {'Grass': 2, 'Poison': 0.5, 'Ground': 0.5, 'Rock': 0.5, 'Ghost': 0.5, 'Steel': 0, 'Fairy': 2},
+    'Ground': {'Fire': 2, 'Electric': 2, 'Grass': 0.5, 'Poison': 2, 'Flying': 0, 'Bug': 0.5, 'Rock': 2, 'Steel': 2},
+    'Flying': {'Electric': 0.5, 'Grass': 2, 'Fighting': 2, 'Bug': 2, 'Rock': 0.5, 'Steel': 0.5},
+    'Psychic': {'Fighting': 2, 'Poison': 2, 'Psychic': 0.5, 'Dark': 0, 'Steel': 0.5},
+    'Bug': {'Fire': 0.5, 'Grass': 2, 'Fighting': 0.5, 'Poison': 0.5, 'Flying': 0.5, 'Psychic': 2, 'Ghost': 0.5, 'Dark': 2, 'Steel': 0.5, 'Fairy': 0.5},
+    'Rock': {'Fire': 2, 'Ice': 2, 'Fighting': 0.5, 'Ground': 0.5, 'Flying': 2, 'Bug': 2, 'Steel': 0.5},
+    'Ghost': {'Normal': 0, 'Psychic': 2, 'Ghost': 2, 'Dark': 0.5},
+    'Dragon': {'Dragon': 2, 'Steel': 0.5, 'Fairy': 0},
+    'Dark': {'Fighting': 0.5, 'Psychic': 2, 'Ghost': 2, 'Dark': 0.5, 'Fairy': 0.5},
+    'Steel': {'Fire': 0.5, 'Water': 0.5, 'Electric': 0.5, 'Ice': 2, 'Rock': 2, 'Steel': 0.5, 'Fairy': 2},
+    'Fairy': {'Fire': 0.5, 'Fighting': 2, 'Poison': 0.5, 'Dragon': 2, 'Dark': 2, 'Steel': 0.5}
+}
+
+PRIORITY_MOVES = {
+    'quick-attack': 1,
+    'mach-punch': 1,
+    'bullet-punch': 1,
+    'ice-shard': 1,
+    'aqua-jet': 1,
+    'shadow-sneak': 1,
+    'sucker-punch': 1,
+    'extreme-speed': 2,
+    'fake-out': 3,
+    'protect': 4,
+    'detect': 4
+}
+
+END_OF_TURN_STATUSES = ('burn', 'poison', 'badly-poisoned')
+MAJOR_STATUSES = ('paralysis', 'burn', 'poison', 'badly-poisoned', 'sleep', 'freeze')
+
+def normalize_move_name(move_name):
+    return (move_name or '').lower().replace(' ', '-')
+
+def normalize_type(type_name):
+    if not type_name:
+        return 'Normal'
+    return type_name[0].upper() + type_name[1:].lower()
+
+# TYPE_CHART flattened over TYPE_IDS: TYPE_EFFECTIVENESS[attack * N + defender] for one
+# defending type, and DUAL_TYPE_EFFECTIVENESS[(attack * N + first) * N + second] with the
+# product for both defending types precomputed. A single-typed defender is its diagonal
+# (first == second), which is how SpeciesTable.get_type_ids reports it. Multipliers that
+# are whole numbers are stored as ints, so responses match battle-calc's JSON.
+TYPE_COUNT = len(TYPE_NAMES)
+
+def as_multiplier(value):
+    return int(value) if value == int(value) else value
+
+TYPE_EFFECTIVENESS = tuple(
+    as_multiplier(TYPE_CHART[attack].get(defender, 1)) for attack in TYPE_NAMES for defender in TYPE_NAMES
+)
+DUAL_TYPE_EFFECTIVENESS = tuple(
+    TYPE_EFFECTIVENESS[attack * TYPE_COUNT + first] if first == second else
+    as_multiplier(TYPE_EFFECTIVENESS[attack * TYPE_COUNT + first] * TYPE_EFFECTIVENESS[attack * TYPE_COUNT + second])
+    for attack in range(TYPE_COUNT) for first in range(TYPE_COUNT) for second in range(TYPE_COUNT)
+)
+
+def get_type_effectiveness_multiplier(move_type, defender_types):
+    """Multiplier of a move type against the defender's types; unknown types count as neutral, like battle-calc"""
+    attack = TYPE_IDS.get(normalize_type(move_type))
+    defenders = [TYPE_IDS[t] for t in map(normalize_type, defender_types) if t in TYPE_IDS]
+    if attack is None or not defenders:
+        return 1
+    if len(defenders) == 1:
+        return TYPE_EFFECTIVENESS[attack * TYPE_COUNT + defenders[0]]
+    if len(defenders) == 2 and defenders[0] != defenders[1]:
+        return DUAL_TYPE_EFFECTIVENESS[(attack * TYPE_COUNT + defenders[0]) * TYPE_COUNT + defenders[1]]
+    multiplier = 1
+    for defender in defenders:
+        multiplier *= TYPE_EFFECTIVENESS[attack * TYPE_COUNT + defender]
+    return as_multiplier(multiplier)
+
+def get_species_matchup(attacker_id, defender_id):
+    """Best multiplier the attacker's own types get against the defender, as a same-type move would"""
+    attacker_types = SPECIES.get_type_ids(attacker_id)
+    first, second = SPECIES.get_type_ids(defender_id)
+    return max(DUAL_TYPE_EFFECTIVENESS[(attack * TYPE_COUNT + first) * TYPE_COUNT + second] for attack in attacker_types)
+
+def get_effectiveness_message(multiplier):
+    if multiplier == 0:
+        return {'text': "It doesn't affect the target...", 'level': 'immune'}
+    if multiplier < 0.5:
+        return {'text': "It's barely effective...", 'level': 'weak'}
+    if multiplier < 1:
+        return {'text': "It's not very effective...", 'level': 'weak'}
+    if multiplier > 2:
+        return {'text': "It's extremely effective!", 'level': 'super'}
+    if multiplier > 1:
+        return {'text': "It's super effective!", 'level': 'super'}
+    return {'text': '', 'level': 'normal'}
+
+def get_move_priority(move):
+    return PRIORITY_MOVES.get(normalize_move_name(move.get('name')), move.get('priority', 0) or 0)
+
+def calculate_fixed_damage(move, level, defender_hp):
+    fixed_damage_moves = {
+        'dragon-rage': lambda: 40,
+        'sonic-boom': lambda: 20,
+        'seismic-toss': lambda: level,
+        'night-shade': lambda: level,
+        'psywave': lambda: int(level * (0.5 + random.random())),
+        'super-fang': lambda: defender_hp // 2,
+        'endeavor': lambda: defender_hp - 1
+    }
+    roll = fixed_damage_moves.get(normalize_move_name(move.get('name')))
+    return max(1, roll() if roll else 20)
+
+def calculate_move_damage(attacker, defender, move, attacker_stages, defender_stages, attacker_status):
+    """Gen 3+ damage formula with stat stages, STAB, type effectiveness, crits and burn"""
+    power = move.get('power')
+    if not power:
+        return {'damage': calculate_fixed_damage(move, attacker['level'], defender['currentHp']),
+                'effectiveness': 1, 'critical': False, 'stab': False}
+
+    is_physical = move.get('damageClass', 'physical') == 'physical'
+    attack_key, defense_key = ('attack', 'defense') if is_physical else ('spAttack', 'spDefense')
+    attack_stat = int(attacker['stats'].get(attack_key, 50) * get_stat_stage_multiplier(attacker_stages.get(attack_key, 0)))
+    defense_stat = int(defender['stats'].get(defense_key, 50) * get_stat_stage_multiplier(defender_stages.get(defense_key, 0)))
+    defense_stat = max(1, defense_stat)
+
+    level = attacker['level']
+    base_damage = int((((2 * level) / 5 + 2) * power * (attack_stat / defense_stat)) / 50 + 2)
+
+    move_type = normalize_type(move.get('type'))
+    stab = 1.5 if any(normalize_type(t) == move_type for t in attacker['types']) else 1
+    effectiveness = get_type_effectiveness_multiplier(move_type, defender['types'])
+    critical = 1.5 if random.random() < 0.0625 else 1
+    random_factor = 0.85 + random.random() * 0.15
+
+    damage = max(1, int(base_damage * stab * effectiveness * critical * random_factor))
+    if effectiveness == 0:
+        damage = 0
+    if attacker_status and attacker_status.get('name') == 'burn' and is_physical:
+        damage = damage // 2
+
+    return {'damage': damage, 'effectiveness': effectiveness, 'critical': critical > 1, 'stab': stab > 1}
+
+def build_combatant_state(data):
+    stats = data.get('stats') or {}
+    max_hp = data.get('maxHp') or stats.get('hp', 100)
+    stages = init_stat_stages()
+    stages.update(data.get('statStages') or {})
+    status = data.get('status')
+    return {
+        'name': data.get('name', 'Unknown'),
+        'level': data.get('level', 50),
+        'types': data.get('types') or ['Normal'],
+        'stats': stats,
+        'maxHp': max_hp,
+        'currentHp': data.get('currentHp', max_hp),
+        'status': dict(status) if status else None,
+        'statStages': stages
+    }
+
+def get_effective_speed(combatant):
+    speed = combatant['stats'].get('speed', 50)
+    if combatant['status'] and combatant['status'].get('name') == 'paralysis':
+        speed = int(speed * 0.5)
+    return speed * get_stat_stage_multiplier(combatant['statStages'].get('speed', 0))
+
+def determine_turn_order(companion, enemy, companion_move, enemy_move):
+    companion_priority = get_move_priority(companion_move)
+    enemy_priority = get_move_priority(enemy_move)
+    if companion_priority != enemy_priority:
+        return 'companion' if companion_priority > enemy_priority else 'enemy'
+
+    companion_speed = get_effective_speed(companion)
+    enemy_speed = get_effective_speed(enemy)
+    if companion_speed != enemy_speed:
+        return 'companion' if companion_speed > enemy_speed else 'enemy'
+    return random.choice(['companion', 'enemy'])
+
+def resolve_move(side, combatants, move, turn_count, log):
+    """Run one combatant's action for the turn, appending events to the log"""
+    other = 'enemy' if side == 'companion' else 'companion'
+    user = combatants[side]
+    target = combatants[other]
+
+    status = user['status']
+    if status and status.get('name') not in END_OF_TURN_STATUSES:
+        status_result = process_status_on_turn(status, user['maxHp'], turn_count)
+        if status_result['message']:
+            log.append({'actor': side, 'event': 'status', 'message': status_result['message'], 'damage': status_result['damage']})
+        if status_result['damage']:
+            user['currentHp'] = max(0, user['currentHp'] - status_result['damage'])
+        if status_result['cured']:
+            user['status'] = None
+        elif 'turnsRemaining' in status:
+            status['turnsRemaining'] -= 1
+        if user['currentHp'] == 0:
+            log.append({'actor': side, 'event': 'faint', 'message': 'fainted!'})
+            return
+        if not status_result['canMove']:
+            return
+
+    log.append({'actor': side, 'event': 'move', 'move': move.get('name'), 'message': f"used {move.get('name')}!"})
+
+    accuracy = calculate_accuracy_with_stages(
+        move.get('accuracy') or 100,
+        user['statStages'].get('accuracy', 0),
+        target['statStages'].get('evasion', 0)
+    )
+    if random.random() * 100 >= accuracy:
+        log.append({'actor': side, 'event': 'miss', 'message': 'The attack missed!'})
+        return
+
+    move_key = normalize_move_name(move.get('name'))
+    if move.get('isStatus') or (not move.get('power') and (move_key in STAT_STAGE_MOVES or move_key in STATUS_MOVES)):
+        stat_effects = STAT_STAGE_MOVES.get(move_key)
+        if stat_effects:
+            stage_target = side if stat_effects['target'] == 'self' else other
+            changes = stat_effects.get('stats') or [{'stat': stat_effects['stat'], 'change': stat_effects['change']}]
+            for change in changes:
+                result = apply_stat_stage_change(combatants[stage_target]['statStages'], change['stat'], change['change'])
+                log.append({'actor': stage_target, 'event': 'stat-change', 'stat': change['stat'],
+                            'changed': result['changed'], 'message': result['message']})
+            return
+
+        status_move = STATUS_MOVES.get(move_key)
+        if status_move:
+            if target['status'] and target['status'].get('name') in MAJOR_STATUSES:
+                log.append({'actor': other, 'event': 'status-failed', 'message': 'But it failed! The target already has a status condition.'})
+                return
+            effect = get_status_effect(status_move['status'])
+            target['status'] = effect
+            log.append({'actor': other, 'event': 'status-inflicted', 'status': effect['name'], 'message': effect['message']})
+        return
+
+    result = calculate_move_damage(user, target, move, user['statStages'], target['statStages'], user['status'])
+    target['currentHp'] = max(0, target['currentHp'] - result['damage'])
+    log.append({
+        'actor': side,
+        'event': 'damage',
+        'target': other,
+        'damage': result['damage'],
+        'effectiveness': result['effectiveness'],
+        'critical': result['critical'],
+        'stab': result['stab'],
+        'effectivenessMessage': get_effectiveness_message(result['effectiveness']),
+        'message': f"Dealt {result['damage']} damage!"
     })
+    if target['currentHp'] == 0:
+        log.append({'actor': other, 'event': 'faint', 'message': 'fainted!'})
+
+def resolve_end_of_turn(side, combatant, turn_count, log):
+    status = combatant['status']
+    if not status or status.get('name') not in END_OF_TURN_STATUSES or combatant['currentHp'] == 0:
+        return
+    status_result = process_status_on_turn(status, combatant['maxHp'], turn_count)
+    if status_result['damage'] > 0:
+        combatant['currentHp'] = max(0, combatant['currentHp'] - status_result['damage'])
+        log.append({'actor': side, 'event': 'status-damage', 'damage': status_result['damage'], 'message': status_result['message']})
+        if combatant['currentHp'] == 0:
+            log.append({'actor': side, 'event': 'faint', 'message': 'fainted!'})
+
+def resolve_battle_turn(companion_data, enemy_data, companion_move, enemy_move, turn_count=1):
+    """Resolve a whole turn (order, status, accuracy, stat stages, damage, end-of-turn ticks)"""
+    combatants = {
+        'companion': build_combatant_state(companion_data),
+        'enemy': build_combatant_state(enemy_data)
+    }
+    moves = {'companion': companion_move, 'enemy': enemy_move}
+    log = []
+
+    first = determine_turn_order(combatants['companion'], combatants['enemy'], companion_move, enemy_move)
+    second = 'enemy' if first == 'companion' else 'companion'
+
+    for side in (first, second):
+        if combatants['companion']['currentHp'] == 0 or combatants['enemy']['currentHp'] == 0:
+            break
+        resolve_move(side, combatants, moves[side], turn_count, log)
+
+    for side in ('companion', 'enemy'):
+        if combatants['companion']['currentHp'] == 0 or combatants['enemy']['currentHp'] == 0:
+            break
+        resolve_end_of_turn(side, combatants[side], turn_count, log)
 
+    fainted = [side for side in ('companion', 'enemy') if combatants[side]['currentHp'] == 0]
+
+    return {
+        'firstAttacker': first,
+        'log': log,
+        'companion': combatants['companion'],
+        'enemy': combatants['enemy'],
+        'fainted': fainted,
+        'battleOver': bool(fainted),
+        'turnCount': turn_count
+    }
+
+@app.route('/api/battle/turn', methods=['POST'])
+def api_battle_turn():
+    try:
+        data = request.get_json()
+        companion_move = data.get('companionMove')
+        enemy_move = data.get('enemyMove')
+        if not data.get('companion') or not data.get('enemy') or not companion_move or not enemy_move:
+            return jsonify({'success': False, 'error': 'companion, enemy, companionMove and enemyMove are required'}), 400
+
+        result = resolve_battle_turn(
+            data['companion'],
+            data['enemy'],
+            companion_move,
+            enemy_move,
+            data.get('turnCount', 1)
+        )
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
     print("Starting PokeBrowse server on port 5000...")
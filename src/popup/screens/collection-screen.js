@@ -20,8 +20,19 @@ export class CollectionScreen {
 
   async loadCollection() {
     try {
-      const res = await fetch('/api/pokemon');
-      this.caughtPokemon = await res.json();
+      // Grid cards only need these fields; the detail modal fetches the full record
+      const fields = 'db_id,id,name,level,item,in_party,caughtAt';
+      const pokemon = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ fields, limit: 200 });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`/api/pokemon?${params}`);
+        const page = await res.json();
+        pokemon.push(...page.items);
+        cursor = page.nextCursor;
+      } while (cursor);
+      this.caughtPokemon = pokemon;
       console.log('[CollectionScreen] Loaded collection:', this.caughtPokemon.length, 'Pokemon');
     } catch (error) {
       console.error('[CollectionScreen] Error loading collection:', error);
@@ -221,8 +232,14 @@ export class CollectionScreen {
     }
   }
 
-  showPokemonDetail(dbId) {
-    const pokemon = this.caughtPokemon.find(p => p.db_id === dbId);
+  async showPokemonDetail(dbId) {
+    let pokemon = null;
+    try {
+      const res = await fetch(`/api/pokemon/${dbId}`);
+      if (res.ok) pokemon = await res.json();
+    } catch (error) {
+      console.error('[CollectionScreen] Error loading Pokemon detail:', error);
+    }
     
     if (pokemon) {
       console.log('[CollectionScreen] Opening detail for:', pokemon.name);
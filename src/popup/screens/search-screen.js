@@ -4,6 +4,7 @@ import { SpriteService } from '../../shared/services/SpriteService.js';
 import { EncounterService } from '../../shared/services/EncounterService.js';
 import { MoveService } from '../../shared/services/MoveService.js';
 import { BattleService } from '../../shared/services/BattleService.js';
+import { BattleServiceAPI } from '../../shared/services/BattleServiceAPI.js';
 import { LevelingService } from '../../shared/services/LevelingService.js';
 import { getPokemonById } from '../../shared/data/pokemon-database.js';
 
@@ -19,6 +20,7 @@ export class SearchScreen {
     this.pokeballs = [];
     this.moveService = new MoveService();
     this.battleService = new BattleService();
+    this.battleServiceAPI = new BattleServiceAPI();
     this.currentEncounter = null;
     this.isSearching = false;
     this.companion = null;
@@ -658,6 +660,175 @@ export class SearchScreen {
     // Disable buttons immediately and keep them disabled
     this.disableButtons(true);
 
+    const enemyMove = this.battleService.selectWildPokemonMove(
+      this.currentEncounter.pokemon,
+      this.currentEncounter.level
+    );
+
+    // Resolve the whole turn in one round trip; fall back to the per-step flow if the server can't
+    const turnMove = { ...companionMove, power: power || companionMove.power, type: type || companionMove.type, accuracy, isStatus };
+    const turn = await this.battleServiceAPI.resolveTurnAPI(
+      this.buildTurnCombatant('companion'),
+      this.buildTurnCombatant('enemy'),
+      turnMove,
+      enemyMove,
+      this.turnCount
+    );
+    if (turn) {
+      await this.playResolvedTurn(turn, { companion: turnMove, enemy: enemyMove });
+    } else {
+      await this.executeMoveSteps(companionMove, enemyMove, power, type, accuracy, isStatus);
+    }
+
+    this.battleInProgress = false;
+
+    // Re-enable buttons only after both turns complete
+    if (this.currentEncounter) {
+      this.disableButtons(false);
+    }
+  }
+
+  buildTurnCombatant(side) {
+    if (side === 'companion') {
+      const maxHp = this.companionStats?.hp || 100;
+      return {
+        name: this.companion?.name || 'Pikachu',
+        level: this.companion?.level || 10,
+        types: this.companion?.types || ['Normal'],
+        stats: this.companionStats || {},
+        maxHp,
+        currentHp: this.companion?.currentHp ?? this.getCompanionCurrentHp(),
+        status: this.companionStatus,
+        statStages: this.companionStatStages
+      };
+    }
+    return {
+      name: this.currentEncounter.pokemon.name,
+      level: this.currentEncounter.level,
+      types: this.currentEncounter.pokemon?.types || ['Normal'],
+      stats: this.currentEncounter.stats || {},
+      maxHp: this.currentEncounter.maxHp,
+      currentHp: this.currentEncounter.currentHp,
+      status: this.enemyStatus,
+      statStages: this.enemyStatStages
+    };
+  }
+
+  async playResolvedTurn(turn, moves) {
+    const battlerName = (side) => side === 'companion'
+      ? this.companion?.name
+      : `Wild ${this.currentEncounter.pokemon.name}`;
+    const hp = { companion: this.buildTurnCombatant('companion').currentHp, enemy: this.currentEncounter.currentHp };
+    const maxHp = { companion: this.companionStats?.hp || 100, enemy: this.currentEncounter.maxHp };
+    const showHp = (side) => {
+      if (side === 'companion') {
+        this.companion.currentHp = hp.companion;
+        this.companion.health = Math.round((hp.companion / maxHp.companion) * 100);
+        this.updateHpDisplay('ally', hp.companion, maxHp.companion);
+      } else {
+        this.currentEncounter.currentHp = hp.enemy;
+        this.updateHpDisplay('enemy', hp.enemy, maxHp.enemy);
+        this.render();
+      }
+    };
+
+    if (turn.firstAttacker === 'enemy') {
+      this.battleLog.push(`Wild ${this.currentEncounter.pokemon.name} is faster!`);
+      this.updateBattleLog();
+      await this.delay(800);
+    }
+
+    for (const entry of turn.log) {
+      const target = entry.actor === 'companion' ? 'enemy' : 'companion';
+      switch (entry.event) {
+        case 'move':
+          this.battleLog.push(`${battlerName(entry.actor)} used ${entry.move}!`);
+          this.updateBattleLog();
+          await this.animateAttack(entry.actor === 'companion' ? 'ally' : 'enemy');
+          await this.playMoveAnimation(moves[entry.actor].type, target === 'companion' ? 'ally' : 'enemy');
+          break;
+        case 'damage':
+          if (entry.actor === 'companion') {
+            await this.showEffectivenessOverlay(entry, moves.companion.name);
+          }
+          hp[target] = Math.max(0, hp[target] - entry.damage);
+          await this.animateDamage(target === 'companion' ? 'ally' : 'enemy');
+          showHp(target);
+          this.battleLog.push(entry.actor === 'companion'
+            ? `${this.getDamageMessagePrefix(entry)}Dealt ${entry.damage} damage!${entry.stab ? ' (STAB)' : ''}`
+            : `${this.getDamageMessagePrefix(entry)}${this.companion.name} took ${entry.damage} damage!`);
+          this.updateBattleLog();
+          await this.delay(1500);
+          break;
+        case 'status':
+        case 'status-damage':
+          if (entry.damage) {
+            hp[entry.actor] = Math.max(0, hp[entry.actor] - entry.damage);
+            showHp(entry.actor);
+          }
+          this.battleLog.push(`${battlerName(entry.actor)} ${entry.message}`);
+          this.updateBattleLog();
+          await this.delay(1000);
+          break;
+        case 'stat-change':
+          this.battleLog.push(`${battlerName(entry.actor)}'s ${entry.message}`);
+          this.updateBattleLog();
+          await this.delay(800);
+          break;
+        case 'status-inflicted':
+          this.battleLog.push(`${battlerName(entry.actor)} ${entry.message}`);
+          this.updateBattleLog();
+          await this.delay(1500);
+          break;
+        case 'faint':
+          this.battleLog.push(`${battlerName(entry.actor)} fainted!`);
+          this.updateBattleLog();
+          await this.delay(1500);
+          break;
+        default:
+          this.battleLog.push(entry.message);
+          this.updateBattleLog();
+          await this.delay(1200);
+      }
+    }
+
+    this.companionStatus = turn.companion.status;
+    this.companionStatStages = turn.companion.statStages;
+    this.enemyStatus = turn.enemy.status;
+    this.enemyStatStages = turn.enemy.statStages;
+    hp.companion = turn.companion.currentHp;
+    hp.enemy = turn.enemy.currentHp;
+    showHp('companion');
+    this.currentEncounter.currentHp = hp.enemy;
+    await this.storage.set('companionHp', this.companion.health);
+
+    if (turn.fainted.includes('companion')) {
+      await this.delay(2000);
+      this.battleLog.push('You lost the battle...');
+      this.updateBattleLog();
+      await this.delay(2500);
+    } else if (turn.fainted.includes('enemy')) {
+      await this.awardBattleRewards(this.currentEncounter);
+      await this.delay(2000);
+    } else {
+      return;
+    }
+    this.currentEncounter = null;
+    this.battleLog = [];
+    this.resetBattleState();
+    this.render();
+  }
+
+  getDamageMessagePrefix(result) {
+    let prefix = '';
+    if (result.critical) prefix += 'Critical hit! ';
+    if (result.effectiveness > 1) prefix += 'Super effective! ';
+    else if (result.effectiveness < 1 && result.effectiveness > 0) prefix += 'Not very effective... ';
+    else if (result.effectiveness === 0) prefix += 'No effect! ';
+    return prefix;
+  }
+
+  async executeMoveSteps(companionMove, enemyMove, power, type, accuracy, isStatus) {
     // Process companion status at start of turn (paralysis, sleep, freeze, confusion)
     if (this.companionStatus) {
       const maxHp = this.companionStats?.hp || 100;
@@ -682,26 +853,12 @@ export class SearchScreen {
         }
         
         // Enemy still gets to attack
-        const enemyMove = this.battleService.selectWildPokemonMove(
-          this.currentEncounter.pokemon,
-          this.currentEncounter.level
-        );
         await this.executeEnemyAttack(enemyMove);
         await this.processEndOfTurnEffects();
-        this.battleInProgress = false;
-        if (this.currentEncounter) {
-          this.disableButtons(false);
-        }
         return;
       }
     }
 
-    // Get enemy move for turn order calculation
-    const enemyMove = this.battleService.selectWildPokemonMove(
-      this.currentEncounter.pokemon,
-      this.currentEncounter.level
-    );
-
     // Build companion and enemy objects for turn order determination with status modifiers
     let companionSpeed = this.companionStats?.speed || 50;
     companionSpeed = this.battleService.applyStatusModifiersToSpeed(companionSpeed, this.companionStatus);
@@ -754,13 +911,6 @@ export class SearchScreen {
     
     // Process end-of-turn status effects (burn, poison damage)
     await this.processEndOfTurnEffects();
-    
-    this.battleInProgress = false;
-    
-    // Re-enable buttons only after both turns complete
-    if (this.currentEncounter) {
-      this.disableButtons(false);
-    }
   }
 
   async processEndOfTurnEffects() {
@@ -924,11 +1074,7 @@ export class SearchScreen {
 
     await this.animateDamage('enemy');
 
-    let damageMsg = '';
-    if (result.critical) damageMsg += 'Critical hit! ';
-    if (result.effectiveness > 1) damageMsg += "Super effective! ";
-    else if (result.effectiveness < 1 && result.effectiveness > 0) damageMsg += "Not very effective... ";
-    else if (result.effectiveness === 0) damageMsg += "No effect! ";
+    let damageMsg = this.getDamageMessagePrefix(result);
     damageMsg += `Dealt ${result.damage} damage!`;
     if (result.stab) damageMsg += ' (STAB)';
     this.battleLog.push(damageMsg);
@@ -1112,11 +1258,7 @@ export class SearchScreen {
 
     this.updateHpDisplay('ally', companionHp, maxHp);
 
-    let damageMsg = '';
-    if (result.critical) damageMsg += 'Critical hit! ';
-    if (result.effectiveness > 1) damageMsg += "Super effective! ";
-    else if (result.effectiveness < 1 && result.effectiveness > 0) damageMsg += "Not very effective... ";
-    else if (result.effectiveness === 0) damageMsg += "No effect! ";
+    let damageMsg = this.getDamageMessagePrefix(result);
     damageMsg += `${this.companion.name} took ${actualDamage} damage!`;
     this.battleLog.push(damageMsg);
     this.updateBattleLog();
@@ -1201,11 +1343,7 @@ export class SearchScreen {
 
     this.updateHpDisplay('ally', companionHp, maxHp);
 
-    let damageMsg = '';
-    if (result.critical) damageMsg += 'Critical hit! ';
-    if (result.effectiveness > 1) damageMsg += "Super effective! ";
-    else if (result.effectiveness < 1 && result.effectiveness > 0) damageMsg += "Not very effective... ";
-    else if (result.effectiveness === 0) damageMsg += "No effect! ";
+    let damageMsg = this.getDamageMessagePrefix(result);
     damageMsg += `${this.companion.name} took ${actualDamage} damage!`;
     this.battleLog.push(damageMsg);
     this.updateBattleLog();
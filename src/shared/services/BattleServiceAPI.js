@@ -878,6 +878,27 @@ export class BattleServiceAPI {
       return this.calculateAccuracyWithStages(baseAccuracy, attackerAccuracyStage, defenderEvasionStage);
     }
   }
+
+  // ============================================
+  // BATCHED TURN RESOLUTION (single round trip)
+  // ============================================
+
+  async resolveTurnAPI(companion, enemy, companionMove, enemyMove, turnCount = 1) {
+    try {
+      const response = await fetch(`${getApiBaseUrl()}/api/battle/turn`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ companion, enemy, companionMove, enemyMove, turnCount })
+      });
+      if (!response.ok) throw new Error('API request failed');
+      const result = await response.json();
+      if (result.success) return result;
+      throw new Error(result.error);
+    } catch (error) {
+      console.warn('[BattleServiceAPI] resolveTurn API failed, resolve per step locally:', error.message);
+      return null;
+    }
+  }
 }
 
 export { BattleServiceAPI as BattleService };
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# server.py configures the database and storage layout at import time
+os.environ['DATABASE_URL'] = f'sqlite:///{tempfile.mkdtemp()}/test.db'
+os.environ.setdefault('ENCOUNTER_FLUSH_INTERVAL', '0')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,76 @@
+import pytest
+
+import server
+
+TACKLE = {'name': 'Tackle', 'power': 40, 'accuracy': 100, 'type': 'Normal', 'damageClass': 'physical'}
+GROWL = {'name': 'Growl', 'power': None, 'accuracy': 100, 'type': 'Normal', 'isStatus': True}
+SWORDS_DANCE = {'name': 'Swords Dance', 'power': None, 'accuracy': None, 'type': 'Normal', 'isStatus': True}
+
+
+def combatant(name, speed, **overrides):
+    stats = {'hp': 100, 'attack': 60, 'defense': 50, 'spAttack': 50, 'spDefense': 50, 'speed': speed}
+    return {'name': name, 'level': 30, 'types': ['Normal'], 'stats': stats, 'maxHp': 100, 'currentHp': 100, **overrides}
+
+
+@pytest.fixture
+def play_turn(monkeypatch):
+    client = server.app.test_client()
+
+    def play(companion, enemy, companion_move, enemy_move, roll=0.0, turn_count=1):
+        # one value for every accuracy and damage roll, so outcomes are deterministic
+        monkeypatch.setattr(server.random, 'random', lambda: roll)
+        response = client.post('/api/battle/turn', json={
+            'companion': companion, 'enemy': enemy,
+            'companionMove': companion_move, 'enemyMove': enemy_move, 'turnCount': turn_count
+        })
+        assert response.status_code == 200
+        turn = response.get_json()
+        assert turn['success']
+        return turn
+
+    return play
+
+
+def events(turn, event):
+    return [entry for entry in turn['log'] if entry['event'] == event]
+
+
+def test_turn_requires_both_moves():
+    response = server.app.test_client().post('/api/battle/turn', json={'companion': combatant('Eevee', 50)})
+    assert response.status_code == 400
+
+
+def test_misses_leave_hp_unchanged(play_turn):
+    inaccurate = dict(TACKLE, accuracy=50)
+    turn = play_turn(combatant('Eevee', 80), combatant('Rattata', 40), inaccurate, inaccurate, roll=0.9)
+    assert turn['firstAttacker'] == 'companion'
+    assert [entry['actor'] for entry in events(turn, 'miss')] == ['companion', 'enemy']
+    assert turn['companion']['currentHp'] == turn['enemy']['currentHp'] == 100
+    assert not turn['battleOver']
+
+
+def test_stat_stage_moves_change_the_right_side(play_turn):
+    turn = play_turn(combatant('Eevee', 80), combatant('Rattata', 40), SWORDS_DANCE, GROWL)
+    # Swords Dance +2 on the user, then Growl -1 on the companion
+    assert turn['companion']['statStages']['attack'] == 1
+    assert turn['enemy']['statStages']['attack'] == 0
+    assert [(entry['actor'], entry['stat']) for entry in events(turn, 'stat-change')] == [('companion', 'attack'), ('companion', 'attack')]
+    assert events(turn, 'damage') == []
+
+
+def test_poison_ticks_at_end_of_turn(play_turn):
+    poisoned = combatant('Rattata', 40, status=server.get_status_effect('poison'))
+    turn = play_turn(combatant('Eevee', 80), poisoned, SWORDS_DANCE, GROWL)
+    ticks = events(turn, 'status-damage')
+    assert [(entry['actor'], entry['damage']) for entry in ticks] == [('enemy', 12)]
+    assert turn['enemy']['currentHp'] == 88
+    assert turn['log'][-1] == ticks[0]
+
+
+def test_faint_ends_the_turn(play_turn):
+    turn = play_turn(combatant('Eevee', 80), combatant('Rattata', 40, currentHp=1), TACKLE, TACKLE, roll=0.99)
+    assert turn['enemy']['currentHp'] == 0
+    assert turn['fainted'] == ['enemy'] and turn['battleOver']
+    # the fainted enemy neither moves nor takes an end-of-turn tick
+    assert [entry['actor'] for entry in events(turn, 'move')] == ['companion']
+    assert turn['log'][-1] == {'actor': 'enemy', 'event': 'faint', 'message': 'fainted!'}
@@ -0,0 +1,51 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+def test_seeded_items_round_trip(client):
+    assert client.post('/api/seed').status_code == 200
+    held = {pokemon['name']: pokemon['item'] for pokemon in client.get('/api/pokemon').get_json()}
+    assert held['Pikachu'] == 'Light Ball'
+    assert held['Mewtwo'] == 'Twisted Spoon'
+    assert held['Jigglypuff'] is None
+    assert sum(item is not None for item in held.values()) == 9
+
+
+@pytest.mark.parametrize('item', ['Light Ball', 'light-ball'])
+def test_non_shop_items_can_be_held(client, item):
+    response = client.post('/api/pokemon', json={'id': 25, 'name': 'Pikachu', 'item': item})
+    assert response.status_code == 201
+    assert response.get_json()['item'] == 'Light Ball'
+    assert response.get_json()['itemId'] == 'light-ball'
+
+
+def test_unknown_items_are_still_rejected(client):
+    response = client.post('/api/pokemon', json={'id': 25, 'name': 'Pikachu', 'item': 'Rare Candy Bar'})
+    assert response.status_code == 400
+
+
+def test_legacy_item_names_survive_migration(client):
+    with server.app.app_context():
+        columns = {column['name'] for column in server.db.inspect(server.db.engine).get_columns('pokemon')}
+        if 'item' not in columns:
+            server.db.session.execute(server.db.text('ALTER TABLE pokemon ADD COLUMN item VARCHAR(100)'))
+        server.db.session.execute(server.db.text('DELETE FROM pokemon'))
+        for name, item in (('Pikachu', 'Light Ball'), ('Onix', 'Hard Stone'), ('Eevee', None)):
+            server.db.session.execute(
+                server.db.text("INSERT INTO pokemon (pokemon_id, name, level, item) VALUES (1, :name, 5, :item)"),
+                {'name': name, 'item': item}
+            )
+        server.db.session.commit()
+        server.migrate_item_ids()
+        rows = dict(server.db.session.execute(server.db.text('SELECT name, item_id FROM pokemon')).all())
+        assert server.db.session.execute(server.db.text('SELECT COUNT(*) FROM pokemon WHERE item IS NOT NULL')).scalar() == 0
+
+    assert rows == {'Pikachu': 'light-ball', 'Onix': 'Hard Stone', 'Eevee': None}
+    held = {pokemon['name']: pokemon['item'] for pokemon in client.get('/api/pokemon').get_json()}
+    assert held == {'Pikachu': 'Light Ball', 'Onix': 'Hard Stone', 'Eevee': None}
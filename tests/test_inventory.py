@@ -0,0 +1,35 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize('body', [[{'itemId': 'poke-ball', 'delta': 1}], 'poke-ball', 3])
+def test_item_batch_rejects_non_object_bodies(client, body):
+    response = client.post('/api/items/batch', json=body)
+    assert response.status_code == 400
+
+
+def test_item_batch_applies_deltas(client):
+    response = client.post('/api/items/batch', json={'deltas': {'poke-ball': 3}})
+    assert response.status_code == 200
+    assert response.get_json()['items']['poke-ball'] >= 3
+
+
+@pytest.mark.parametrize('quantity', ['five', None, 1.5, True])
+def test_item_quantity_must_be_an_integer(client, quantity):
+    client.post('/api/items', json={'itemId': 'great-ball', 'quantity': 2})
+    response = client.put('/api/items/great-ball', json={'quantity': quantity})
+    assert response.status_code == 400
+
+
+def test_item_quantity_update(client):
+    client.post('/api/items', json={'itemId': 'ultra-ball', 'quantity': 2})
+    response = client.put('/api/items/ultra-ball', json={'quantity': 7})
+    assert response.status_code == 200
+    assert response.get_json()['quantity'] == 7
+    assert client.put('/api/items/ultra-ball', json=[7]).status_code == 400
@@ -0,0 +1,90 @@
+import pytest
+
+import server
+
+
+def damage_payload(attacker_item=None, defender_item=None, attacker='Charmander', move='Ember'):
+    return {
+        'attacker': {'name': attacker, 'level': 50, 'item': attacker_item},
+        'defender': {'name': 'Bulbasaur', 'level': 50, 'item': defender_item},
+        'move': {'name': move}
+    }
+
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        return {'success': True, 'minDamage': 1, 'maxDamage': 2, 'source': 'battle-calc'}
+
+
+@pytest.fixture
+def native_mode(monkeypatch):
+    calls = []
+    monkeypatch.setattr(server, 'BATTLE_CALC_MODE', 'native')
+    monkeypatch.setattr(server.battle_calc, 'request', lambda method, route, payload: calls.append(route) or FakeResponse())
+    return calls
+
+
+def test_type_boosting_item_raises_base_power():
+    attacker = server.build_native_pokemon({'name': 'Charmander', 'level': 50, 'item': 'Charcoal'})
+    plain = dict(attacker, item=None)
+    defender = server.build_native_pokemon({'name': 'Bulbasaur', 'level': 50})
+    ember = server.get_native_move('Ember')
+
+    # 40 * 4915 / 4096 rounds to 48, as @smogon/calc computes it
+    assert server.native_damage_rolls(attacker, defender, ember) == server.native_damage_rolls(plain, defender, dict(ember, power=48))
+    # the boost only applies to moves of the item's type
+    scratch = server.get_native_move('Scratch')
+    assert server.native_damage_rolls(attacker, defender, scratch) == server.native_damage_rolls(plain, defender, scratch)
+
+
+def test_light_ball_only_boosts_pikachu():
+    defender = server.build_native_pokemon({'name': 'Squirtle', 'level': 50})
+    thunderbolt = server.get_native_move('Thunderbolt')
+    for name, boosted in (('Pikachu', True), ('Raichu', False)):
+        holder = server.build_native_pokemon({'name': name, 'level': 50, 'item': 'Light Ball'})
+        plain = dict(holder, item=None)
+        with_ball = server.native_damage_rolls(holder, defender, thunderbolt)
+        without = server.native_damage_rolls(plain, defender, thunderbolt)
+        assert (with_ball[-1] > without[-1]) is boosted
+
+
+def test_native_mode_answers_modelled_items_itself(native_mode):
+    for item in (None, 'Choice Band', 'Charcoal', 'Leftovers'):
+        result, status = server.run_battle_calc('/api/calculate-damage', damage_payload(item))
+        assert status == 200 and 'source' not in result
+    assert native_mode == []
+
+
+@pytest.mark.parametrize('side', ['attacker', 'defender'])
+def test_native_mode_falls_back_for_unsupported_items(native_mode, side):
+    payload = damage_payload(**{f'{side}_item': 'Expert Belt'})
+    result, status = server.run_battle_calc('/api/calculate-damage', payload)
+    assert status == 200
+    assert result['source'] == 'battle-calc'
+    assert native_mode == ['/api/calculate-damage']
+
+
+def test_native_mode_falls_back_for_unknown_moves(native_mode):
+    assert 'thunder-punch' not in server.MOVE_DATA
+    payload = damage_payload(move='Thunder Punch')
+    result, status = server.run_battle_calc('/api/calculate-damage', payload)
+    assert result['source'] == 'battle-calc'
+    assert native_mode == ['/api/calculate-damage']
+
+
+@pytest.mark.parametrize('route, payload', [
+    ('/api/calculate-damage', damage_payload(attacker='Chikorita')),
+    ('/api/calculate-stats', {'name': 'Chikorita', 'level': 50}),
+])
+def test_native_mode_falls_back_for_unknown_species(native_mode, route, payload):
+    result, status = server.run_battle_calc(route, payload)
+    assert result['source'] == 'battle-calc'
+    assert native_mode == [route]
+
+
+def test_native_mode_keeps_battle_calc_defaults_for_missing_names(native_mode):
+    result, status = server.run_battle_calc('/api/calculate-damage', {'attacker': {'level': 50}, 'defender': {}})
+    assert status == 200 and 'source' not in result
+    assert native_mode == []
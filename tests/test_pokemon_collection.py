@@ -0,0 +1,39 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client():
+    with server.app.app_context():
+        server.db.session.execute(server.db.delete(server.Pokemon))
+        for index in range(7):
+            server.db.session.add(server.Pokemon(pokemon_id=index + 1, name=f'Mon{index}', level=index % 3 + 1))
+        server.db.session.commit()
+        # legacy rows may hold NULL levels and catch times
+        server.db.session.execute(server.db.text('UPDATE pokemon SET level = NULL, caught_at = NULL WHERE pokemon_id > 4'))
+        server.db.session.commit()
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize('sort', ['level', 'date', 'number', 'name'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_pagination_visits_rows_with_null_sort_values(client, sort, order):
+    seen, cursor = [], None
+    while True:
+        params = {'sort': sort, 'order': order, 'limit': 2, 'fields': 'catchId'}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get('/api/pokemon', query_string=params).get_json()
+        seen += [pokemon['catchId'] for pokemon in page['items']]
+        cursor = page['nextCursor']
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == page['total'] == 7
+
+
+@pytest.mark.parametrize('name', ['minLevel', 'maxLevel'])
+def test_level_filters_must_be_integers(client, name):
+    response = client.get('/api/pokemon', query_string={name: 'abc'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f"Expected an integer for {name}, got 'abc'"
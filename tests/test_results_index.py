@@ -0,0 +1,22 @@
+import json
+
+import server
+
+
+def test_backfill_skips_files_indexed_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, 'TEST_RESULTS_DIR', str(tmp_path))
+    for name in ('race-a.json', 'race-b.json'):
+        (tmp_path / name).write_text(json.dumps({'results': []}))
+
+    index_test_run = server.index_test_run
+
+    def racing_index(filename, *args, **kwargs):
+        # another worker commits the same file between the indexed-set query and this insert
+        index_test_run(filename, *args, **kwargs)
+        return index_test_run(filename, *args, **kwargs)
+
+    monkeypatch.setattr(server, 'index_test_run', racing_index)
+    with server.app.app_context():
+        server.index_existing_test_results()
+        filenames = [filename for (filename,) in server.db.session.query(server.TestRun.filename)]
+    assert sorted(f for f in filenames if f.startswith('race-')) == ['race-a.json', 'race-b.json']
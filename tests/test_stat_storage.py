@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# STAT_STORAGE is read when server.py is imported, so each layout runs in its own process
+CREATE_SCRIPT = '''
+import json, sys
+import server
+client = server.app.test_client()
+statuses = []
+for ivs in json.loads(sys.argv[1]):
+    statuses.append(client.post('/api/pokemon', json={'id': 25, 'name': 'Pikachu', 'ivs': ivs}).status_code)
+    statuses.append(client.put('/api/companion', json={'pokemon_id': 25, 'name': 'Pikachu', 'ivs': ivs}).status_code)
+print(json.dumps(statuses))
+'''
+
+MIGRATE_SCRIPT = '''
+import json
+import server
+with server.app.app_context():
+    row = server.db.session.execute(server.db.text('SELECT * FROM pokemon')).mappings().one()
+    pokemon = server.Pokemon.query.one()
+    print(json.dumps({'row': dict(row), 'ivs': pokemon.to_dict()['ivs']}))
+'''
+
+
+def run_server_script(script, layout, database, *args):
+    env = dict(os.environ, STAT_STORAGE=layout, ENCOUNTER_FLUSH_INTERVAL='0',
+               DATABASE_URL=f'sqlite:///{database}', PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, '-c', script, *args], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('layout', ['columns', 'packed'])
+def test_layouts_reject_the_same_ivs(tmp_path, layout):
+    cases = [{'hp': 32}, {'attack': -1}, {'speed': 'abc'}, {'defense': 1.5}, {'hp': 31, 'speed': 0}]
+    statuses = run_server_script(CREATE_SCRIPT, layout, tmp_path / 'test.db', json.dumps(cases))
+    assert statuses == [400, 400] * 4 + [201, 200]
+
+
+def test_packing_clears_the_column_layout(tmp_path):
+    database = tmp_path / 'test.db'
+    run_server_script(CREATE_SCRIPT, 'columns', database, json.dumps([{'hp': 31, 'speed': 7}]))
+
+    packed = run_server_script(MIGRATE_SCRIPT, 'packed', database)
+    assert packed['row']['ivs_packed'] is not None
+    assert all(packed['row'][name] is None for name in ('hp_iv', 'speed_iv', 'hp_ev'))
+    assert (packed['ivs']['hp'], packed['ivs']['speed']) == (31, 7)
+
+    unpacked = run_server_script(MIGRATE_SCRIPT, 'columns', database)
+    assert unpacked['row']['ivs_packed'] is None
+    assert (unpacked['row']['hp_iv'], unpacked['row']['speed_iv']) == (31, 7)
@@ -0,0 +1,58 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    {'iterations': 'abc'},
+    {'iterations': None},
+    {'iterations': 0},
+    {'iterations': -5},
+    {'iterations': 10 ** 9},
+    {'iterations': [1000]},
+    {'workers': 'many'},
+    {'workers': 0},
+    {'workers': 10 ** 6},
+    {'seed': 'abc'},
+    {'seed': -1},
+])
+@pytest.mark.parametrize('mode', ['battles', 'vectorized'])
+def test_run_all_tests_rejects_invalid_params(client, mode, body):
+    response = client.post('/api/run-all-tests', json={'mode': mode, **body})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_stream_rejects_invalid_params(client):
+    response = client.post('/api/run-all-tests/stream', json={'iterations': 'abc'})
+    assert response.status_code == 400
+
+
+def test_parse_sweep_params_accepts_numeric_strings():
+    params = server.parse_sweep_params({'iterations': '5', 'seed': '7'})
+    assert params['iterations'] == 5 and params['seed'] == 7 and params['workers'] == 1
+
+
+@pytest.mark.parametrize('mode', ['battles', 'vectorized'])
+@pytest.mark.parametrize('body', [{'iterations': 'abc'}, {'iterations': 0}, {'seed': 'abc'}, {'workers': 0}])
+def test_submit_test_job_rejects_invalid_params(client, monkeypatch, mode, body):
+    if mode == 'vectorized' and server.np is None:
+        pytest.skip('numpy is not installed')
+    submitted = []
+    monkeypatch.setattr(server.simulation_jobs, 'submit', submitted.append)
+    response = client.post('/api/test-jobs', json={'mode': mode, **body})
+    assert response.status_code == 400
+    assert submitted == []
+
+
+def test_vectorized_helpers_report_missing_numpy(monkeypatch):
+    monkeypatch.setattr(server, 'np', None)
+    with pytest.raises(RuntimeError, match='numpy'):
+        server.pack_stats_array([[0] * 6], server.IV_BITS)
+    with pytest.raises(RuntimeError, match='numpy'):
+        server.unpack_stats_array([0], server.IV_BITS)